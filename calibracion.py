@@ -0,0 +1,201 @@
+# Calibración de la dificultad: Monte Carlo en paralelo sobre LEVEL_CONFIG (no depende de Ursina)
+# Tiradores simulados con tiempo de reacción, error de puntería y cadencia propios juegan
+# muchas partidas de cada nivel con las reglas de la simulación (aparición, movimiento,
+# impactos y oclusores de la cabina), repartidas en un pool de procesos. Cada partida solo
+# devuelve su precisión, así que la tasa de superación para cualquier 'accuracy_goal' sale
+# del mismo lote sin volver a simular.
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from escenario import range_occluders
+from impactos import HitTester, Occluders, cross
+from simulacion import CAMERA_POSITION, LEVEL_CONFIG, GameState
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CALIBRATION_REPORT = os.path.join(BASE_DIR, 'assets', 'cache', 'calibracion.json')
+
+# ======================================================================================
+# --- Tiradores simulados ---
+# ======================================================================================
+# 'reaction': segundos desde que un objetivo entra entero en la cabina hasta que se le dispara
+# 'aim_error': desviación típica del error de puntería en grados (en cada eje)
+# 'fire_rate': disparos por segundo como máximo (el arma puede limitar más)
+SHOOTERS = {
+    'novato': {'reaction': 0.5, 'aim_error': 1.5, 'fire_rate': 2.5},
+    'medio': {'reaction': 0.35, 'aim_error': 0.9, 'fire_rate': 4},
+    'experto': {'reaction': 0.2, 'aim_error': 0.4, 'fire_rate': 8},
+}
+REFERENCE_SHOOTER = 'medio'
+TARGET_PASS_RATE = {1: 0.9, 2: 0.75, 3: 0.6, 4: 0.5} # Tasa de superación buscada para el tirador de referencia
+GOALS = np.arange(0, 101, 5)                 # Valores de 'accuracy_goal' de las curvas
+VISIBLE_X = 19.5                             # Cara interior de las paredes laterales
+
+# Juega un nivel con la configuración 'config' y devuelve la precisión final (NaN si no
+# terminó en 'max_time'). 'rng' decide los errores de puntería. El instante en que cada
+# objetivo entra entero en la cabina se calcula con su trayectoria al verlo por primera
+# vez, así que el tirador solo mira el enjambre cuando podría disparar.
+def play_level(level, config, shooter, seed, hit_tester, rng, max_time=600):
+    state = GameState(seed=seed, level_config={level: config})
+    state.start_level(level)
+    origin = np.array(CAMERA_POSITION, dtype=np.float64)
+    up = np.array((0.0, 1.0, 0.0))
+    interval = max(1 / shooter['fire_rate'], state.fire_interval)
+    error = math.radians(shooter['aim_error'])
+    reaction = shooter['reaction']
+    ready_at = {} # id -> instante a partir del cual el tirador puede dispararle
+    next_shot = 0.0
+    while state.active and state.time < max_time:
+        state.step()
+        state.events.clear()
+        swarm = state.swarm
+        n = swarm.count
+        if state.time < next_shot or not n:
+            continue
+        # Objetivos enteros a la vista a los que ya se ha podido reaccionar
+        ready = []
+        for target_id in swarm.ids[:n].tolist():
+            if target_id not in ready_at:
+                target = state.registry.get(target_id)
+                ready_at[target_id] = target.spawn_time + target.path.entry_time(VISIBLE_X - target.scale / 2) + reaction
+            ready.append(ready_at[target_id])
+        ready = np.array(ready)
+        inside = np.abs(swarm.centers[:n, 0]) + swarm.radii[:n] < VISIBLE_X
+        candidates = np.flatnonzero(inside & (ready <= state.time))
+        if not len(candidates):
+            waiting = ready[ready > state.time]
+            if len(waiting):
+                next_shot = waiting.min() # Nada que hacer hasta que reaccione al siguiente
+            continue
+        # Dispara al objetivo al que reaccionó antes
+        slot = candidates[ready[candidates].argmin()]
+        forward = swarm.centers[slot] - origin
+        forward /= np.linalg.norm(forward)
+        right = cross(up, forward)
+        right /= np.linalg.norm(right)
+        aim_x, aim_y = rng.normal(0, error, 2)
+        direction = forward + math.tan(aim_x) * right + math.tan(aim_y) * cross(forward, right)
+        if state.fire():
+            state.resolve_shot(hit_tester, swarm, origin, direction, up)
+        next_shot = state.time + interval
+    return state.accuracy if not state.active else float('nan')
+
+# ======================================================================================
+# --- Reparto en procesos ---
+# ======================================================================================
+# Cada tarea juega 'runs' partidas de un nivel con una configuración y un tirador, con
+# semillas consecutivas: el resultado no depende de cuántos procesos haya ni de su orden.
+_hit_tester = None
+
+def _init_worker():
+    global _hit_tester
+    _hit_tester = HitTester(Occluders(range_occluders()))
+
+def run_task(task):
+    level, config, shooter, first_seed, runs = task
+    rng = np.random.default_rng(first_seed)
+    return np.array([play_level(level, config, shooter, first_seed + run, _hit_tester, rng)
+                     for run in range(runs)], dtype=np.float32)
+
+# Tasa de superación para cada objetivo de precisión de 'goals' (vectorizado)
+def pass_curve(accuracies, goals=GOALS):
+    finished = accuracies[np.isfinite(accuracies)]
+    if not len(finished):
+        return np.zeros(len(goals))
+    return (finished[None, :] >= goals[:, None]).mean(axis=1)
+
+# Variantes de la configuración de un nivel: velocidad y tamaño multiplicados por cada
+# factor y número de objetivos desplazado por cada delta
+def config_variants(config, speed_factors, scale_factors, target_deltas):
+    variants = []
+    for speed, scale, delta in itertools.product(speed_factors, scale_factors, target_deltas):
+        targets = config['targets'] + delta
+        if targets < 1:
+            continue
+        variant = dict(config, speed=tuple(round(value * speed, 2) for value in config['speed']),
+                       scale=round(config['scale'] * scale, 2), targets=targets)
+        variants.append(((speed, scale, delta), variant))
+    return variants
+
+# Juega todas las tareas en 'workers' procesos; devuelve las precisiones de cada tarea en orden
+def run_tasks(tasks, workers):
+    if workers == 1:
+        _init_worker()
+        return [run_task(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        return list(executor.map(run_task, tasks))
+
+# Configuración sugerida para un nivel: la variante y el 'accuracy_goal' cuya tasa de
+# superación para el tirador de referencia queda más cerca de la buscada; a igualdad, la
+# que menos cambia la configuración actual.
+def suggest(level, config, variants, curves, target_rate):
+    best = None
+    for (factors, variant), curve in zip(variants, curves):
+        for goal, rate in zip(GOALS.tolist(), curve.tolist()):
+            change = abs(factors[0] - 1) + abs(factors[1] - 1) + abs(factors[2]) / config['targets'] \
+                     + abs(goal - config['accuracy_goal']) / 100
+            key = (round(abs(rate - target_rate), 2), change)
+            if best is None or key < best[0]:
+                best = (key, dict(variant, accuracy_goal=goal), rate)
+    return best[1], best[2]
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Calibra la dificultad de los niveles con tiradores simulados')
+    parser.add_argument('--levels', type=int, nargs='+',
+                        default=[level for level, config in LEVEL_CONFIG.items() if not config.get('endless')])
+    parser.add_argument('--runs', type=int, default=100, help='partidas por configuración y tirador')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--speed', type=float, nargs='+', default=[0.8, 0.9, 1, 1.1, 1.2], help='factores de velocidad')
+    parser.add_argument('--scale', type=float, nargs='+', default=[0.8, 0.9, 1, 1.1, 1.2], help='factores de tamaño')
+    parser.add_argument('--targets', type=int, nargs='+', default=[-2, 0, 2], help='objetivos de más o de menos')
+    args = parser.parse_args()
+
+    # Curvas de la configuración actual para cada tirador y barrido de variantes con el de referencia
+    curve_keys = [(level, name) for level in args.levels for name in SHOOTERS]
+    tasks = [(level, LEVEL_CONFIG[level], SHOOTERS[name], args.seed, args.runs) for level, name in curve_keys]
+    sweep = {level: config_variants(LEVEL_CONFIG[level], args.speed, args.scale, args.targets) for level in args.levels}
+    tasks += [(level, variant, SHOOTERS[REFERENCE_SHOOTER], args.seed, args.runs)
+              for level in args.levels for _, variant in sweep[level]]
+
+    start = time.perf_counter()
+    results = iter(run_tasks(tasks, args.workers))
+    elapsed = time.perf_counter() - start
+    curves = {key: pass_curve(next(results)) for key in curve_keys}
+    report = {'runs': args.runs, 'workers': args.workers, 'seconds': elapsed, 'levels': {}}
+
+    games = len(tasks) * args.runs
+    print(f"{len(tasks)} configuraciones x {args.runs} partidas = {games} partidas en {elapsed:.1f}s "
+          f"con {args.workers} procesos ({games / elapsed:.0f} partidas/s)")
+    goal_columns = [goal for goal in GOALS.tolist() if goal % 10 == 0]
+    for level in args.levels:
+        config = LEVEL_CONFIG[level]
+        sweep_curves = [pass_curve(next(results)) for _ in sweep[level]]
+        suggestion, rate = suggest(level, config, sweep[level], sweep_curves, TARGET_PASS_RATE.get(level, 0.5))
+        level_curves = {name: curves[(level, name)].tolist() for name in SHOOTERS}
+        report['levels'][level] = {'config': config, 'curves': level_curves, 'suggestion': suggestion,
+                                   'suggested_pass_rate': rate}
+
+        current = np.searchsorted(GOALS, config['accuracy_goal'])
+        print(f"\nNivel {level} (objetivo actual {config['accuracy_goal']}%): tasa de superación por 'accuracy_goal'")
+        print('  ' + ' ' * 8 + ''.join(f"{goal:>6}%" for goal in goal_columns))
+        for name in SHOOTERS:
+            curve = curves[(level, name)]
+            print(f"  {name:<8}" + ''.join(f"{curve[GOALS.tolist().index(goal)] * 100:>6.0f}%" for goal in goal_columns)
+                  + f"   (actual: {curve[current] * 100:.0f}%)")
+        changes = {key: value for key, value in suggestion.items() if config.get(key) != value}
+        print(f"  Sugerencia para {TARGET_PASS_RATE.get(level, 0.5) * 100:.0f}% con '{REFERENCE_SHOOTER}': "
+              f"{changes or 'sin cambios'} -> {rate * 100:.0f}%")
+
+    os.makedirs(os.path.dirname(CALIBRATION_REPORT), exist_ok=True)
+    with open(CALIBRATION_REPORT, 'w') as file:
+        json.dump(report, file, indent=1)
+    print('\nInforme guardado en', os.path.relpath(CALIBRATION_REPORT, BASE_DIR))
@@ -0,0 +1,106 @@
+# Presets de calidad gráfica y gobernador automático por presupuesto de frame (no depende de Ursina)
+import json
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+QUALITY_LOG = os.path.join(BASE_DIR, 'assets', 'cache', 'calidad.jsonl') # Un cambio de calidad por línea
+
+# ======================================================================================
+# --- Presets de calidad ---
+# ======================================================================================
+# De menor a mayor coste:
+#   shadows: el sol proyecta sombras; shadow_map: lado del mapa de sombras (píxeles)
+#   texture_size: lado máximo de las texturas (0 = sin límite); se reducen al recargarlas
+#   render_scale: fracción de la resolución del monitor en pantalla completa
+#   msaa: muestras de antialiasing (0 = desactivado)
+QUALITY_PRESETS = [
+    {'name': 'baja', 'shadows': False, 'shadow_map': 512, 'texture_size': 256, 'render_scale': 0.5, 'msaa': 0},
+    {'name': 'media', 'shadows': False, 'shadow_map': 512, 'texture_size': 512, 'render_scale': 0.75, 'msaa': 0},
+    {'name': 'alta', 'shadows': True, 'shadow_map': 1024, 'texture_size': 0, 'render_scale': 1.0, 'msaa': 0},
+    {'name': 'ultra', 'shadows': True, 'shadow_map': 2048, 'texture_size': 0, 'render_scale': 1.0, 'msaa': 4},
+]
+QUALITY_NAMES = [preset['name'] for preset in QUALITY_PRESETS]
+DEFAULT_QUALITY = 'alta'
+
+def quality_index(name):
+    return QUALITY_NAMES.index(name)
+
+# ======================================================================================
+# --- Gobernador de calidad ---
+# ======================================================================================
+# Vigila el tiempo de trabajo de los últimos 'window' frames (sin contar la espera del
+# limitador de FPS) y compara su percentil 90 con el presupuesto del frame:
+#   - por encima de 'downgrade_at' x presupuesto, baja un nivel de calidad;
+#   - por debajo de 'upgrade_at' x presupuesto, sube un nivel.
+# Histéresis: los umbrales están separados, tras cada cambio se vacía la ventana y se
+# espera 'cooldown' segundos, y volver a un nivel del que ya se bajó exige el doble de
+# espera cada vez (así no oscila entre dos niveles).
+class QualityGovernor:
+    def __init__(self, presets=QUALITY_PRESETS, level=DEFAULT_QUALITY, target_fps=60, window=90,
+                 downgrade_at=0.9, upgrade_at=0.6, cooldown=3.0, log_path=QUALITY_LOG):
+        self.presets = presets
+        self.level = quality_index(level) if isinstance(level, str) else level
+        self.budget_ms = 1000 / target_fps
+        self.frames = deque(maxlen=window) # ms de trabajo de los últimos frames
+        self.downgrade_at = downgrade_at
+        self.upgrade_at = upgrade_at
+        self.cooldown = cooldown
+        self.log_path = log_path
+        self.enabled = True
+        self.waited = 0.0      # Segundos desde el último cambio
+        self.downgrades = {}   # nivel -> veces que hubo que bajar desde él
+        self.changes = []      # Registro de los cambios de esta sesión
+
+    @property
+    def preset(self):
+        return self.presets[self.level]
+
+    # Registra un frame; devuelve el nuevo preset si hay que cambiar de calidad, si no None
+    def update(self, frame_ms, dt):
+        if not self.enabled:
+            return None
+        self.waited += dt
+        self.frames.append(frame_ms)
+        if len(self.frames) < self.frames.maxlen or self.waited < self.cooldown:
+            return None
+
+        p90 = float(np.percentile(self.frames, 90))
+        if p90 > self.budget_ms * self.downgrade_at and self.level > 0:
+            self.downgrades[self.level] = self.downgrades.get(self.level, 0) + 1
+            return self._change(self.level - 1, p90)
+        if p90 < self.budget_ms * self.upgrade_at and self.level < len(self.presets) - 1:
+            # Cada bajada anterior desde el nivel superior duplica la espera para volver a él
+            if self.waited >= self.cooldown * 2 ** self.downgrades.get(self.level + 1, 0):
+                return self._change(self.level + 1, p90)
+        return None
+
+    # Fija un nivel a mano (por ejemplo, desde la línea de comandos); no se registra
+    def set_level(self, level):
+        self.level = level
+        self._restart()
+
+    def _restart(self):
+        self.frames.clear()
+        self.waited = 0.0
+
+    def _change(self, level, p90):
+        change = {
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'from': self.preset['name'],
+            'to': self.presets[level]['name'],
+            'p90_ms': round(p90, 2),
+            'budget_ms': round(self.budget_ms, 2),
+        }
+        self.level = level
+        self._restart()
+        self.changes.append(change)
+        print(f"Calidad {change['from']} -> {change['to']} (p90 {change['p90_ms']:.1f} ms, presupuesto {change['budget_ms']:.1f} ms)")
+        if self.log_path:
+            os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+            with open(self.log_path, 'a') as file:
+                file.write(json.dumps(change) + '\n')
+        return self.preset
@@ -0,0 +1,77 @@
+# Enjambre de objetivos: coloca todos los objetivos vivos con una única evaluación vectorizada
+import math
+
+import numpy as np
+
+from impactos import TargetArrays
+from trayectorias import evaluate
+
+EXIT_X = 24  # Límite lateral a partir del cual un objetivo se sale de la pantalla
+FREQUENCY, PHASE, SPAWN_TIME, EXIT_TIME = range(4) # Columnas de 'timing'
+
+# ======================================================================================
+# --- Enjambre de objetivos ---
+# ======================================================================================
+# Además de centros y radios guarda la trayectoria de cada objetivo (ver trayectorias.py),
+# su instante de aparición y su instante de salida en arrays NumPy, de modo que colocar y
+# retirar los objetivos que se salen cuesta lo mismo para 1 que para cientos. Cada columna
+# es una copia más al retirar, así que la trayectoria va en pocas y anchas. Los pasos en los
+# que no toca salir a nadie (la primera salida se conoce) ni hay curvas solo hacen la recta.
+class TargetSwarm(TargetArrays):
+    columns = TargetArrays.columns + ('paths', 'timing', 'terms')
+
+    def __init__(self, capacity=64):
+        super().__init__(capacity)
+        self.paths = np.zeros((capacity, 6, 3), dtype=np.float64) # Trajectory.coefficients
+        self.timing = np.zeros((capacity, 4), dtype=np.float64)   # Frecuencia, fase, aparición y salida
+        self.terms = np.zeros(capacity, dtype=np.uint8)           # Términos que usa cada trayectoria
+        self.used_terms = 0        # Unión de los términos de los objetivos añadidos desde que se vació
+        self.next_exit = math.inf  # Instante de salida más temprano (puede ser de uno ya retirado)
+        # Si advance() coloca los objetivos: quien solo necesita sus posiciones de vez en
+        # cuando (el anfitrión del versus, al resolver disparos con positions_at) lo desactiva
+        # y cada paso se queda en comprobar las salidas
+        self.placing = True
+
+    # Añade un objetivo que aparece en 'spawn_time' y sigue 'path' (una Trajectory). Su
+    # instante de salida se calcula aquí una sola vez.
+    def add_path(self, target_id, radius, path, spawn_time):
+        timing = (path.frequency, path.phase, spawn_time, spawn_time + path.exit_time(EXIT_X))
+        self.used_terms |= path.terms
+        self.next_exit = min(self.next_exit, timing[EXIT_TIME])
+        return self.add(target_id, centers=path.start, radii=radius, paths=path.coefficients,
+                        timing=timing, terms=path.terms)
+
+    # Coloca todos los objetivos en el instante 'time' y retira en bloque los que ya han
+    # salido. Devuelve la lista de ids retirados.
+    def advance(self, time):
+        n = self.count
+        if n == 0:
+            return []
+        timing = self.timing[:n]
+        if self.placing:
+            evaluate(time - timing[:, SPAWN_TIME], self.paths[:n], timing[:, FREQUENCY], timing[:, PHASE],
+                     self.used_terms, out=self.centers[:n])
+        if time < self.next_exit:
+            return []
+        escaped = np.flatnonzero(timing[:, EXIT_TIME] <= time)
+        removed = self.remove_slots(escaped) if len(escaped) else []
+        self._rescan()
+        return removed
+
+    # Posiciones (N x 3) de los objetivos vivos en otro instante 'time', sin moverlos: por
+    # ejemplo, para resolver un disparo en el instante en que se hizo
+    def positions_at(self, time):
+        n = self.count
+        timing = self.timing[:n]
+        return evaluate(time - timing[:, SPAWN_TIME], self.paths[:n], timing[:, FREQUENCY], timing[:, PHASE],
+                        self.used_terms)
+
+    # Recalcula la primera salida y los términos en uso con los objetivos que quedan
+    def _rescan(self):
+        n = self.count
+        self.next_exit = self.timing[:n, EXIT_TIME].min() if n else math.inf
+        self.used_terms = int(np.bitwise_or.reduce(self.terms[:n])) if n else 0
+
+    def clear(self):
+        super().clear()
+        self._rescan()
@@ -0,0 +1,76 @@
+# Cabina de disparo estática: una sola geometría con un atlas de texturas, y sus oclusores
+from panda3d.core import NodePath, RenderState, SamplerState, TextureStage
+
+RANGE_ATLAS = 'atlas_cabina' # Nombre del atlas en la caché de recursos
+
+# ======================================================================================
+# --- Piezas de la cabina ---
+# ======================================================================================
+# nombre -> (modelo, posición, escala, textura, repeticiones de la textura en x e y)
+RANGE_PARTS = {
+    'back_wall': ('cube', (0, 5, 30), (40, 30, 1), 'assets/textures/fondoMario.jpg', (1, 1)),
+    'left_wall': ('cube', (-20, 5, 7.5), (1, 30, 85), 'assets/textures/fondoMario.jpg', (1, 1)),
+    'right_wall': ('cube', (20, 5, 7.5), (1, 30, 85), 'assets/textures/fondoMario.jpg', (1, 1)),
+    'ceiling': ('cube', (0, 20, 9.5), (49, 1, 85), 'assets/textures/cieloMario.jpg', (1, 1)),
+    'ground': ('plane', (0, -10, 5), (150, 1, 150), 'assets/textures/sueloMario.jpg', (2, 2)),
+}
+
+# Celdas del atlas: cada textura con sus repeticiones, una sola vez
+def range_atlas_cells():
+    cells = []
+    for _, _, _, texture, tiles in RANGE_PARTS.values():
+        if (texture, tiles) not in cells:
+            cells.append((texture, tiles))
+    return cells
+
+# Oclusores para la detección de impactos: cada pieza como caja (centro, tamaño). Van
+# aparte de la geometría dibujada; el plano del suelo no tiene grosor.
+def range_occluders():
+    return [(position, (scale[0], 0, scale[2]) if model == 'plane' else scale)
+            for model, position, scale, _, _ in RANGE_PARTS.values()]
+
+# (llamadas de dibujo, nodos) de un subárbol de la escena
+def count_nodes(node_path):
+    geoms = sum(geom_node.node().getNumGeoms() for geom_node in node_path.findAllMatches('**/+GeomNode'))
+    return geoms, node_path.findAllMatches('**').getNumPaths()
+
+# ======================================================================================
+# --- Geometría unificada ---
+# ======================================================================================
+# Copia el modelo de cada pieza, le asigna el atlas con una matriz de textura que lleva sus
+# UV a su celda y aplana todo: flattenStrong() aplica las transformaciones y las matrices de
+# textura a los vértices y une las geometrías que comparten estado en una sola. La cabina
+# no tiene colisionadores (los impactos usan range_occluders()).
+# Devuelve (nodo de la cabina, informe de llamadas de dibujo y nodos antes y después).
+def build_static_range(parent, texture, rects):
+    from ursina import application
+    from ursina.mesh_importer import load_model
+
+    texture.setWrapU(SamplerState.WM_clamp)
+    texture.setWrapV(SamplerState.WM_clamp)
+    stage = TextureStage.getDefault()
+    root = NodePath('static_range')
+    for name, (model, position, scale, path, _) in RANGE_PARTS.items():
+        # Igual que Entity: primero los modelos del juego, después los incluidos en Ursina
+        mesh = load_model(model) or load_model(model, application.internal_models_compressed_folder)
+        part = mesh.copyTo(root)
+        part.setName(name)
+        # Sin el estado propio del modelo (transparencia, color de vértice...), para que todas
+        # las piezas compartan estado y se puedan unir
+        for node in part.findAllMatches('**'):
+            node.setState(RenderState.makeEmpty())
+            if node.node().isGeomNode():
+                for index in range(node.node().getNumGeoms()):
+                    node.node().setGeomState(index, RenderState.makeEmpty())
+        part.setPos(*position)
+        part.setScale(*scale)
+        u0, v0, u1, v1 = rects[path]
+        part.setTexOffset(stage, u0, v0)
+        part.setTexScale(stage, u1 - u0, v1 - v0)
+    root.setTexture(texture, 1)
+
+    before = count_nodes(root)
+    root.flattenStrong()
+    after = count_nodes(root)
+    root.reparentTo(parent)
+    return root, {'draw_calls': [before[0], after[0]], 'nodes': [before[1], after[1]]}
@@ -0,0 +1,272 @@
+# Detección de impactos analítica y vectorizada con NumPy (no depende de Ursina)
+# Resuelve un disparo contra todos los objetivos vivos con una sola prueba rayo-billboard
+# en lugar de un raycast contra toda la escena.
+from collections import deque
+
+import numpy as np
+
+MAX_DISTANCE = 200  # Alcance del disparo (igual que el raycast original)
+EPSILON = 1e-9
+HISTORY_FRAMES = 32 # Frames mostrados que se recuerdan para compensar el retraso de los disparos
+
+# ======================================================================================
+# --- Oclusores estáticos ---
+# ======================================================================================
+# Cajas alineadas con los ejes (paredes, techo y suelo) que tapan a los objetivos.
+# Cada caja se define por su centro y su tamaño.
+class Occluders:
+    def __init__(self, boxes=()):
+        boxes = list(boxes)
+        centers = np.array([center for center, size in boxes], dtype=np.float64).reshape(-1, 3)
+        half_sizes = np.array([size for center, size in boxes], dtype=np.float64).reshape(-1, 3) / 2
+        self.mins = centers - half_sizes
+        self.maxs = centers + half_sizes
+
+    # Distancia a la primera caja que corta el rayo (inf si no corta ninguna)
+    def nearest(self, origin, direction, max_distance=MAX_DISTANCE):
+        return self.nearest_many(origin, np.asarray(direction)[None], max_distance)[0]
+
+    # Igual que nearest() para varios rayos con el mismo origen ('directions' es P x 3)
+    def nearest_many(self, origin, directions, max_distance=MAX_DISTANCE):
+        if not len(self.mins):
+            return np.full(len(directions), np.inf)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inverse = 1 / np.where(np.abs(directions) < EPSILON, EPSILON, directions)[:, None, :]
+            t1 = (self.mins - origin) * inverse # P x cajas x 3
+            t2 = (self.maxs - origin) * inverse
+        t_enter = np.minimum(t1, t2).max(axis=2)
+        t_exit = np.maximum(t1, t2).min(axis=2)
+        # Solo cuentan las cajas que el rayo atraviesa por delante del origen
+        valid = (t_enter <= t_exit) & (t_enter >= 0) & (t_enter <= max_distance)
+        return np.where(valid, t_enter, np.inf).min(axis=1)
+
+# ======================================================================================
+# --- Arrays de objetivos ---
+# ======================================================================================
+# Guarda los ids, centros y radios (mitad del tamaño del quad) de los objetivos vivos en
+# arrays contiguos. Añadir y quitar objetivos es O(1): al quitar, el último ocupa el hueco.
+# Las subclases añaden columnas propias listándolas en 'columns'.
+class TargetArrays:
+    columns = ('centers', 'radii')
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.centers = np.zeros((capacity, 3), dtype=np.float64)
+        self.radii = np.zeros(capacity, dtype=np.float64)
+        self.slots = {}  # id del objetivo -> posición en los arrays
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        capacity = len(self.ids) * 2
+        self.ids = np.resize(self.ids, capacity)
+        for name in self.columns:
+            array = getattr(self, name)
+            setattr(self, name, np.resize(array, (capacity,) + array.shape[1:]))
+
+    # Añade un objetivo; 'values' da el valor de cada columna. Devuelve su posición.
+    def add(self, target_id, **values):
+        if self.count == len(self.ids):
+            self._grow()
+        slot = self.count
+        self.ids[slot] = target_id
+        for name in self.columns:
+            getattr(self, name)[slot] = values.get(name, 0)
+        self.slots[target_id] = slot
+        self.count += 1
+        return slot
+
+    def remove(self, target_id):
+        slot = self.slots.pop(target_id, None)
+        if slot is None:
+            return
+        last = self.count - 1
+        if slot != last:
+            # Mueve el último objetivo al hueco para mantener los arrays contiguos
+            moved_id = int(self.ids[last])
+            self.ids[slot] = moved_id
+            for name in self.columns:
+                array = getattr(self, name)
+                array[slot] = array[last]
+            self.slots[moved_id] = slot
+        self.count = last
+
+    # Quita de una vez los objetivos en las posiciones 'slots' (array de índices sin repetir).
+    # Los huecos se rellenan con los objetivos supervivientes del final. Devuelve sus ids.
+    def remove_slots(self, slots):
+        n = self.count
+        new_count = n - len(slots)
+        removed_ids = self.ids[slots].tolist()
+        keep = np.ones(n, dtype=bool)
+        keep[slots] = False
+        holes = slots[slots < new_count]
+        movers = np.flatnonzero(keep[new_count:]) + new_count
+        if len(holes):
+            self.ids[holes] = self.ids[movers]
+            for name in self.columns:
+                array = getattr(self, name)
+                array[holes] = array[movers]
+            for slot, target_id in zip(holes.tolist(), self.ids[holes].tolist()):
+                self.slots[target_id] = slot
+        for target_id in removed_ids:
+            del self.slots[target_id]
+        self.count = new_count
+        return removed_ids
+
+    def move(self, target_id, center):
+        self.centers[self.slots[target_id]] = center
+
+    def center(self, target_id):
+        return self.centers[self.slots[target_id]]
+
+    def clear(self):
+        self.slots.clear()
+        self.count = 0
+
+# ======================================================================================
+# --- Historial de posiciones ---
+# ======================================================================================
+# Copia de los objetivos tal y como se mostraron en un frame. Tiene los mismos campos que
+# usa HitTester.cast(), así que un disparo se puede resolver contra un frame pasado.
+class TargetSnapshot:
+    __slots__ = ('time', 'step', 'presented_at', 'count', 'ids', 'centers', 'radii')
+
+    def __init__(self, time, presented_at, targets, step=0):
+        n = targets.count
+        self.time = time                 # Reloj de la simulación del frame
+        self.step = step                 # Paso de simulación del frame
+        self.presented_at = presented_at # Instante (reloj monotónico) en que se mostró
+        self.count = n
+        self.ids = targets.ids[:n].copy()
+        self.centers = targets.centers[:n].copy()
+        self.radii = targets.radii[:n].copy()
+
+# Buffer circular con los últimos frames mostrados
+class TargetHistory:
+    def __init__(self, capacity=HISTORY_FRAMES):
+        self.snapshots = deque(maxlen=capacity)
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def record(self, time, presented_at, targets, step=0):
+        self.snapshots.append(TargetSnapshot(time, presented_at, targets, step))
+
+    # Frame que estaba en pantalla en el instante 'presented_at' (el último mostrado antes);
+    # si es más antiguo que todo el historial, el más antiguo. None si está vacío.
+    def at(self, presented_at):
+        for snapshot in reversed(self.snapshots):
+            if snapshot.presented_at <= presented_at:
+                return snapshot
+        return self.snapshots[0] if self.snapshots else None
+
+    def clear(self):
+        self.snapshots.clear()
+
+# Producto vectorial de vectores (o filas de vectores) 3D. Mismas operaciones que
+# np.cross, sin su manejo genérico de ejes, que domina el coste con pocos objetivos.
+def cross(a, b):
+    a = np.asarray(a)
+    b = np.asarray(b)
+    ax, ay, az = a[..., 0], a[..., 1], a[..., 2]
+    bx, by, bz = b[..., 0], b[..., 1], b[..., 2]
+    return np.stack((ay * bz - az * by, az * bx - ax * bz, ax * by - ay * bx), axis=-1)
+
+# ======================================================================================
+# --- Motor de impactos ---
+# ======================================================================================
+# Resuelve disparos contra unos TargetArrays con una sola prueba vectorizada.
+# Los objetivos son quads con billboard (siempre miran a la cámara con el 'up' de la
+# cámara), así que el área de impacto es un cuadrado perpendicular a la línea de visión.
+class HitTester:
+    def __init__(self, occluders=None):
+        self.occluders = occluders or Occluders()
+
+    # Resuelve un disparo. 'up' es el vector 'arriba' de la cámara (orienta los billboards).
+    # Devuelve (id del objetivo, distancia) del impacto más cercano, o None si el rayo no
+    # alcanza ningún objetivo o una pared lo tapa antes.
+    def cast(self, targets, origin, direction, up=(0, 1, 0), max_distance=MAX_DISTANCE):
+        ids, distances = self.cast_many(targets, origin, np.asarray(direction)[None], up, max_distance)
+        if ids[0] < 0:
+            return None
+        return int(ids[0]), float(distances[0])
+
+    # Resuelve varios rayos con el mismo origen (por ejemplo, los perdigones de la escopeta)
+    # en una sola evaluación P x N. Devuelve dos arrays de P elementos: el id del objetivo
+    # alcanzado por cada rayo (-1 si ninguno) y la distancia del impacto (inf si ninguno).
+    def cast_many(self, targets, origin, directions, up=(0, 1, 0), max_distance=MAX_DISTANCE):
+        origin = np.asarray(origin, dtype=np.float64)
+        directions = np.asarray(directions, dtype=np.float64).reshape(-1, 3)
+        directions = directions / np.linalg.norm(directions, axis=1)[:, None]
+        up = np.asarray(up, dtype=np.float64)
+
+        rays = len(directions)
+        missed = np.full(rays, -1, dtype=np.int64), np.full(rays, np.inf)
+        n = targets.count
+        if n == 0:
+            return missed
+        limits = np.minimum(max_distance, self.occluders.nearest_many(origin, directions, max_distance))
+        centers = targets.centers[:n]
+        radii = targets.radii[:n]
+
+        # Normal de cada billboard: del objetivo hacia la cámara
+        to_eye = origin - centers
+        normals = to_eye / np.maximum(np.linalg.norm(to_eye, axis=1), EPSILON)[:, None]
+        # Ejes del quad: 'right' perpendicular a la normal y al 'up' de la cámara
+        rights = cross(up, normals)
+        rights /= np.maximum(np.linalg.norm(rights, axis=1), EPSILON)[:, None]
+        ups = cross(normals, rights)
+
+        # Intersección de cada rayo con el plano de cada billboard (P x N). El punto de
+        # impacto respecto al centro es (origen - centro) + distancia * dirección, así que
+        # sus coordenadas en el quad salen de productos escalares sin crear arrays P x N x 3.
+        denominators = directions @ normals.T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            distances = np.einsum('ij,ij->i', centers - origin, normals) / denominators
+        x = np.einsum('ij,ij->i', -to_eye, rights) + distances * (directions @ rights.T)
+        y = np.einsum('ij,ij->i', -to_eye, ups) + distances * (directions @ ups.T)
+        inside = (
+            (np.abs(x) <= radii)
+            & (np.abs(y) <= radii)
+            & (denominators < -EPSILON)
+            & (distances >= 0)
+            & (distances <= limits[:, None])
+        )
+        distances = np.where(inside, distances, np.inf)
+        nearest = distances.argmin(axis=1)
+        nearest_distances = distances[np.arange(rays), nearest]
+        hit = np.isfinite(nearest_distances)
+        return np.where(hit, targets.ids[:n][nearest], -1), nearest_distances
+
+# Objetivo al que apuntaba un disparo: el de menor ángulo entre 'forward' y la dirección
+# hacia su centro (acierte o no). Devuelve (id, distancia al centro) o None sin objetivos.
+def aimed_target(targets, origin, forward):
+    n = targets.count
+    if n == 0:
+        return None
+    offsets = targets.centers[:n] - np.asarray(origin, dtype=np.float64)
+    distances = np.linalg.norm(offsets, axis=1)
+    cosines = offsets @ np.asarray(forward, dtype=np.float64) / np.maximum(distances, EPSILON)
+    nearest = int(cosines.argmax())
+    return int(targets.ids[nearest]), float(distances[nearest])
+
+# ======================================================================================
+# --- Dispersión de perdigones ---
+# ======================================================================================
+# Direcciones de 'count' perdigones repartidas uniformemente en un cono de 'spread' grados
+# (semiángulo) alrededor de 'forward'. 'rng' es un numpy.random.Generator: con la misma
+# semilla se obtiene el mismo patrón.
+def spread_directions(forward, up, count, spread, rng):
+    forward = np.asarray(forward, dtype=np.float64)
+    forward = forward / np.linalg.norm(forward)
+    right = cross(np.asarray(up, dtype=np.float64), forward)
+    right /= max(np.linalg.norm(right), EPSILON)
+    up = cross(forward, right)
+    # Radio proporcional a la raíz para que la densidad sea uniforme en el disco
+    radii = np.tan(np.radians(spread)) * np.sqrt(rng.random(count))
+    angles = rng.random(count) * 2 * np.pi
+    directions = (forward + (radii * np.cos(angles))[:, None] * right
+                  + (radii * np.sin(angles))[:, None] * up)
+    return directions / np.linalg.norm(directions, axis=1)[:, None]
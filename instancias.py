@@ -0,0 +1,113 @@
+# Dibujo instanciado de objetivos: todos los objetivos vivos en una sola llamada de dibujo
+import numpy as np
+from panda3d.core import GeomEnums, OmniBoundingVolume
+from panda3d.core import Texture as PandaTexture
+from ursina import Entity, Shader, scene
+
+# ======================================================================================
+# --- Shader de billboards instanciados ---
+# ======================================================================================
+# Cada instancia lee de un buffer de texturas dos texels: (x, y, z, tamaño) y (r, g, b, a).
+# El billboard se orienta en el shader igual que en HitTester: la normal apunta del
+# objetivo al ojo y el eje vertical sigue el 'up' de la cámara.
+instanced_billboard_shader = Shader(name='instanced_billboard_shader', language=Shader.GLSL, vertex='''#version 140
+
+uniform mat4 p3d_ModelViewProjectionMatrix;
+uniform samplerBuffer instance_data;
+uniform vec3 camera_position;
+uniform vec3 camera_up;
+uniform vec4 texture_rect;
+in vec4 p3d_Vertex;
+in vec2 p3d_MultiTexCoord0;
+out vec2 texcoords;
+out vec4 tint;
+
+void main() {
+    vec4 placement = texelFetch(instance_data, gl_InstanceID * 2);
+    tint = texelFetch(instance_data, gl_InstanceID * 2 + 1);
+
+    vec3 to_eye = normalize(camera_position - placement.xyz);
+    vec3 right = normalize(cross(to_eye, camera_up));
+    vec3 up = cross(right, to_eye);
+    vec3 corner = placement.xyz + (right * p3d_Vertex.x + up * p3d_Vertex.y) * placement.w;
+
+    gl_Position = p3d_ModelViewProjectionMatrix * vec4(corner, 1.);
+    texcoords = mix(texture_rect.xy, texture_rect.zw, p3d_MultiTexCoord0);
+}
+''',
+
+fragment='''
+#version 140
+
+uniform sampler2D p3d_Texture0;
+in vec2 texcoords;
+in vec4 tint;
+out vec4 fragColor;
+
+void main() {
+    vec4 color = texture(p3d_Texture0, texcoords) * tint;
+    if (color.a < 0.5) {
+        discard; // Recorte por alfa: las instancias no se ordenan por profundidad
+    }
+    fragColor = color;
+}
+''',
+)
+
+TEXELS_PER_INSTANCE = 2
+
+# ======================================================================================
+# --- Objetivos instanciados ---
+# ======================================================================================
+# Un único quad con 'instance count' igual al número de objetivos vivos. draw() copia en
+# bloque los centros y tamaños del enjambre al buffer de la GPU; no hay un nodo por objetivo.
+# 'texture_rect' (u0, v0, u1, v1) es la celda de la textura si esta es un atlas.
+class InstancedTargets:
+    def __init__(self, texture, capacity=64, texture_rect=(0, 0, 1, 1)):
+        self.entity = Entity(parent=scene, model='quad', texture=texture, shader=instanced_billboard_shader,
+                             double_sided=True, enabled=False)
+        self.entity.set_shader_input('texture_rect', texture_rect)
+        # Las instancias se colocan en el shader, así que el nodo no debe recortarse por sus límites
+        self.entity.node().setBounds(OmniBoundingVolume())
+        self.entity.node().setFinal(True)
+        self.count = 0
+        self._allocate(capacity)
+
+    # Crea el buffer de instancias (se duplica cuando hay más objetivos que capacidad)
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.buffer = PandaTexture('target_instances')
+        self.buffer.setupBufferTexture(capacity * TEXELS_PER_INSTANCE, PandaTexture.T_float,
+                                       PandaTexture.F_rgba32, GeomEnums.UH_dynamic)
+        self.data = np.zeros((capacity, TEXELS_PER_INSTANCE, 4), dtype=np.float32)
+        self.entity.set_shader_input('instance_data', self.buffer)
+
+    # Dibuja 'centers' (n x 3) con tamaño 2 * 'radii' y, opcionalmente, un tinte rgba por
+    # instancia (blanco si no se indica)
+    def draw(self, centers, radii, camera_position, camera_up, tints=None):
+        n = len(centers)
+        if n > self.capacity:
+            self._allocate(max(n, self.capacity * 2))
+        self.count = n
+        if n == 0:
+            self.entity.disable()
+            return
+        data = self.data[:n]
+        data[:, 0, :3] = centers
+        data[:, 0, 3] = radii
+        data[:, 0, 3] *= 2 # Lado del quad
+        data[:, 1] = 1 if tints is None else tints
+        memoryview(self.buffer.modifyRamImage())[:data.nbytes] = data.tobytes()
+        self.entity.set_shader_input('camera_position', camera_position)
+        self.entity.set_shader_input('camera_up', camera_up)
+        self.entity.setInstanceCount(n)
+        self.entity.enable()
+
+    def clear(self):
+        self.count = 0
+        self.entity.disable()
+
+    # Llamadas de dibujo que cuesta esta ruta (una para todas las instancias)
+    @property
+    def draw_calls(self):
+        return 1 if self.count else 0
@@ -1,95 +1,229 @@
 # Importamos las librerías necesarias de Ursina
+from time import perf_counter, sleep
+startup_start = perf_counter() # Inicio del arranque, para el informe de tiempo hasta el primer frame
 from ursina import *
+import asyncio
+import atexit
 import math
+import random
+import sys
+from panda3d.core import AntialiasAttrib, ConfigVariableInt, TexturePool, loadPrcFileData
+from calidad import DEFAULT_QUALITY, QUALITY_PRESETS, QualityGovernor, quality_index
+from escenario import RANGE_ATLAS, build_static_range, range_atlas_cells, range_occluders
+from impactos import HitTester, Occluders, aimed_target
+from instancias import InstancedTargets
+from perfil import FrameProfiler
+from progreso import Progress, level_stats
+from red import DEFAULT_PORT, POINTS, VersusState, connect, pump, start_local_host
+from repeticion import ReplayPlayer, ReplayRecorder, load_replay, new_replay_path
+from recursos import (SPRITE_ATLAS, SPRITE_CELLS, SPRITE_PADDING, AssetLoader, StartupReport, load_texture_atlas,
+                      load_texture_file, refresh_optimized_textures, set_display_resolution)
+from simulacion import DEFAULT_WEAPON, ENDLESS_LEVEL, VERSUS_LEVEL, GameState, LEVEL_CONFIG, WEAPON_CONFIG
+from sonido import AudioManager
 
 # ======================================================================================
-# --- Configuración de Niveles ---
+# --- Pool de Entidades ---
 # ======================================================================================
-# Diccionario que define las propiedades de cada nivel.
-# 'targets': número de objetivos a aparecer
-# 'speed': rango de velocidad de los objetivos (mínimo, máximo)
-# 'scale': tamaño de los objetivos
-# 'accuracy_goal': porcentaje de precisión requerido para completar el nivel
-# 'batch_size': número de objetivos a generar a la vez para este nivel
-LEVEL_CONFIG = {
-    1: {'targets': 10, 'speed': (10, 15), 'scale': 2.8, 'accuracy_goal': 50, 'batch_size': 1},
-    2: {'targets': 12, 'speed': (15, 22), 'scale': 2.0, 'accuracy_goal': 60, 'batch_size': 1},
-    3: {'targets': 14, 'speed': (20, 28), 'scale': 1.8, 'accuracy_goal': 75, 'batch_size': 1} 
-}
+# Reutiliza entidades ya creadas en lugar de crearlas y destruirlas en cada aparición.
+# Las entidades se crean deshabilitadas antes de usarlas (pre-calentado, ver grow()) y se
+# reciclan con acquire()/release(). 'size' indica cuántas entidades tiene el pool y
+# 'high_water_mark' el máximo de entidades usadas a la vez, para poder ajustar
+# 'pool_size' en LEVEL_CONFIG.
+class EntityPool:
+    def __init__(self, factory, capacity):
+        self.factory = factory
+        self.free = [factory() for _ in range(capacity)] # Entidades disponibles
+        self.active = []          # Entidades en uso
+        self.size = capacity      # Número total de entidades creadas por el pool
+        self.high_water_mark = 0  # Máximo de entidades en uso simultáneamente
+        self.overflows = 0        # Veces que el pool se quedó vacío y tuvo que crecer
+
+    def acquire(self):
+        if self.free:
+            entity = self.free.pop()
+        else:
+            # El pool está agotado: se crea una entidad extra y se registra para ajustar la capacidad
+            entity = self.factory()
+            self.size += 1
+            self.overflows += 1
+        entity.in_pool = False
+        self.active.append(entity)
+        self.high_water_mark = max(self.high_water_mark, len(self.active))
+        return entity
+
+    def release(self, entity):
+        if entity.in_pool: # Evita devolver dos veces la misma entidad
+            return
+        entity.in_pool = True
+        entity.disable()
+        self.active.remove(entity)
+        self.free.append(entity)
+
+    # Devuelve al pool todas las entidades en uso
+    def release_all(self):
+        for entity in list(self.active):
+            self.release(entity)
+
+    # Pre-crea las entidades que falten para tener al menos 'capacity' (nunca destruye)
+    def grow(self, capacity):
+        missing = capacity - self.size
+        if missing > 0:
+            self.free.extend(self.factory() for _ in range(missing))
+            self.size = capacity
+
+    def reset_stats(self):
+        self.high_water_mark = len(self.active)
+        self.overflows = 0
+
+# Capacidad del pool de objetivos para una configuración de nivel
+def pool_capacity_for(config):
+    return config.get('pool_size', config.get('batch_size', 1))
 
 # ======================================================================================
 # --- Clase para los Objetivos ---
 # ======================================================================================
+# Solo dibuja un objetivo de la simulación; el movimiento y los impactos los decide GameState
 class TargetSphere(Entity):
-    def __init__(self, speed_range, scale):
-        # Decide si el objetivo aparece por la izquierda (-1) o por la derecha (1)
-        side = random.choice([-1, 1])
-        # Posición inicial del objetivo fuera de la pantalla
-        start_pos = Vec3(22 * side, random.uniform(-8, -2), random.uniform(15, 25))
-        # Dirección en la que se moverá el objetivo
-        direction = Vec3(-side, random.uniform(-.2, .2), random.uniform(-.1, .1))
-
+    def __init__(self):
+        # El objetivo se crea una sola vez y deshabilitado; spawn() lo coloca en escena
         super().__init__(
             model='quad',  # Usamos un quad para la imagen de Mario
-            texture='assets/textures/mario.png',  # Textura de Mario
             color=color.white,
-            scale=scale,
-            position=start_pos,
-            collider='box',  # Colisionador para detectar disparos
-            shadow=True,
-            billboard=True  # Hace que la imagen siempre mire a la cámara
+            shadow=True,     # Sin colisionador: los disparos se resuelven con hit_tester
+            billboard=True,  # Hace que la imagen siempre mire a la cámara
+            enabled=False
         )
-        self.direction = direction
-        self.speed = random.uniform(speed_range[0], speed_range[1])
-
-    # Se llama cada frame para actualizar la posición del objetivo
-    def update(self):
-        self.position += self.direction * self.speed * time.dt
-        # Si el objetivo se sale de los límites de la pantalla, se destruye
-        if abs(self.x) > 24:
-            destroy(self)
-            # Invoca la creación del siguiente objetivo después de un pequeño retraso
-            invoke(spawn_next_target, delay=0.5)
-
-    # Se llama cuando el objetivo es golpeado por un disparo
-    def hit(self):
-        global hits, points
-        hit_sound.play()  # Reproduce el sonido de impacto
-        hits += 1         # Incrementa el contador de aciertos
-        points += 100     # Suma puntos (aunque no se muestren actualmente en el HUD)
-        
-        # Crea un efecto visual de impacto
-        effect = Entity(
-            model='quad',
-            texture='assets/textures/hit_effect.png',
-            color=color.white,
-            scale=self.scale * 0.8,
-            position=self.world_position,
-            shadow=False,
-            billboard=True
+        set_sprite(self, 'assets/textures/mario.png') # Textura de Mario
+        self.in_pool = True
+        self.target_id = None # Id del objetivo simulado que representa
+
+    # Coloca el objetivo en la posición del objetivo simulado, restaura la transparencia y lo habilita
+    def spawn(self, sim_target):
+        self.target_id = sim_target.id
+        self.position = sim_target.position
+        self.scale = sim_target.scale
+        self.color = color.white
+        self.enable()
+
+# Crea una entidad de efecto de impacto deshabilitada para el pool
+def create_hit_effect():
+    effect = Entity(
+        model='quad',
+        color=color.white,
+        shadow=False,
+        billboard=True,
+        enabled=False
+    )
+    set_sprite(effect, 'assets/textures/hit_effect.png')
+    effect.in_pool = True
+    return effect
+
+# ======================================================================================
+# --- HUD por eventos ---
+# ======================================================================================
+# Cada campo del HUD es un Text independiente. set() solo reasigna el texto (y Ursina solo
+# regenera la geometría) cuando el valor mostrado cambia de verdad.
+class Hud:
+    def __init__(self, parent, position, line_height=0.035, scale=1.2):
+        self.parent = parent
+        self.position = position
+        self.line_height = line_height
+        self.scale = scale
+        self.segments = {} # campo -> Text
+        self.values = {}   # campo -> texto mostrado actualmente
+
+    # Añade un campo en la siguiente línea (de arriba hacia abajo)
+    def add_segment(self, field):
+        line = len(self.segments)
+        self.segments[field] = Text(
+            parent=self.parent,
+            text="",
+            origin=(-0.5, -0.5),
+            position=self.position + Vec2(0, -line * self.line_height),
+            scale=self.scale,
+            color=color.white
         )
-        # Anima el efecto para que crezca y se desvanezca
-        effect.animate_scale(self.scale * 1.2, duration=0.2, curve=curve.out_quad)
-        effect.fade_out(duration=0.2)
-        destroy(effect, delay=0.2)
+        self.values[field] = ""
+        return self.segments[field]
 
-        destroy(self) # Destruye el objetivo golpeado
-        # Invoca la creación del siguiente objetivo después de un pequeño retraso
-        invoke(spawn_next_target, delay=0.5)
+    def set(self, field, text):
+        if self.values[field] == text:
+            return
+        self.values[field] = text
+        self.segments[field].text = text
+
+# Medidor de FPS de bajo coste: acumula frames y solo publica el promedio cada 'interval' segundos
+class FpsMeter:
+    def __init__(self, hud, field='fps', interval=0.5):
+        self.hud = hud
+        self.field = field
+        self.interval = interval
+        self.elapsed = 0
+        self.frames = 0
+
+    def update(self, dt):
+        self.elapsed += dt
+        self.frames += 1
+        if self.elapsed >= self.interval:
+            frame_time = self.elapsed / self.frames
+            self.hud.set(self.field, f"FPS: {1 / frame_time:.0f} ({frame_time * 1000:.1f} ms)")
+            self.elapsed = 0
+            self.frames = 0
+
+# Superposición del perfilador: percentiles, tirones y secciones más caras, cada 'interval' segundos
+class ProfilerOverlay(Text):
+    def __init__(self, profiler, interval=0.5):
+        super().__init__(parent=camera.ui, text="", origin=(-0.5, 0.5), position=window.top_left + Vec2(0.02, -0.02),
+                         scale=0.8, color=color.yellow, background=True, enabled=False)
+        self.profiler = profiler
+        self.interval = interval
+        self.elapsed = 0
+
+    def refresh(self, dt):
+        self.elapsed += dt
+        if self.elapsed >= self.interval:
+            self.text = self.profiler.summary()
+            self.elapsed = 0
 
 # ======================================================================================
 # --- Variables Globales del Juego ---
 # ======================================================================================
-hits = 0            # Número de aciertos
-points = 0          # Puntos del jugador (actualmente no usados en el HUD)
-shots_fired = 0     # Número de disparos realizados
-targets_spawned = 0 # Número de objetivos generados en el nivel actual
-unlocked_level = 1  # El nivel más alto desbloqueado por el jugador
-current_level = 1   # El nivel actual en juego
-game_active = False # Booleano para saber si el juego está activo
-last_shot_time = 0  # Tiempo del último disparo para controlar la cadencia
-current_bg_music = None # Referencia a la música de fondo actual
-is_aiming_ads = False # Variable para rastrear si el rifle está apuntando con la mira (Aim Down Sights)
+# Valor de una opción de la línea de comandos ('--nombre valor'), o 'default' si no se indica
+def command_line_option(name, default=None):
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+# Versus en red: 'python juego.py --versus equipo[:puerto]' juega contra otro jugador de la
+# misma sala ('--sala nombre') en el anfitrión de ese equipo; con '--versus local' se usa (y
+# si no lo hay, se arranca) un anfitrión en este equipo. Es una sola partida por sesión.
+versus_address = command_line_option('--versus')
+
+# Aciertos, disparos, objetivos, nivel actual y cadencia viven en el núcleo de simulación
+# (en versus, un espejo de la partida del anfitrión)
+game_state = VersusState(room=command_line_option('--sala', 'sala')) if versus_address else GameState()
+# Perfilador de frames opcional (F5 lo activa, F6 vuelca el informe). Las secciones son
+# inclusivas: 'update' contiene a 'simulation', 'spawn_next_target', 'draw_targets'...
+profiler = FrameProfiler()
+game_state.update = profiler.timed('simulation')(game_state.update)
+game_state.spawn_next_target = profiler.timed('spawn_next_target')(game_state.spawn_next_target)
+target_entities = {} # id del objetivo simulado -> TargetSphere que lo dibuja
+instanced_targets = True # Dibuja todos los objetivos en una sola llamada instanciada (tecla F4 para comparar)
+show_fps = False # Muestra los FPS y el tiempo por frame en el HUD (tecla F3)
+is_aiming_ads = False # Variable para rastrear si el arma está apuntando con la mira (Aim Down Sights)
+pool_high_water_marks = {} # Máximo de objetivos simultáneos registrado por nivel
+level_peak_targets = 0     # Máximo de objetivos simultáneos en el nivel en curso (con cualquier ruta de dibujo)
+end_panel = None # Panel de fin de nivel mostrado (si lo hay)
+
+# Repetición: 'python juego.py --replay archivo.rep' reproduce una partida grabada en lugar de jugar
+replay_path = command_line_option('--replay')
+replay_player = None   # ReplayPlayer durante la reproducción
+replay_recorder = None # ReplayRecorder de la partida en curso (si se está grabando)
+replay_time = 0.0      # Tiempo real pendiente de reproducir
+
+# Progreso guardado entre sesiones: nivel desbloqueado, totales y cada disparo (no en una
+# repetición ni en versus)
+progress = None if replay_path or versus_address else Progress()
+if progress:
+    game_state.unlocked_level = progress.profile['unlocked_level']
 
 # ======================================================================================
 # --- Funciones del Juego ---
@@ -101,113 +235,216 @@ def go_to_level_select():
     level_select_menu.enable() # Habilita el menú de selección de nivel
     update_level_buttons()     # Actualiza el estado de los botones de nivel (desbloqueados/desbloqueados)
 
-# Inicia un nivel específico
-def start_level(level):
-    global hits, points, shots_fired, game_active, current_level, targets_spawned, last_shot_time, current_bg_music, is_aiming_ads
+# Inicia un nivel específico. Cada nivel usa su propia semilla (se graba en la repetición)
+def start_level(level, seed=None):
+    global is_aiming_ads, level_peak_targets
     current_level = level        # Establece el nivel actual
-    hits, points, shots_fired, targets_spawned = 0, 0, 0, 0 # Reinicia contadores
-    game_active = True           # Activa el estado del juego
     is_aiming_ads = False        # Reinicia el estado de apuntado al iniciar un nivel
 
-    # Detiene y DESTRUYE cualquier música de fondo previa para asegurar que reinicie
-    if current_bg_music:
-        current_bg_music.stop()
-        destroy(current_bg_music) # Destruimos el objeto Audio
-        current_bg_music = None
-
 # ======================================================================================
-    # Carga la música de fondo según el nivel
+    # Reproduce desde el inicio la música de fondo del nivel (ya decodificada en caché)
 # ======================================================================================
-    if current_level == 1:
-        current_bg_music = Audio('assets/sounds/fondo.mp3', loop=True, autoplay=False, volume=0.8)
-    elif current_level == 2:
-        current_bg_music = Audio('assets/sounds/fondoNivel2.mp3', loop=True, autoplay=False, volume=0.8)
-    elif current_level == 3:
-        current_bg_music = Audio('assets/sounds/fondoNivel3.mp3', loop=True, autoplay=False, volume=0.4) 
-
-    if current_bg_music:
-        current_bg_music.play() # Reproduce la música desde el inicio (ya que es un objeto nuevo)
+    audio_manager.play_music(current_level)
+    # Precarga en segundo plano la música del siguiente nivel
+    audio_manager.preload_music(current_level + 1)
 
     level_select_menu.disable() # Deshabilita el menú de selección
+    exit_menu_mode()            # Vuelve a dibujar la escena a los FPS normales
     game_hud.enable()           # Habilita el HUD del juego
     crosshair.enable()          # Asegura que la mira esté visible al inicio del nivel
     mouse.locked = True         # Bloquea el ratón en el centro de la pantalla (para la cámara)
 
-    last_shot_time = time.time() # Reinicia el temporizador del último disparo
-
 # ======================================================================================
     # Deshabilita todas las armas y luego habilita la correcta para el nivel
 # ======================================================================================
-    pistol.disable()
-    rifle.disable()
-    shotgun.disable()
-
-    if current_level == 1:
-        pistol.enable()
-    elif current_level == 2:
-        rifle.enable()
-        rifle.position = rifle_hip_position
-        rifle.rotation = rifle_hip_rotation
-        camera.fov = default_fov
-    elif current_level == 3:
-        shotgun.enable()
-
-    # Destruye cualquier objetivo existente de un juego anterior
-    for t in scene.entities:
-        if isinstance(t, TargetSphere):
-            destroy(t)
-
-    # Llama a la función para generar el primer (o primeros) objetivo(s)
+    disable_weapons()
+    # La primera vez que se juega el nivel se carga su arma (si no estaba ya precargada)
+    weapon_name = LEVEL_CONFIG[current_level].get('weapon', DEFAULT_WEAPON)
+    spec = WEAPON_CONFIG[weapon_name]
+    weapon = get_weapon(weapon_name)
+    weapon.enable()
+    weapon.position = spec['position'] # Sin apuntar
+    weapon.rotation = spec['rotation']
+    camera.fov = default_fov
+
+    # Devuelve al pool cualquier objetivo existente de un juego anterior y pre-crea las
+    # entidades que necesite este nivel (las de objetivos, solo sin la ruta instanciada)
+    clear_targets()
+    capacity = pool_capacity_for(LEVEL_CONFIG[current_level])
+    hit_effect_pool.grow(capacity)
+    if not instanced_targets:
+        target_pool.grow(capacity)
+    target_pool.reset_stats()
+    level_peak_targets = 0
+    apply_render_scale() # Resolución del preset de calidad (si cambió durante el nivel anterior)
+
+    # Reinicia los contadores y genera el primer (o primeros) objetivo(s)
     # según la configuración del nivel (batch_size)
-    spawn_next_target() 
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    if replay_recorder:
+        replay_recorder.start(level, seed)
+    if progress:
+        progress.start_run()
+    game_state.start_level(level, seed)
+    handle_game_events()
+    update_hud() # Muestra el nivel y los contadores reiniciados
 
 # ======================================================================================
-# Genera el siguiente objetivo (o batch de objetivos)
+# Dibuja los cambios publicados por la simulación (apariciones, impactos, fin de nivel)
 # ======================================================================================
-def spawn_next_target():
-    global targets_spawned
-    if not game_active: return # No genera objetivos si el juego no está activo
-
-    config = LEVEL_CONFIG.get(current_level, {})
-    total_targets_for_level = config.get('targets', 0)
-    batch_size = config.get('batch_size', 1) # Obtiene el tamaño del lote para el nivel actual
-
-    # Calcula cuántos objetivos se deben generar en este momento (máx. batch_size, y no más del total del nivel)
-    targets_to_spawn_now = min(batch_size, total_targets_for_level - targets_spawned)
-
-    if targets_to_spawn_now > 0:
-        for _ in range(targets_to_spawn_now):
-            TargetSphere(config.get('speed', (10, 15)), config.get('scale', 1)) # Crea un nuevo objetivo
-            targets_spawned += 1 # Incrementa el contador de objetivos generados
-        update_hud() # Actualiza el HUD
-    else:
-        # Si ya se generaron todos los objetivos, finaliza el nivel después de un retraso
-        invoke(end_level, delay=1)
+def handle_game_events():
+    global level_peak_targets
+    events = game_state.drain_events()
+    for kind, target in events:
+        if kind == 'spawn':
+            level_peak_targets = max(level_peak_targets, len(game_state.registry))
+            if replay_recorder:
+                replay_recorder.spawn(game_state.steps, target)
+            # Con la ruta instanciada los objetivos se dibujan directamente desde el enjambre
+            if not instanced_targets:
+                spawn_target_entity(target)
+        elif kind == 'escape':
+            # El objetivo se salió de la pantalla: vuelve al pool
+            release_target_entity(target.id)
+        elif kind == 'hit':
+            release_target_entity(target.id)
+            show_hit(target)
+        elif kind == 'end':
+            if replay_recorder:
+                replay_recorder.end(game_state.steps, game_state)
+            end_level()
+    if events:
+        update_hud() # Publica en el HUD los contadores que hayan cambiado
+
+# Toma un objetivo del pool para dibujar un objetivo simulado (ruta sin instancias)
+def spawn_target_entity(target):
+    entity = target_pool.acquire()
+    entity.spawn(target)
+    target_entities[target.id] = entity
+
+def release_target_entity(target_id):
+    entity = target_entities.pop(target_id, None)
+    if entity:
+        target_pool.release(entity)
+
+# Dibuja las posiciones actuales del enjambre simulado: en una sola llamada instanciada o
+# copiándolas en un solo recorrido a las entidades de cada objetivo
+@profiler.timed('draw_targets')
+def sync_targets():
+    swarm = game_state.swarm
+    n = swarm.count
+    if instanced_targets:
+        target_instances.draw(swarm.centers[:n], swarm.radii[:n], camera.world_position, camera.up)
+        return
+    for target_id, (x, y, z) in zip(swarm.ids[:n].tolist(), swarm.centers[:n].tolist()):
+        target_entities[target_id].setPos(x, y, z)
+
+# Devuelve al pool todos los objetivos dibujados (tras vaciar el registro de la simulación)
+# y los efectos de impacto, cuyos temporizadores se cancelan al abandonar el nivel
+def clear_targets():
+    target_pool.release_all()
+    target_entities.clear()
+    target_instances.clear()
+    hit_effect_pool.release_all()
+
+# Cambia entre la ruta instanciada y una entidad por objetivo, conservando los objetivos vivos
+def set_instanced_targets(enabled):
+    global instanced_targets
+    instanced_targets = enabled
+    target_pool.release_all()
+    target_entities.clear()
+    target_instances.clear()
+    if not enabled:
+        # La primera vez que se usa, el pool de entidades se crea a la medida del nivel
+        target_pool.grow(pool_capacity_for(game_state.config))
+        for target in game_state.registry:
+            spawn_target_entity(target)
+    sync_targets()
+
+# Llamadas de dibujo que cuestan los objetivos en la ruta activa
+def target_draw_calls():
+    return target_instances.draw_calls if instanced_targets else len(target_entities)
+
+# Efecto y sonido de impacto sobre un objetivo golpeado
+def show_hit(target):
+    audio_manager.play_sfx('hit')  # Reproduce el sonido de impacto
+
+    # Toma un efecto visual de impacto del pool
+    effect = hit_effect_pool.acquire()
+    effect.scale = target.scale * 0.8
+    effect.position = target.hit_position
+    effect.color = color.white # Restaura la transparencia tras el fade_out anterior
+    effect.enable()
+    # Anima el efecto para que crezca y se desvanezca
+    effect.animate_scale(target.scale * 1.2, duration=0.2, curve=curve.out_quad)
+    effect.fade_out(duration=0.2)
+    game_state.schedule(0.2, hit_effect_pool.release, effect, group='effects')
+
+# Dispara desde la cámara un rayo por perdigón (uno solo salvo con la escopeta) y registra
+# los objetivos alcanzados (las paredes tapan a los objetivos que están detrás, como con el
+# raycast de Ursina). Todos los perdigones se resuelven en una sola evaluación contra
+# 'targets': el frame que se veía en pantalla al hacer clic o el enjambre vivo.
+@profiler.timed('shot')
+def shoot(targets, at):
+    origin, forward = camera.world_position, camera.forward
+    hits_before = game_state.hits
+    # Los objetivos que ya no están vivos no cuentan
+    hit = game_state.resolve_shot(hit_tester, targets, origin, forward, camera.up, max_distance=200)
+    log_shot(targets, at, origin, forward, hit, game_state.hits - hits_before)
+    if hit:
+        handle_game_events()
+
+# Registra un disparo en el progreso: el tiempo de reacción y la distancia se miden hasta el
+# objetivo alcanzado o, si falló, hasta el objetivo al que apuntaba. 'at' es el instante de
+# simulación del disparo.
+def log_shot(targets, at, origin, forward, hit, pellets_hit):
+    if not progress:
+        return
+    reaction = distance = float('nan')
+    if hit:
+        target = hit[0]
+        reaction = at - target.spawn_time
+        distance = float((Vec3(*target.hit_position) - origin).length())
+    elif (aimed := aimed_target(targets, origin, forward)) is not None:
+        target = game_state.registry.get(aimed[0])
+        distance = aimed[1]
+        if target is not None:
+            reaction = at - target.spawn_time
+    progress.shot(game_state.current_level, game_state.weapon_name, game_state.pellets, pellets_hit, reaction, distance)
 
 # ======================================================================================
 # Finaliza el nivel y muestra la pantalla de resultados
 # ======================================================================================
+@profiler.timed('end_level')
 def end_level():
-    global game_active, unlocked_level, current_bg_music
-    game_active = False # Desactiva el juego
+    global end_panel
+    current_level = game_state.current_level
+    # Guarda el uso máximo del pool en este nivel para poder ajustar 'pool_size'
+    pool_high_water_marks[current_level] = max(pool_high_water_marks.get(current_level, 0), level_peak_targets)
 
-    # Detiene y destruye cualquier música de fondo
-    if current_bg_music:
-        current_bg_music.stop()
-        destroy(current_bg_music)
-        current_bg_music = None
+    # Detiene la música de fondo
+    audio_manager.stop_music()
 
     # Deshabilita elementos del juego
     game_hud.disable()
     crosshair.disable()
-    pistol.disable()
-    rifle.disable()
-    shotgun.disable()
+    disable_weapons()
     mouse.locked = False # Desbloquea el ratón para interactuar con la UI
 
-    # Calcula la precisión
-    accuracy = (hits / shots_fired) * 100 if shots_fired > 0 else 0
-    goal = LEVEL_CONFIG.get(current_level, {}).get('accuracy_goal', 0)
+    # Con el perfilador activo, guarda el informe del nivel
+    if profiler.enabled and profiler.frames:
+        print('Perfil guardado en', *profiler.dump(f'perfil-nivel{current_level}'))
+
+    # Suma el nivel al progreso guardado (se escribe en segundo plano) y resume su historial
+    stats = None
+    if progress:
+        progress.end_run(game_state)
+        stats = level_stats(progress.shots(), current_level)
+
+    # Precisión calculada por la simulación
+    accuracy = game_state.accuracy
+    goal = game_state.accuracy_goal
 
 # ======================================================================================
     # Crea el panel de fin de nivel con la imagen de fondo
@@ -217,31 +454,54 @@ def end_level():
         model='quad',
         scale_x=camera.aspect_ratio, # Ajusta el ancho al ratio de aspecto de la cámara
         scale_y=1,                   # Ajusta la altura para que ocupe toda la pantalla
-        texture='assets/textures/fondoSalida.png',  
+        texture=load_texture_file('assets/textures/fondoSalida.png'),
         color=color.white,  
         z=1
     )
+    enter_menu_mode() # El panel tapa la escena: solo se dibuja la interfaz
     
 # ======================================================================================
 # Muestra la precisión y aciertos por nivel 
 # ======================================================================================
-    Text(parent=end_panel, text=f"Precisión: {accuracy:.1f}% (Objetivo: {goal}%)", origin=(0,0), y=0.1, scale=1.5)
-    Text(parent=end_panel, text=f"Aciertos: {hits} / {targets_spawned}", origin=(0,0), y=-.05, scale=1.5) # Mostrar aciertos/objetivos_generados
+    goal_text = f" (Objetivo: {goal}%)" if not game_state.config.get('versus') else ""
+    Text(parent=end_panel, text=f"Precisión: {accuracy:.1f}%{goal_text}", origin=(0,0), y=0.16, scale=1.5)
+    Text(parent=end_panel, text=f"Aciertos: {game_state.targets_hit} / {game_state.targets_spawned}", origin=(0,0), y=0.08, scale=1.5) # Mostrar aciertos/objetivos_generados
+    Text(parent=end_panel, text=f"Puntos: {game_state.points}", origin=(0,0), y=0, scale=1.5)
+    # Historial del nivel: precisión de las últimas partidas y tiempo de reacción de los aciertos
+    if stats and stats['trend']:
+        history = "Últimas partidas: " + " > ".join(f"{value:.0f}%" for value in stats['trend'])
+        if stats['reaction']:
+            history += f" | Reacción: {stats['reaction'][0]:.2f}s (p90 {stats['reaction'][1]:.2f}s)"
+        Text(parent=end_panel, text=history, origin=(0,0), y=-.08, scale=1)
+
+    # Versus: resultado contra el rival (una sola partida por sesión)
+    if game_state.config.get('versus'):
+        rival_points = game_state.rival_scores[POINTS]
+        Text(parent=end_panel, text=f"Rival: {rival_points} puntos", origin=(0,0), y=-.08, scale=1.5)
+        if game_state.lost:
+            message = "CONEXIÓN PERDIDA"
+        elif game_state.passed:
+            message = "¡GANASTE!" if not game_state.rival_left else "¡GANASTE! (el rival abandonó)"
+        else:
+            message = "EMPATE" if game_state.points == rival_points else "PERDISTE"
+        Text(parent=end_panel, text=message, origin=(0,0), y=.3, scale=2)
+        Button(parent=end_panel, text="Menú Principal", color=color.azure, scale=(0.25, 0.08), y=-.35, on_click=Func(lambda: (close_end_panel(), show_main_menu())))
+        return
 
     # Lógica para nivel completado o fallido
-    if accuracy >= goal:
+    if game_state.passed: # La simulación ya desbloqueó el siguiente nivel
         message = f"¡NIVEL {current_level} COMPLETADO!"
-        if current_level < 3: # Si no es el último nivel, desbloquea el siguiente
-            unlocked_level = max(unlocked_level, current_level + 1)
         
         Text(parent=end_panel, text=message, origin=(0,0), y=.3, scale=2)
 
         # Botón para ir al siguiente nivel (aparece si no es el último nivel)
-        if current_level < len(LEVEL_CONFIG): # Comprueba si hay un siguiente nivel
-            Button(parent=end_panel, text="Siguiente Nivel", color=color.green, scale=(0.25, 0.08), y=-.2, on_click=Func(lambda: (destroy(end_panel), start_level(current_level + 1))))
+        if current_level + 1 in LEVEL_CONFIG: # Comprueba si hay un siguiente nivel
+            # Mientras se muestra el panel, precarga el arma del siguiente nivel
+            prefetch_weapon(LEVEL_CONFIG[current_level + 1].get('weapon', DEFAULT_WEAPON))
+            Button(parent=end_panel, text="Siguiente Nivel", color=color.green, scale=(0.25, 0.08), y=-.2, on_click=Func(lambda: (close_end_panel(), start_level(current_level + 1))))
         
         # Botón para volver al menú de niveles
-        Button(parent=end_panel, text="Menú de Niveles", color=color.azure, scale=(0.25, 0.08), y=-.35, on_click=Func(lambda: (destroy(end_panel), show_level_select_menu())))
+        Button(parent=end_panel, text="Menú de Niveles", color=color.azure, scale=(0.25, 0.08), y=-.35, on_click=Func(lambda: (close_end_panel(), show_level_select_menu())))
     else:
         message = "INTÉNTALO DE NUEVO"
 
@@ -252,205 +512,299 @@ def end_level():
                color=color.azure, 
                scale=(0.25, 0.08), 
                y=-.2, 
-               on_click=Func(lambda: (destroy(end_panel), start_level(current_level))))
+               on_click=Func(lambda: (close_end_panel(), start_level(current_level))))
         # Botón para volver al menú de niveles
         Button(parent=end_panel, 
                text="Menú de Niveles", 
                color=color.red, 
                scale=(0.25, 0.08), 
                y=-.35, 
-               on_click=Func(lambda: (destroy(end_panel), show_level_select_menu())))
+               on_click=Func(lambda: (close_end_panel(), show_level_select_menu())))
+# Cierra el panel de fin de nivel
+def close_end_panel():
+    global end_panel
+    if end_panel:
+        destroy(end_panel)
+        end_panel = None
+
 # ======================================================================================
 # Muestra el menú de selección de nivel
 # ======================================================================================
 def show_level_select_menu():
-    global current_bg_music, is_aiming_ads
+    global is_aiming_ads
     game_hud.disable()
-    pistol.disable()
-    rifle.disable()
-    shotgun.disable()
+    disable_weapons()
     crosshair.enable() # Asegura que la mira esté visible en el menú de selección
     is_aiming_ads = False # Reinicia el estado de apuntado
-    # Destruye todos los objetivos existentes
-    for t in scene.entities:
-        if isinstance(t, TargetSphere):
-            destroy(t)
+    # Detiene la simulación y devuelve al pool todos los objetivos existentes
+    if replay_recorder and game_state.active:
+        replay_recorder.abort(game_state.steps)
+    game_state.abort_level() # También cancela los temporizadores pendientes del nivel
+    clear_targets()
     level_select_menu.enable() # Habilita el menú de selección
+    enter_menu_mode()          # Solo se dibuja la interfaz mientras el menú está abierto
     update_level_buttons()     # Actualiza el estado de los botones
     mouse.locked = False       # Desbloquea el ratón
     # Detiene cualquier música de fondo si la hay
-    if current_bg_music:
-        current_bg_music.stop()
-        destroy(current_bg_music)
-        current_bg_music = None
+    audio_manager.stop_music()
 
 # ======================================================================================
 # Muestra el menú principal
 # ======================================================================================
 def show_main_menu():
-    global current_bg_music, is_aiming_ads
+    global is_aiming_ads
     level_select_menu.disable()
     game_hud.disable()
-    pistol.disable()
-    rifle.disable()
-    shotgun.disable()
+    disable_weapons()
     crosshair.enable() # Asegura que la mira esté visible en el menú principal
     is_aiming_ads = False # Reinicia el estado de apuntado
-    # Destruye todos los objetivos existentes
-    for t in scene.entities:
-        if isinstance(t, TargetSphere):
-            destroy(t)
+    # Detiene la simulación y devuelve al pool todos los objetivos existentes
+    if replay_recorder and game_state.active:
+        replay_recorder.abort(game_state.steps)
+    game_state.abort_level() # También cancela los temporizadores pendientes del nivel
+    clear_targets()
     main_menu.enable() # Habilita el menú principal
+    enter_menu_mode()  # Solo se dibuja la interfaz mientras el menú está abierto
     mouse.locked = False # Desbloquea el ratón
     # Detiene cualquier música de fondo si la hay
-    if current_bg_music:
-        current_bg_music.stop()
-        destroy(current_bg_music)
-        current_bg_music = None
+    audio_manager.stop_music()
 
-# Actualiza el texto en el HUD
+# Publica los contadores en el HUD; solo se regeneran los campos cuyo texto cambió.
+# Se llama al iniciar el nivel, al disparar y cuando hay apariciones o impactos.
 def update_hud():
-    accuracy = (hits / shots_fired) * 100 if shots_fired > 0 else 0
-    hud_text.text = (
-        f"NIVEL {current_level}\n"
-        f"Objetivo: {targets_spawned}/{LEVEL_CONFIG.get(current_level, {}).get('targets', 0)}\n"
-        f"Aciertos: {hits}\n"
-        f"Precisión: {accuracy:.1f}%"
-    )
+    if game_state.config.get('versus'):
+        hud.set('level', f"VERSUS {math.ceil(game_state.remaining)}s")
+        hud.set('targets', f"Rival: {game_state.rival_scores[POINTS]} puntos")
+    else:
+        hud.set('level', f"NIVEL {game_state.current_level}")
+        hud.set('targets', f"Objetivo: {game_state.targets_spawned}/{game_state.config.get('targets', 0)}")
+    hud.set('alive', f"En pantalla: {len(game_state.registry)}")
+    hud.set('hits', f"Aciertos: {game_state.targets_hit}")
+    hud.set('points', f"Puntos: {game_state.points}")
+    hud.set('accuracy', f"Precisión: {game_state.accuracy:.1f}%")
 
 # Actualiza el estado de los botones de nivel (habilitados/deshabilitados)
 def update_level_buttons():
     for i, button in enumerate(level_buttons):
-        button.disabled = (i + 1 > unlocked_level) # Deshabilita si el nivel no está desbloqueado
+        button.disabled = (i + 1 > game_state.unlocked_level) # Deshabilita si el nivel no está desbloqueado
         button.text_entity.color = color.white if not button.disabled else color.gray # Cambia color del texto
 
 # ======================================================================================
 # Reanuda el juego cuando se sale 
 # ======================================================================================
 def resume_game():
-    global current_bg_music, is_aiming_ads
+    current_level = game_state.current_level
     pause_menu.disable() # Deshabilita el menú de pausa
+    game_state.resume()  # Los temporizadores del nivel siguen desde donde se congelaron
+    exit_menu_mode()     # Vuelve a dibujar la escena a los FPS normales
     mouse.locked = True  # Bloquea el ratón
     application.resume() # Reanuda la aplicación (actualizaciones, etc.)
     
-    # Restaura el estado visual del arma si estaba apuntando antes de pausar
-    if current_level == 2:
-        # Asegura que la mira esté visible antes de verificar el estado de apuntado
-        crosshair.enable() 
-        if is_aiming_ads: # Si estaba apuntando, restaura la posición y FOV de apuntado
-            rifle.position = rifle_ads_position
-            rifle.rotation = rifle_ads_rotation
-            camera.fov = ads_fov
-            # No ocultes la mira aquí, déjala visible
-        else: # Si no estaba apuntando, restaura la posición y FOV normal
-            rifle.position = rifle_hip_position
-            rifle.rotation = rifle_hip_rotation
-            camera.fov = default_fov
-            # La mira ya está habilitada
-    else: # Para otros niveles, asegura que la mira esté visible
-        crosshair.enable()
-
-    # === INICIO DE CAMBIO CLAVE para REINICIAR MUSICA ===
-    # Detiene y DESTRUYE cualquier música de fondo previa para asegurar que reinicie
-    if current_bg_music:
-        current_bg_music.stop()
-        destroy(current_bg_music) 
-        current_bg_music = None
-
-    # Vuelve a cargar y reproducir la música del nivel actual
-    if current_level == 1:
-        current_bg_music = Audio('assets/sounds/fondo.mp3', loop=True, autoplay=False, volume=0.8)
-    elif current_level == 2:
-        current_bg_music = Audio('assets/sounds/fondoNivel2.mp3', loop=True, autoplay=False, volume=0.8)
-    elif current_level == 3:
-        current_bg_music = Audio('assets/sounds/fondoNivel3.mp3', loop=True, autoplay=False, volume=0.4) 
-
-    if current_bg_music:
-        current_bg_music.play() # Reproduce la música desde el inicio
-    # === FIN DE CAMBIO CLAVE ===
-
-# Inicialización de la Aplicación Ursina 
-app = Ursina(title='AIM PRESICION DDC', borderless=False, fullscreen=True, info=False)
-
-# ======================================================================================
-# Sonidos de cada arma y de efecto de disaparo
-# ======================================================================================
-gunshot_pistol_sound = Audio('assets/sounds/hit.mp3', loop=False, autoplay=False, volume=1.0)
-gunshot_rifle_sound = Audio('assets/sounds/sonidoRifle.mp3', loop=False, autoplay=False, volume=0.5)
-gunshot_shotgun_sound = Audio('assets/sounds/sonidoEscopeta.mp3', loop=False, autoplay=False, volume=3.0) 
-hit_sound = Audio('assets/sounds/hit.mp3', loop=False, autoplay=False, volume=0.5)
+    # Restaura el estado visual del arma (apuntando o no) y asegura que la mira esté visible
+    place_weapon()
+    crosshair.enable()
+
+    # Continúa la música del nivel desde donde se pausó
+    audio_manager.resume_music()
 
 # ======================================================================================
-# Creación del Entorno de la cabina de disparo
+# Calidad gráfica: '--quality baja|media|alta|ultra' fija un preset; por defecto ('auto')
+# el gobernador la ajusta para mantener los FPS fijados con '--fps' (por defecto, la
+# frecuencia de refresco del monitor)
 # ======================================================================================
-shooting_range_background = Entity(
-    model='quad',
-    texture='assets/textures/mapa.png',
-    scale=(100, 50),
-    position=(0, 0, 50),
-    rotation_y=180,
-    double_sided=True
-).disable()
-
-# Pared trasera
-back_wall = Entity(
-    model='cube',
-    scale=(40, 30, 1),
-    position=(0, 5, 30),
-    texture='assets/textures/fondoMario.jpg',
-    color=color.white,
-    collider='box'
-)
+quality_option = command_line_option('--quality', 'auto')
+fps_option = command_line_option('--fps')
+menu_fps = int(command_line_option('--menu-fps', 30)) # Límite de FPS con un menú abierto (ver enter_menu_mode)
+menu_mode = False
+auto_quality = quality_option == 'auto'
+quality = QUALITY_PRESETS[quality_index(DEFAULT_QUALITY if auto_quality else quality_option)]
+# El MSAA y el tamaño máximo de textura se configuran antes de abrir la ventana
+msaa_samples = max(preset['msaa'] for preset in QUALITY_PRESETS) if auto_quality else quality['msaa']
+if msaa_samples:
+    loadPrcFileData('', 'framebuffer-multisample 1')
+    loadPrcFileData('', f'multisamples {msaa_samples}')
+loadPrcFileData('', f"max-texture-dimension {quality['texture_size'] or -1}")
+
+# Inicialización de la Aplicación Ursina ('--windowed' para jugar en ventana)
+# Con vsync: pace_frame() hace él mismo el cambio de buffer, así que mide el trabajo de
+# cada frame sin la espera al refresco
+app = Ursina(title='AIM PRESICION DDC', borderless=False, fullscreen='--windowed' not in sys.argv, info=False)
+set_display_resolution(window.fullscreen_size) # Elige las variantes optimizadas de las texturas
+
+# Frecuencia de refresco del modo de pantalla actual (60 si el sistema no la da)
+def display_refresh_rate(default=60):
+    info = base.pipe.getDisplayInformation()
+    mode = info.getCurrentDisplayModeIndex() if info else -1
+    rate = info.getDisplayModeRefreshRate(mode) if mode >= 0 else 0
+    return rate if rate > 0 else default
+
+refresh_rate = display_refresh_rate()
+target_fps = int(fps_option) if fps_option else refresh_rate
+quality_governor = QualityGovernor(level=quality['name'], target_fps=target_fps)
+quality_governor.enabled = auto_quality
 
-# Pared izquierda
-left_wall = Entity(
-    model='cube',
-    scale=(1, 30, 85),
-    position=(-20, 5, 7.5),
-    texture='assets/textures/fondoMario.jpg',
-    color=color.white,
-    collider='box'
-)
+# ======================================================================================
+# Atlas de sprites: objetivos, efectos de impacto y botones del menú en una sola textura
+# ======================================================================================
+sprite_atlas, sprite_rects, _ = load_texture_atlas(SPRITE_ATLAS, SPRITE_CELLS, SPRITE_PADDING)
 
-# Pared derecha
-right_wall = Entity(
-    model='cube',
-    scale=(1, 30, 85),
-    position=(20, 5, 7.5),
-    texture='assets/textures/fondoMario.jpg',
-    color=color.white,
-    collider='box'
-)
+# Asigna a una entidad un sprite del atlas (la textura y el rectángulo de su celda)
+def set_sprite(entity, path):
+    u0, v0, u1, v1 = sprite_rects[path]
+    entity.texture = sprite_atlas
+    entity.texture_scale = (u1 - u0, v1 - v0)
+    entity.texture_offset = (u0, v0)
 
-# Techo
-ceiling = Entity(
-    model='cube',
-    scale=(49, 1, 85),
-    position=(0, 20, 9.5),
-    texture='assets/textures/cieloMario.jpg',
-    color=color.white,
-    collider='box'
-)
+# ======================================================================================
+# Sonidos de cada arma, de efecto de disparo y música de fondo (cargados una sola vez)
+# ======================================================================================
+audio_manager = AudioManager(preload_sfx=False) # Los efectos se cargan con el resto de recursos
+audio_manager.preload_music(1) # Precarga en segundo plano la música del primer nivel
 
-# Suelo
-ground_plane = Entity(
-    model='plane',
-    scale=(150, 1, 150),
-    position=(0, -10, 5),
-    texture='assets/textures/sueloMario.jpg',
-    texture_scale=(2, 2),
-    collider='box'
-)
+# ======================================================================================
+# Carga en paralelo de modelos, texturas y sonidos (detrás de la pantalla de carga)
+# ======================================================================================
+startup_report = StartupReport(startup_start)
+asset_loader = AssetLoader()
+# Atlas de texturas de la cabina de disparo (las armas se cargan al necesitarlas, ver get_weapon)
+asset_loader.submit_atlas(RANGE_ATLAS, range_atlas_cells())
+# Efecto de impacto (común a todos los niveles)
+asset_loader.submit('sfx', audio_manager.load_sfx, ['hit'])
+# Disparos de sesiones anteriores, para el historial del panel de fin de nivel
+if progress:
+    asset_loader.submit('shot_history', progress.load_history)
+loaded_assets = {} # nombre -> recurso ya cargado
+weapon_loader = AssetLoader(max_workers=2) # Carga bajo demanda y precarga de armas
+
+# ======================================================================================
+# Creación del Entorno de la cabina de disparo
+# ======================================================================================
+# Paredes, techo y suelo: una sola geometría con un atlas de texturas, que se construye al
+# terminar la carga en paralelo (ver finish_asset_loading y escenario.py)
+static_range = None
 
 # Cielo (color)
 sky_color = Sky(color=color.black66)
 
-# Iluminación direccional (simula un sol)
-sun = DirectionalLight(y=10, x=20, shadows=True, color=color.white)
+# Oclusores para la detección de impactos: paredes, techo y suelo como cajas
+occluder_boxes = range_occluders()
+hit_tester = HitTester(Occluders(occluder_boxes))
+
+# Cada partida se graba (entradas, semillas y objetivos) para poder reproducirla después
+# (no en versus: la simulación es la del anfitrión). Las cajas oclusoras van en la cabecera
+# para que la reproducción sin ventana las use.
+if not replay_path and not versus_address:
+    replay_recorder = ReplayRecorder(new_replay_path(), occluder_boxes)
+
+# Iluminación direccional (simula un sol); las sombras dependen del preset de calidad
+sun = DirectionalLight(y=10, x=20, shadows=quality['shadows'],
+                       shadow_map_resolution=Vec2(quality['shadow_map'], quality['shadow_map']), color=color.white)
 
 # Luz ambiental
 ambient_light = AmbientLight(color=color.rgba(100, 100, 100, 255))
 
+# ======================================================================================
+# Aplicación de los presets de calidad
+# ======================================================================================
+def apply_quality(preset):
+    global quality
+    if (preset['shadows'], preset['shadow_map']) != (sun.shadows, sun.shadow_map_resolution[0]):
+        sun.shadow_map_resolution = Vec2(preset['shadow_map'], preset['shadow_map'])
+        sun.shadows = preset['shadows']
+    render.setAntialias(AntialiasAttrib.MMultisample if preset['msaa'] else AntialiasAttrib.MNone)
+    if preset['texture_size'] != quality['texture_size']:
+        set_texture_size(preset['texture_size'])
+    quality = preset
+    # Cambiar la resolución cambia el modo de pantalla: nunca en mitad de un nivel
+    if not game_state.active:
+        apply_render_scale()
+
+# Recarga desde disco las texturas ya cargadas con el nuevo tamaño máximo (0 = sin límite).
+# Las optimizadas (.txo) no se reducen al recargarlas: cambian a otra variante.
+def set_texture_size(size):
+    ConfigVariableInt('max-texture-dimension').setValue(size or -1)
+    refresh_optimized_textures()
+    for texture in TexturePool.findAllTextures():
+        if texture.hasFullpath() and texture.getFullpath().getExtension() != 'txo':
+            texture.reload()
+
+# Resolución de pantalla completa según el preset actual
+def apply_render_scale():
+    if application.window_type == 'onscreen' and window.fullscreen:
+        size = window.fullscreen_size * quality['render_scale']
+        if size != window.size:
+            window.size = size
+
+# Preset inicial: antialiasing y resolución de pantalla completa
+render.setAntialias(AntialiasAttrib.MMultisample if quality['msaa'] else AntialiasAttrib.MNone)
+apply_render_scale()
+
+# Limitador de FPS: tras dibujar el frame mide su trabajo, se lo pasa al gobernador
+# mientras se juega y, por debajo de la frecuencia de refresco (un '--fps' menor o
+# 'menu_fps' con un menú abierto), espera lo que falte para completar el frame. Después
+# cambia el buffer: la espera al refresco del vsync queda fuera del trabajo medido.
+frame_started = perf_counter()
+
+def pace_frame(task):
+    global frame_started
+    work = perf_counter() - frame_started
+    if quality_governor.enabled and game_state.active and not application.paused:
+        preset = quality_governor.update(work * 1000, max(work, 1 / target_fps))
+        if preset:
+            apply_quality(preset)
+    frame_cap = menu_fps if menu_mode else target_fps
+    if frame_cap < refresh_rate:
+        wait = 1 / frame_cap - (perf_counter() - frame_started)
+        if wait > 0:
+            sleep(wait)
+    base.graphicsEngine.flipFrame() # Sin auto-flip, igLoop lo haría al empezar el siguiente frame
+    frame_started = perf_counter()
+    return task.cont
+
+taskMgr.add(pace_frame, 'pace_frame', sort=60) # Después de igLoop (sort 50), que dibuja el frame
+
+# ======================================================================================
+# Modo menú: con un menú abierto solo se dibuja la interfaz
+# ======================================================================================
+# Los menús y el panel de fin de nivel tapan toda la pantalla, así que la escena 3D (y el
+# mapa de sombras del sol) deja de dibujarse y el límite de FPS baja a 'menu_fps'. El menú
+# de pausa no la tapa: 'freeze' guarda el último frame en una textura y la muestra detrás.
+scene_snapshot = Entity(parent=camera.ui, model='quad', scale=(camera.aspect_ratio, 1), z=2, enabled=False)
+
+def enter_menu_mode(freeze=False):
+    global menu_mode
+    if freeze and not menu_mode:
+        snapshot = base.win.getScreenshot()
+        if snapshot:
+            scene_snapshot.setTexture(snapshot, 1)
+            scene_snapshot.enable()
+    elif not freeze:
+        scene_snapshot.disable()
+    menu_mode = True
+    camera.display_region.setActive(False)
+    sun._light.setActive(False) # La luz es también la cámara que dibuja el mapa de sombras
+
+# Vuelve a dibujar la escena a los FPS normales
+def exit_menu_mode():
+    global menu_mode
+    menu_mode = False
+    scene_snapshot.disable()
+    camera.display_region.setActive(True)
+    sun._light.setActive(True)
+
+# ======================================================================================
+# Pools de objetivos y efectos de impacto
+# ======================================================================================
+# Empiezan vacíos y start_level los hace crecer hasta el 'pool_size' del nivel; el de
+# objetivos solo se llena si se dibuja con una entidad por objetivo (F4)
+target_pool = EntityPool(TargetSphere, 0)
+hit_effect_pool = EntityPool(create_hit_effect, 0)
+# Ruta instanciada: un solo nodo para todos los objetivos que comparten la textura de
+# Mario, con sitio para el nivel más poblado (no crea entidades)
+target_pool_capacity = max(pool_capacity_for(config) for config in LEVEL_CONFIG.values())
+target_instances = InstancedTargets(sprite_atlas, capacity=target_pool_capacity,
+                                    texture_rect=sprite_rects['assets/textures/mario.png'])
+
 # --- Configuración del Jugador (Cámara estática) ---
 camera.position = (0, 0, -15) # Posición de la cámara
 camera.fov = 80              # Campo de visión de la cámara
@@ -458,48 +812,63 @@ camera.fov = 80              # Campo de visión de la cámara
 # ======================================================================================
 # diseños de las armas con texturas y modelos
 # ======================================================================================
-# Pistola (Nivel 1)
-pistol = Entity(parent=camera,
-                model='assets/models/modeloArma1.obj',
-                texture='assets/textures/arma1.png',
-                position=(0.5, -0.4, 1.2),
-                rotation=(0, -90, 0), # Ajustada para que apunte hacia adelante
-                scale=0.15
-               )
-pistol.disable() # Deshabilitada al inicio.
-
-# Rifle (Nivel 2)
-# Definimos la posición y rotación inicial (hip fire)
-rifle_hip_position = Vec3(0.3, -0.4, 1.2)
-rifle_hip_rotation = Vec3(0, 360, 0) # Rotación para que apunte adelante en hip-fire
-
-rifle = Entity(parent=camera,
-                model='assets/models/modeloArma2.obj',
-                texture='assets/textures/arma2.png',
-                position=rifle_hip_position, # Posición inicial del rifle (sin apuntar)
-                rotation=rifle_hip_rotation, # Rotación inicial del rifle (sin apuntar)
-                scale=1.5 # Escala grande
-               )
-rifle.disable()
-
-# Definimos la posición y rotación para el "Aim Down Sights" (apuntar con la mira)
-rifle_ads_position = Vec3(0, -0.5, 0.8) # Más centrado en X, ligeramente más bajo en Y para alinear, más cerca en Z
-rifle_ads_rotation = Vec3(-5, -90, 0)   # Una pequeña inclinación hacia arriba (-5 en X) para el apuntado
-
-# Definimos los campos de visión (FOV) para el zoom
-default_fov = 80
-ads_fov = 60 # FOV cuando se apunta (ajusta para más o menos zoom)
-
-
-# Escopeta (Nivel 3)
-shotgun = Entity(parent=camera,
-                 model='assets/models/Shotgun.obj',
-                 texture='assets/textures/Gun_nivel3.jpg',
-                 position=(0.5, -0.65, 1.5),
-                 rotation=(0, 90, 0),
-                 scale=0.15
-                )
-shotgun.disable() # Deshabilitada al inicio
+# Modelo, textura, sonido, colocación, retroceso y apuntado de cada arma: WEAPON_CONFIG
+# (simulacion.py), junto a su cadencia. Cada nivel elige la suya con 'weapon'.
+default_fov = 80 # FOV sin apuntar (cada arma con 'ads' define el suyo al apuntar)
+
+# Las armas no se crean al arrancar: cada una se carga la primera vez que un nivel la
+# necesita (o antes, si se precargó desde la pantalla de fin de nivel).
+weapons = {} # nombre -> Entity del arma ya creada
+
+# Empieza a cargar en segundo plano el modelo, la textura y el sonido de un arma
+def prefetch_weapon(name):
+    if name is None or name in weapons or f'{name}_model' in loaded_assets:
+        return
+    spec = WEAPON_CONFIG[name]
+    weapon_loader.submit_model(f'{name}_model', spec['model'])
+    weapon_loader.submit_texture(f'{name}_texture', spec['texture'])
+    weapon_loader.submit(f'{name}_sfx', audio_manager.load_sfx, [spec['sound']])
+
+# Recoge un recurso de arma ya cargado, esperando a que termine si aún está en curso
+def take_weapon_asset(key):
+    if weapon_loader.is_pending(key):
+        loaded_assets[key] = weapon_loader.wait(key)
+    return loaded_assets.pop(key)
+
+# Devuelve la entidad del arma, creándola la primera vez (deshabilitada)
+def get_weapon(name):
+    if name not in weapons:
+        prefetch_weapon(name) # No hace nada si ya se precargó
+        spec = WEAPON_CONFIG[name]
+        weapon = Entity(parent=camera,
+                        model=take_weapon_asset(f'{name}_model'),
+                        position=spec['position'],
+                        rotation=spec['rotation'],
+                        scale=spec['scale'],
+                        enabled=False)
+        weapon.texture = take_weapon_asset(f'{name}_texture')
+        take_weapon_asset(f'{name}_sfx')
+        weapons[name] = weapon
+    return weapons[name]
+
+def disable_weapons():
+    for weapon in weapons.values():
+        weapon.disable()
+
+# Posición y rotación de reposo del arma del nivel: apuntando (si su 'ads' lo permite) o no
+def weapon_pose():
+    spec = game_state.weapon
+    pose = spec['ads'] if is_aiming_ads and 'ads' in spec else spec
+    return Vec3(*pose['position']), Vec3(*pose['rotation'])
+
+# Coloca el arma del nivel y el FOV según el estado de apuntado, sin animación
+def place_weapon():
+    spec = game_state.weapon
+    weapon = weapons[game_state.weapon_name]
+    weapon.position, weapon.rotation = weapon_pose()
+    camera.fov = spec['ads']['fov'] if is_aiming_ads and 'ads' in spec else default_fov
+
+prefetch_weapon(LEVEL_CONFIG[1]['weapon']) # Como su música, el arma del primer nivel se precarga en segundo plano
 
 # Mira del juego
 crosshair = Entity(parent=camera.ui, model='circle', scale=0.008, color=color.red)
@@ -511,19 +880,25 @@ game_hud = Entity(parent=camera.ui, enabled=False) # Contenedor para el HUD, ini
 hud_background = Entity(
     parent=game_hud,
     model='quad',
-    scale=(0.25, 0.15),
-    position=window.bottom_left + Vec2(0.1, 0.1),
+    scale=(0.25, 0.22),
+    position=window.bottom_left + Vec2(0.1, 0.065),
     color=color.black66,
     origin=(-0.5, -0.5)
-).disable() # Fondo del HUD, inicialmente deshabilitado
-hud_text = Text(
-    parent=hud_background,
-    text="",
-    origin=(-0.5, -0.5),
-    position=(0.05, 0.05),
-    scale=3.0,
-    color=color.white
-)
+) # Fondo del HUD
+# Un Text por campo para que cada uno se actualice por separado
+hud = Hud(game_hud, position=window.bottom_left + Vec2(0.11, 0.25))
+for field in ('level', 'targets', 'alive', 'hits', 'points', 'accuracy'):
+    hud.add_segment(field)
+fps_text = hud.add_segment('fps') # Lectura opcional de FPS, debajo de los contadores
+fps_text.enabled = show_fps
+render_text = hud.add_segment('render') # Ruta de dibujo de los objetivos y sus llamadas de dibujo
+render_text.enabled = show_fps
+timers_text = hud.add_segment('timers') # Temporizadores pendientes del reloj de juego, por grupo
+timers_text.enabled = show_fps
+audio_text = hud.add_segment('audio') # Voces de efectos y latencia clic-sonido
+audio_text.enabled = show_fps
+fps_meter = FpsMeter(hud)
+profiler_overlay = ProfilerOverlay(profiler)
 
 
 # ======================================================================================
@@ -534,7 +909,7 @@ hud_text = Text(
 main_menu = Entity(
     parent=camera.ui,
     model='quad',
-    texture='assets/textures/FondoNuevoo.jpg', # Fondo del menú principal
+    texture=load_texture_file('assets/textures/FondoNuevoo.jpg'), # Fondo del menú principal
     scale_x=camera.aspect_ratio,
     scale_y=1,
     enabled=True,
@@ -546,22 +921,29 @@ button_container = Entity(parent=main_menu, y=-0.4) # Contenedor para los botone
 # --- Botón de Inicio ---
 start_button = Button(
     parent=button_container,
-    texture='assets/textures/iniciarbtn.jpg', 
     color=color.white, 
     scale=(0.15, 0.1),
     x=-0.2,
     on_click=go_to_level_select
 )
+set_sprite(start_button, 'assets/textures/iniciarbtn.jpg')
 
 # --- Botón de Salir ---
 quit_button = Button(
     parent=button_container,
-    texture='assets/textures/salirbtn.jpg', 
     color=color.white, 
     scale=(0.15, 0.1),
     x=0.2,
     on_click=application.quit
 )
+set_sprite(quit_button, 'assets/textures/salirbtn.jpg')
+
+# --- Pantalla de carga sobre el menú principal ---
+loading_splash = Entity(parent=camera.ui)
+loading_text = Text(parent=loading_splash, text="Cargando recursos... 0%", origin=(0, 0), y=-0.28, scale=1.2)
+loading_bar_background = Entity(parent=loading_splash, model='quad', color=color.black66, scale=(0.5, 0.02), y=-0.32)
+loading_bar = Entity(parent=loading_splash, model='quad', color=color.azure, origin=(-0.5, 0), scale=(0, 0.02), x=-0.25, y=-0.32)
+start_button.disabled = True # No se puede empezar hasta que terminen de cargar los recursos
 
 # ======================================================================================
 # Fondo para el Menú de la Selección de Nivel
@@ -571,7 +953,7 @@ level_select_menu = Entity(parent=camera.ui, enabled=False) # Contenedor para el
 level_select_background = Entity(
     parent=level_select_menu,
     model='quad',
-    texture='assets/textures/MenuNiveles.jpg', # Fondo del menú de selección de nivel
+    texture=load_texture_file('assets/textures/MenuNiveles.jpg'), # Fondo del menú de selección de nivel
     scale_x=camera.aspect_ratio,
     scale_y=1,
     z=0.1,
@@ -586,7 +968,10 @@ level_buttons_container = Entity(parent=level_select_menu, y=-0.4) # Ajusta la '
 level_1_button = Button(parent=level_buttons_container, text="Nivel 1", scale=(0.25, 0.08), x=-0.35, y=0.1, on_click=lambda: start_level(1))
 level_2_button = Button(parent=level_buttons_container, text="Nivel 2", scale=(0.25, 0.08), x=0, y=0.1, on_click=lambda: start_level(2))
 level_3_button = Button(parent=level_buttons_container, text="Nivel 3", scale=(0.25, 0.08), x=0.35, y=0.1, on_click=lambda: start_level(3))
-level_buttons = [level_1_button, level_2_button, level_3_button] # Lista de botones de nivel
+level_4_button = Button(parent=level_buttons_container, text="Nivel 4", scale=(0.25, 0.08), x=-0.35, y=-0.02, on_click=lambda: start_level(4))
+level_buttons = [level_1_button, level_2_button, level_3_button, level_4_button] # Lista de botones de nivel
+# Nivel sin fin con cientos de objetivos para medir el rendimiento (siempre disponible)
+stress_level_button = Button(parent=level_buttons_container, text="Modo Estrés", color=color.orange, scale=(0.25, 0.08), x=0.35, y=-0.02, on_click=lambda: start_level(ENDLESS_LEVEL))
 
 back_to_main_menu_button = Button( parent=level_buttons_container,
                                   text="Regresar al Inicio",
@@ -602,90 +987,308 @@ pause_menu = Entity(parent=camera.ui, enabled=False, model='quad', scale=(0.5, 0
 Text(parent=pause_menu, text="Juego en Pausa", origin=(0,0), y=0.4, scale=2)
 
 Button(parent=pause_menu, text="Reanudar Juego", color=color.azure, scale=(0.8, 0.2), y=0.15, on_click=resume_game)
-Button(parent=pause_menu, text="Menú de Niveles", color=color.blue, scale=(0.8, 0.2), y=-0.1, on_click=Func(lambda: (application.resume(), pause_menu.disable(), show_level_select_menu())))
+pause_levels_button = Button(parent=pause_menu, text="Menú de Niveles", color=color.blue, scale=(0.8, 0.2), y=-0.1, on_click=Func(lambda: (application.resume(), pause_menu.disable(), show_level_select_menu())))
+pause_levels_button.enabled = not versus_address # En versus no hay otros niveles a los que ir
 Button(parent=pause_menu, text="Salir al Menú Principal", color=color.red, scale=(0.8, 0.2), y=-0.35, on_click=Func(lambda: (application.resume(), pause_menu.disable(), show_main_menu())))
 
+# ======================================================================================
+# Recoge los recursos cargados en segundo plano y actualiza la pantalla de carga
+# ======================================================================================
+def poll_asset_loading():
+    for name, asset in asset_loader.poll():
+        loaded_assets[name] = asset
+    loading_text.text = f"Cargando recursos... {asset_loader.progress * 100:.0f}%"
+    loading_bar.scale_x = 0.5 * asset_loader.progress
+    if asset_loader.finished:
+        finish_asset_loading()
+
+# Construye la cabina de disparo con el atlas cargado
+def finish_asset_loading():
+    global static_range
+    startup_report.mark('assets_loaded')
+    atlas, rects = loaded_assets[RANGE_ATLAS]
+    static_range, range_stats = build_static_range(scene, atlas._texture, rects)
+    if sun.shadows:
+        sun.update_bounds() # El volumen de sombras debe abarcar la cabina
+    startup_report.details['static_range'] = range_stats
+    if progress:
+        startup_report.details['shot_history'] = loaded_assets.pop('shot_history') # Disparos ya registrados
+    loading_splash.disable()
+    start_button.disabled = bool(versus_loop) # En versus solo se juega la partida en red
+    startup_report.mark('interactive')
+    startup_report.write(asset_loader)
+    if replay_path:
+        start_replay()
+    if versus_loop:
+        start_versus()
+
+# ======================================================================================
+# --- Reproducción de repeticiones en la ventana ---
+# ======================================================================================
+# La repetición controla la simulación y la cámara; el jugador solo puede pausar
+def start_replay():
+    global replay_player
+    header, records = load_replay(replay_path)
+    main_menu.disable()
+    replay_player = ReplayPlayer(records, game_state, HitTester(Occluders(header['occluders'])),
+                                 on_start=replay_start_level, on_input=replay_input,
+                                 on_abort=show_level_select_menu, drain_events=False)
+
+def replay_start_level(level, seed):
+    close_end_panel()
+    start_level(level, seed)
+
+# Efectos en pantalla de una entrada grabada (el disparo ya lo resolvió la reproducción)
+def replay_input(record, key, fired):
+    camera.rotation = Vec3(*record['v3'])
+    if key == 'right mouse down':
+        aim_down_sights()
+    elif key == 'right mouse up':
+        hip_fire_state()
+    if fired:
+        update_hud()
+        weapon_recoil()
+        handle_game_events()
+
+# Avanza la repetición al ritmo real, en pasos fijos de simulación
+def play_replay(dt):
+    global replay_player, replay_time
+    replay_time += dt
+    steps = int(replay_time / game_state.dt)
+    replay_time -= steps * game_state.dt
+    replay_player.advance(steps)
+    if replay_player.finished:
+        for result in replay_player.results:
+            print(f"Nivel {result['level']}: {'coincide' if result['match'] else 'NO coincide'} con la grabación")
+        for mismatch in replay_player.mismatches:
+            print('Diferencia:', mismatch)
+        replay_player = None
+
+# ======================================================================================
+# --- Versus en red ---
+# ======================================================================================
+# La conexión la atiende un bucle de asyncio que se ejecuta sin bloquear una vez por frame
+# desde una tarea de Panda3D (también en pausa: la partida del anfitrión no se detiene).
+# El nivel VERSUS_LEVEL empieza en cuanto el anfitrión empareja a los dos jugadores.
+versus_loop = None
+versus_host_process = None # Anfitrión arrancado por este juego con '--versus local'
+versus_text = Text(parent=camera.ui, text="", origin=(0, 0), y=-0.28, scale=1.5, enabled=False)
+
+def start_versus():
+    main_menu.disable()
+    versus_text.text = "Esperando al rival..."
+    versus_text.enable()
+
+def pump_versus(task):
+    pump(versus_loop)
+    game_state.check_connection(perf_counter())
+    if versus_text.enabled:
+        if game_state.ready:
+            versus_text.disable()
+            start_level(VERSUS_LEVEL)
+        elif game_state.rejected or game_state.lost:
+            versus_text.text = "La sala está ocupada" if game_state.rejected else "Sin respuesta del anfitrión"
+    elif game_state.active:
+        update_hud() # Tiempo restante y marcador del rival
+    elif game_state.events: # La partida terminó fuera de update() (fin en el anfitrión o conexión perdida)
+        if application.paused:
+            application.resume()
+            pause_menu.disable()
+        handle_game_events()
+    return task.cont
+
+if versus_address:
+    versus_host, _, versus_port = versus_address.partition(':')
+    versus_port = int(versus_port or DEFAULT_PORT)
+    if versus_host == 'local':
+        versus_host = '127.0.0.1'
+        versus_host_process = start_local_host(versus_port)
+        if versus_host_process:
+            atexit.register(versus_host_process.terminate)
+    versus_loop = asyncio.new_event_loop()
+    versus_loop.run_until_complete(connect(game_state, versus_host, versus_port))
+    taskMgr.add(pump_versus, 'versus_network')
+
 # ======================================================================================
 # --- Lógica Principal del Juego ---
 # ======================================================================================
+@profiler.timed('update')
 def update():
-    global current_bg_music
+    profiler.frame() # Cierra el frame anterior del perfilador (si está activo)
+    audio_manager.new_frame() # Límite de voces que pueden empezar en este frame
+    if profiler.enabled:
+        profiler_overlay.refresh(time.dt)
+
+    # Mientras haya recursos cargándose en segundo plano, actualiza la pantalla de carga
+    if loading_splash.enabled:
+        poll_asset_loading()
+    # Recoge las armas que terminaron de precargarse
+    if not weapon_loader.finished:
+        for name, asset in weapon_loader.poll():
+            loaded_assets[name] = asset
+
+    # Durante una repetición, es ella la que aplica las entradas y avanza la simulación
+    if replay_player and not application.paused:
+        play_replay(time.dt)
+
     # Si el juego no está pausado y está activo
-    if not application.paused and game_active:
-        update_hud() # Actualiza el HUD
-        # Controla la rotación de la cámara con el ratón
-        camera.rotation_y += mouse.velocity.x * 60
-        camera.rotation_x -= mouse.velocity.y * 60
-        # Limita la rotación de la cámara para que no gire completamente
-        camera.rotation_x = clamp(camera.rotation_x, -50, 50)
-        camera.rotation_y = clamp(camera.rotation_y, -80, 80)
+    if not application.paused and game_state.active:
+        # Avanza la simulación en pasos fijos y dibuja su estado
+        if not replay_player:
+            game_state.update(time.dt)
+        handle_game_events()
+        sync_targets()
+        game_state.record_presented(perf_counter()) # Lo que se acaba de dibujar, para los disparos
+        if game_state.trigger_held:
+            auto_fire()
+        if show_fps:
+            fps_meter.update(time.dt)
+            path = 'instanciados' if instanced_targets else 'entidades'
+            hud.set('render', f"Objetivos {path}: {target_draw_calls()} draw calls | calidad {quality['name']}")
+            pending = ', '.join(f"{group} {count}" for group, count in game_state.timers.pending().items())
+            hud.set('timers', f"Temporizadores: {len(game_state.timers)} ({pending or 'ninguno'})")
+            voices, latency = audio_manager.voice_stats(), audio_manager.latency_report()
+            hud.set('audio', f"Audio: {voices['playing']} voces ({voices['steals']} robadas, {voices['dropped']} descartadas)"
+                             + (f" | clic-sonido p50 {latency['p50_ms']:.2f} ms p95 {latency['p95_ms']:.2f} ms" if latency else ''))
+        # Controla la rotación de la cámara con el ratón (en una repetición la fija cada entrada)
+        if not replay_player:
+            camera.rotation_y += mouse.velocity.x * 60
+            camera.rotation_x -= mouse.velocity.y * 60
+            # Limita la rotación de la cámara para que no gire completamente
+            camera.rotation_x = clamp(camera.rotation_x, -50, 50)
+            camera.rotation_y = clamp(camera.rotation_y, -80, 80)
     # Si el juego está pausado y hay música de fondo sonando, pausar la música
-    elif application.paused and current_bg_music and current_bg_music.playing:
-        current_bg_music.pause()
+    elif application.paused and audio_manager.music_playing():
+        audio_manager.pause_music()
+
+# ======================================================================================
+# Sonido y retroceso del arma del nivel al disparar
+# ======================================================================================
+# El retroceso lleva el arma 'kick' grados hacia arriba desde su reposo (apuntando o no) y
+# la devuelve con la curva de su 'recoil'. La vuelta se programa con argumentos, sin crear
+# una función por disparo. 'pressed_at' es el instante del clic (para medir la latencia del sonido).
+def weapon_recoil(pressed_at=None):
+    spec = game_state.weapon
+    recoil = spec['recoil']
+    weapon = weapons[game_state.weapon_name]
+    audio_manager.play_sfx(spec['sound'], pressed_at)
+    rest_x = weapon_pose()[1].x
+    recoil_curve = getattr(curve, recoil['curve'])
+    if recoil['kick_time']:
+        weapon.animate_rotation_x(rest_x - recoil['kick'], duration=recoil['kick_time'], curve=recoil_curve)
+        game_state.schedule(recoil['kick_time'], recover_weapon, weapon, rest_x, recoil['recover_time'], recoil_curve,
+                            group='effects')
+    else:
+        weapon.rotation_x = rest_x - recoil['kick']
+        recover_weapon(weapon, rest_x, recoil['recover_time'], recoil_curve)
+
+def recover_weapon(weapon, rest_x, duration, recoil_curve):
+    weapon.animate_rotation_x(rest_x, duration=duration, curve=recoil_curve)
 
 # ======================================================================================
-# Funciones para manejar el estado de apuntado (ADS) del rifle
+# Funciones para manejar el estado de apuntado (ADS) de las armas que lo tienen
 # ======================================================================================
 def aim_down_sights():
     global is_aiming_ads
-    if current_level == 2 and not is_aiming_ads: # Solo apunta si es el nivel 2 y no estás apuntando ya
-        rifle.animate_position(rifle_ads_position, duration=0.15, curve=curve.out_quad)
-        rifle.animate_rotation(rifle_ads_rotation, duration=0.15, curve=curve.out_quad)
-        # CORRECCIÓN: Usar camera.animate() para FOV
-        camera.animate('fov', ads_fov, duration=0.15, curve=curve.out_quad) 
+    ads = game_state.weapon.get('ads')
+    if ads and not is_aiming_ads: # Solo apunta si el arma tiene mira y no estás apuntando ya
+        weapon = weapons[game_state.weapon_name]
+        weapon.animate_position(Vec3(*ads['position']), duration=ads['time_in'], curve=curve.out_quad)
+        weapon.animate_rotation(Vec3(*ads['rotation']), duration=ads['time_in'], curve=curve.out_quad)
+        camera.animate('fov', ads['fov'], duration=ads['time_in'], curve=curve.out_quad)
         is_aiming_ads = True
-        # crosshair.disable() # ELIMINADA: No ocultes la mira aquí
 
 def hip_fire_state():
     global is_aiming_ads
-    if current_level == 2 and is_aiming_ads: # Solo vuelve a hip-fire si es el nivel 2 y estás apuntando
-        rifle.animate_position(rifle_hip_position, duration=0.2, curve=curve.out_quad)
-        rifle.animate_rotation(rifle_hip_rotation, duration=0.2, curve=curve.out_quad)
-        # CORRECCIÓN: Usar camera.animate() para FOV
-        camera.animate('fov', default_fov, duration=0.2, curve=curve.out_quad)
+    spec = game_state.weapon
+    if 'ads' in spec and is_aiming_ads: # Solo vuelve a hip-fire si estás apuntando
+        weapon = weapons[game_state.weapon_name]
+        duration = spec['ads']['time_out']
+        weapon.animate_position(Vec3(*spec['position']), duration=duration, curve=curve.out_quad)
+        weapon.animate_rotation(Vec3(*spec['rotation']), duration=duration, curve=curve.out_quad)
+        camera.animate('fov', default_fov, duration=duration, curve=curve.out_quad)
         is_aiming_ads = False
-        # crosshair.enable() # ELIMINADA: No habilites la mira aquí
+
+# ======================================================================================
+# Disparo automático: mientras se mantiene el clic, dispara a la cadencia del arma
+# ======================================================================================
+# Se llama una vez por frame, después de dibujar. Cada disparo pendiente se resuelve contra
+# los objetivos vivos (los que se acaban de mostrar) con la cámara del frame, y se graba
+# como entrada 'auto fire' para que la repetición lo reaplique tal cual. El sonido, el
+# retroceso y el HUD se actualizan una vez por frame aunque salgan varios disparos.
+def auto_fire():
+    origin = forward = up = None
+    while (at := game_state.fire_held()) is not None:
+        if origin is None:
+            origin, forward, up = camera.world_position, camera.forward, camera.up
+        if replay_recorder:
+            replay_recorder.input('auto fire', game_state.steps, None, perf_counter(), at,
+                                  origin, forward, up, camera.rotation)
+        hits_before = game_state.hits
+        hit = game_state.resolve_shot(hit_tester, game_state.swarm, origin, forward, up, max_distance=200)
+        log_shot(game_state.swarm, at, origin, forward, hit, game_state.hits - hits_before)
+    if origin is not None:
+        handle_game_events()
+        update_hud()
+        weapon_recoil()
 
 
 # ======================================================================================
 # Función que maneja la entrada del usuario (teclado y ratón)
 # ======================================================================================
+@profiler.timed('input')
 def input(key):
-    global shots_fired, last_shot_time, current_bg_music, is_aiming_ads
+    global is_aiming_ads, show_fps
+    pressed_at = perf_counter() # Marca de tiempo del evento (reloj monotónico)
+    current_level = game_state.current_level
+    shown_frame = game_state.history.at(pressed_at) # Frame que se veía en pantalla
+    clicked_at = game_state.time_at(pressed_at)     # Mismo instante en el reloj de la simulación
+
+    # F3 muestra u oculta la lectura de FPS del HUD
+    if key == 'f3':
+        show_fps = not show_fps
+        fps_text.enabled = show_fps
+        render_text.enabled = show_fps
+        timers_text.enabled = show_fps
+        audio_text.enabled = show_fps
+
+    # F4 alterna entre el dibujo instanciado de objetivos y una entidad por objetivo
+    if key == 'f4':
+        set_instanced_targets(not instanced_targets)
+
+    # F5 activa o desactiva el perfilador de frames y su superposición; F6 vuelca su informe
+    if key == 'f5':
+        profiler_overlay.enabled = profiler.toggle()
+    if key == 'f6' and profiler.frames:
+        print('Perfil guardado en', *profiler.dump())
 
     # Si se presiona 'escape' y el juego está activo, se alterna la pausa
-    if key == 'escape' and game_active:
+    if key == 'escape' and game_state.active:
         application.paused = not application.paused # Alterna el estado de pausa de la aplicación
         pause_menu.enabled = application.paused      # Habilita/deshabilita el menú de pausa
         mouse.locked = not pause_menu.enabled        # Bloquea/desbloquea el ratón
         if application.paused:
-            if current_bg_music:
-                current_bg_music.pause() # Pausa la música de fondo
+            game_state.pause()           # Congela la simulación y sus temporizadores
+            enter_menu_mode(freeze=True) # La escena queda congelada detrás del menú
+            audio_manager.pause_music() # Pausa la música de fondo
         else:
-            # Detiene y DESTRUYE cualquier música de fondo previa para asegurar que reinicie
-            if current_bg_music:
-                current_bg_music.stop()
-                destroy(current_bg_music) 
-                current_bg_music = None
-
-            # Vuelve a cargar y reproducir la música del nivel actual
-            if current_level == 1:
-                current_bg_music = Audio('assets/sounds/fondo.mp3', loop=True, autoplay=False, volume=0.8)
-            elif current_level == 2:
-                current_bg_music = Audio('assets/sounds/fondoNivel2.mp3', loop=True, autoplay=False, volume=0.8)
-            elif current_level == 3:
-                current_bg_music = Audio('assets/sounds/fondoNivel3.mp3', loop=True, autoplay=False, volume=0.4) 
-
-            if current_bg_music:
-                current_bg_music.play() # Reproduce la música desde el inicio
+            game_state.resume()
+            exit_menu_mode()
+            audio_manager.resume_music() # Continúa la música desde donde se pausó
     
-    if application.paused: # Si el juego está pausado, no procesar más entradas de juego
+    # Si el juego está pausado o se está reproduciendo una repetición, no procesar más entradas de juego
+    if application.paused or replay_player:
         return
 
+    # Graba la entrada con el paso de simulación, el frame mostrado y la cámara del momento
+    if replay_recorder:
+        replay_recorder.input(key, game_state.steps, shown_frame, pressed_at, clicked_at,
+                              camera.world_position, camera.forward, camera.up, camera.rotation)
+
 # ======================================================================================
     # Lógica de apuntado con CLIC DERECHO
 # ======================================================================================
-    if game_active and current_level == 2: # Solo para el rifle en Nivel 2
+    if game_state.active: # Solo para las armas con 'ads'
         if key == 'right mouse down':
             aim_down_sights()
         elif key == 'right mouse up':
@@ -694,66 +1297,26 @@ def input(key):
 # ======================================================================================
     # Lógica de disparo con CLIC IZQUIERDO
 # ======================================================================================
-    if game_active and key == 'left mouse down':
-        # Controla la cadencia de disparo (0.5 segundos entre disparos)
-        if time.time() - last_shot_time < 0.5:
+    if game_state.active and key == 'left mouse up':
+        game_state.release_trigger() # Las armas automáticas dejan de disparar
+    if game_state.active and key == 'left mouse down':
+        # Controla la cadencia de disparo del arma con el instante del clic en el reloj de la
+        # simulación (que no avanza en pausa) y cuenta el disparo. Con un arma automática,
+        # auto_fire() sigue disparando mientras no se suelte el clic.
+        if not game_state.pull_trigger(clicked_at):
             return
+        weapon_recoil(pressed_at) # Sonido y retroceso del arma del nivel, lo antes posible tras el clic
+        update_hud() # El disparo cambia la precisión
+
+        # Resuelve el disparo contra el frame que se veía al hacer clic
+        shoot(shown_frame or game_state.swarm, clicked_at)
 
-        last_shot_time = time.time() # Actualiza el tiempo del último disparo
-        
-        ignore_list = [] # Lista de entidades a ignorar en el raycast
-
-        if current_level == 1:
-            shots_fired += 1 # Incrementa disparos para pistola
-            gunshot_pistol_sound.play()
-            pistol.rotation_x = -10
-            pistol.animate_rotation_x(0, duration=0.1)
-            ignore_list = [pistol]
-            
-            # Realiza un raycast y detecta el impacto para la pistola
-            hit_info = raycast(camera.world_position, camera.forward, distance=200, ignore=ignore_list)
-            if hit_info.hit and hasattr(hit_info.entity, 'hit'):
-                hit_info.entity.hit()
-
-        elif current_level == 2:
-            # El rifle dispara siempre que se haga clic izquierdo en el Nivel 2, sin importar si está apuntando.
-            shots_fired += 1 # Incrementa disparos
-            gunshot_rifle_sound.play() # Reproduce el sonido de disparo
-            
-            # Si está apuntando, aplica un retroceso desde la posición de apuntado
-            if is_aiming_ads:
-                rifle.animate_rotation_x(rifle_ads_rotation.x - 10, duration=0.05, curve=curve.out_quad)
-                invoke(lambda: rifle.animate_rotation_x(rifle_ads_rotation.x, duration=0.05, curve=curve.out_quad), delay=0.05)
-            # Si no está apuntando, aplica un retroceso desde la posición normal (hip-fire)
-            else:
-                rifle.animate_rotation_x(rifle_hip_rotation.x - 10, duration=0.05, curve=curve.out_quad)
-                invoke(lambda: rifle.animate_rotation_x(rifle_hip_rotation.x, duration=0.05, curve=curve.out_quad), delay=0.05)
-
-
-            # Realiza un raycast para detectar el impacto
-            crosshair_hit_info = raycast(camera.world_position, camera.forward, distance=200, ignore=[rifle])
-            if crosshair_hit_info.hit and hasattr(crosshair_hit_info.entity, 'hit'):
-                crosshair_hit_info.entity.hit()
-
-        elif current_level == 3:
-            shots_fired += 1 # Incrementa disparos para escopeta
-            gunshot_shotgun_sound.play()
-            shotgun.rotation_x = -15
-            shotgun.animate_rotation_x(0, duration=0.1)
-            ignore_list = [shotgun]
-
-            # Realiza un raycast y detecta el impacto para la escopeta
-            hit_info = raycast(camera.world_position, camera.forward, distance=200, ignore=ignore_list)
-            if hit_info.hit and hasattr(hit_info.entity, 'hit'):
-                hit_info.entity.hit()
-        
 # ======================================================================================
 # --- Iniciar el Juego ---
 # ======================================================================================
 game_hud.disable()
-pistol.disable()
-rifle.disable()
-shotgun.disable()
 crosshair.enable() # Asegura que la mira esté visible desde el inicio
 mouse.locked = False # Asegura que el ratón no esté bloqueado al inicio
+enter_menu_mode() # El juego arranca en el menú principal
+startup_report.mark('first_frame_ready') # Escena construida; los recursos siguen cargando en paralelo
 app.run()
@@ -0,0 +1,173 @@
+# Perfilador de frames: tiempo por sección, percentiles y detección de tirones (no depende de Ursina)
+import csv
+import functools
+import gc
+import json
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROFILE_DIR = os.path.join(BASE_DIR, 'assets', 'cache') # Donde se vuelcan los informes
+
+HITCH_MS = 33.3 # Un frame más lento que esto (menos de 30 FPS) se marca como tirón
+
+# ======================================================================================
+# --- Perfilador de frames ---
+# ======================================================================================
+# Opcional: mientras 'enabled' es False, las secciones solo comprueban la bandera.
+# Cada frame (entre dos llamadas a frame()) se guarda en un buffer circular con:
+#   - el tiempo total del frame y el de cada sección medida,
+#   - las recolecciones del GC que ocurrieron (generación y duración),
+#   - los objetos asignados según el contador de la generación 0 del GC.
+class FrameProfiler:
+    def __init__(self, capacity=1800, hitch_ms=HITCH_MS):
+        self.enabled = False
+        self.hitch_ms = hitch_ms
+        self.frames = deque(maxlen=capacity)  # Últimos frames registrados
+        self.hitches = deque(maxlen=capacity) # Últimos frames marcados como tirón
+        self.frame_number = 0
+        self._reset_frame()
+        self._frame_start = None
+        self._gc_start = None
+
+    def _reset_frame(self):
+        self._sections = {}     # sección -> ms acumulados en el frame
+        self._collections = []  # (generación, ms, objetos recolectados)
+        self._allocated = 0     # Asignaciones contadas antes de las recolecciones del frame
+        self._gen0_start = gc.get_count()[0]
+
+    def enable(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self._frame_start = None
+        self._reset_frame()
+        gc.callbacks.append(self._on_gc)
+
+    def disable(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        gc.callbacks.remove(self._on_gc)
+
+    def toggle(self):
+        if self.enabled:
+            self.disable()
+        else:
+            self.enable()
+        return self.enabled
+
+    # Callback del GC: mide cada recolección y su generación
+    def _on_gc(self, phase, info):
+        if phase == 'start':
+            self._gc_start = time.perf_counter()
+            # La recolección pone a cero el contador de la generación 0: se guarda lo asignado
+            self._allocated += gc.get_count()[0] - self._gen0_start
+            self._gen0_start = 0
+        elif self._gc_start is not None:
+            duration = (time.perf_counter() - self._gc_start) * 1000
+            self._collections.append((info['generation'], duration, info['collected']))
+            self._gc_start = None
+
+    # Marca el límite entre frames: cierra el frame anterior y empieza uno nuevo
+    def frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self._record((now - self._frame_start) * 1000)
+        self._frame_start = now
+        self._reset_frame()
+
+    def _record(self, frame_ms):
+        self.frame_number += 1
+        record = {
+            'frame': self.frame_number,
+            'frame_ms': frame_ms,
+            'sections': self._sections,
+            'gc': self._collections,
+            'allocated': self._allocated + gc.get_count()[0] - self._gen0_start,
+            'hitch': frame_ms > self.hitch_ms,
+        }
+        self.frames.append(record)
+        if record['hitch']:
+            self.hitches.append(record)
+
+    # Suma 'ms' a una sección del frame actual
+    def add(self, name, ms):
+        self._sections[name] = self._sections.get(name, 0) + ms
+
+    # Decorador: mide cada llamada a la función como la sección 'name'
+    def timed(self, name):
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.add(name, (time.perf_counter() - start) * 1000)
+            return wrapper
+        return decorator
+
+    # Percentiles del tiempo de frame (ms) sobre los frames del buffer
+    def percentiles(self, points=(50, 95, 99)):
+        if not self.frames:
+            return {point: 0.0 for point in points}
+        frame_ms = np.fromiter((record['frame_ms'] for record in self.frames), dtype=np.float64)
+        return dict(zip(points, np.percentile(frame_ms, points).tolist()))
+
+    # Tiempo medio por frame de cada sección (ms)
+    def section_means(self):
+        totals = {}
+        for record in self.frames:
+            for name, ms in record['sections'].items():
+                totals[name] = totals.get(name, 0) + ms
+        count = len(self.frames) or 1
+        return {name: total / count for name, total in sorted(totals.items(), key=lambda item: -item[1])}
+
+    # Resumen en texto para la superposición en pantalla
+    def summary(self, top=5):
+        p = self.percentiles()
+        lines = [f"Frame p50 {p[50]:.1f} ms | p95 {p[95]:.1f} ms | p99 {p[99]:.1f} ms",
+                 f"Tirones (>{self.hitch_ms:.0f} ms): {len(self.hitches)} de {len(self.frames)} frames"]
+        for name, ms in list(self.section_means().items())[:top]:
+            lines.append(f"  {name}: {ms:.2f} ms")
+        if self.hitches:
+            last = self.hitches[-1]
+            collected = ', '.join(f"gen{gen} {ms:.1f} ms" for gen, ms, _ in last['gc']) or 'sin GC'
+            lines.append(f"Último tirón: frame {last['frame']} {last['frame_ms']:.1f} ms ({collected}, {last['allocated']} objetos)")
+        return '\n'.join(lines)
+
+    # Vuelca el buffer a JSON (resumen + frames) y CSV (una fila por frame); devuelve las rutas
+    def dump(self, prefix='perfil', directory=PROFILE_DIR):
+        name = f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}"
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, f'{name}.json')
+        csv_path = os.path.join(directory, f'{name}.csv')
+        report = {
+            'hitch_ms': self.hitch_ms,
+            'percentiles': {f'p{point}': value for point, value in self.percentiles().items()},
+            'section_means': self.section_means(),
+            'hitches': [record['frame'] for record in self.hitches],
+            'frames': list(self.frames),
+        }
+        with open(json_path, 'w') as file:
+            json.dump(report, file, indent=1)
+
+        sections = sorted({name for record in self.frames for name in record['sections']})
+        with open(csv_path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['frame', 'frame_ms', 'hitch', 'allocated', 'gc_generations', 'gc_ms'] + sections)
+            for record in self.frames:
+                writer.writerow([
+                    record['frame'], f"{record['frame_ms']:.3f}", int(record['hitch']), record['allocated'],
+                    ' '.join(str(gen) for gen, _, _ in record['gc']),
+                    f"{sum(ms for _, ms, _ in record['gc']):.3f}",
+                ] + [f"{record['sections'].get(name, 0):.3f}" for name in sections])
+        return json_path, csv_path
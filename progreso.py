@@ -0,0 +1,223 @@
+# Progreso persistente: perfil del jugador y registro de cada disparo (no depende de Ursina)
+# El perfil (nivel desbloqueado, totales y mejores precisiones) es un JSON pequeño; los
+# disparos se añaden a un archivo binario de registros fijos que se lee de una vez como array
+# de NumPy. Todo se escribe desde un hilo en segundo plano: los frames de juego solo
+# empaquetan el registro y lo dejan en una cola, nunca tocan el disco.
+import atexit
+import json
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROGRESS_DIR = os.path.join(BASE_DIR, 'assets', 'cache', 'progreso')
+PROFILE_FILE = 'perfil.json'
+SHOTS_FILE = 'disparos.bin'
+
+# ======================================================================================
+# --- Formato del registro de disparos ---
+# ======================================================================================
+# Cabecera: MAGIC y versión. Después, un registro por disparo:
+#   time: instante (segundos desde epoch), run: partida (ver Progress.start_run),
+#   level: nivel, weapon: arma (clave de WEAPON_CONFIG), pellets: perdigones disparados,
+#   hits: perdigones que acertaron, reaction: segundos desde que apareció el objetivo
+#   alcanzado (o al que se apuntaba si falló), distance: distancia a ese objetivo.
+#   Sin objetivo en pantalla, reaction y distance son NaN.
+MAGIC = b'AIMSHT'
+VERSION = 1
+HEADER = struct.Struct('<6sH')
+SHOT = struct.Struct('<dIB8sHHff')
+SHOT_DTYPE = np.dtype([
+    ('time', '<f8'), ('run', '<u4'), ('level', 'u1'), ('weapon', 'S8'),
+    ('pellets', '<u2'), ('hits', '<u2'), ('reaction', '<f4'), ('distance', '<f4'),
+])
+assert SHOT_DTYPE.itemsize == SHOT.size
+
+DEFAULT_PROFILE = {
+    'unlocked_level': 1, # El nivel más alto desbloqueado
+    'runs': 0,           # Partidas empezadas (numeran los disparos)
+    'points': 0, 'hits': 0, 'shots_fired': 0, 'targets_hit': 0, # Totales de los niveles terminados
+    'best_accuracy': {}, # nivel (como texto) -> mejor precisión al terminarlo
+}
+
+# Lee el perfil; uno que no existe o no se puede leer empieza de cero
+def load_profile(path):
+    profile = json.loads(json.dumps(DEFAULT_PROFILE))
+    try:
+        with open(path) as file:
+            profile.update(json.load(file))
+    except (OSError, ValueError):
+        pass
+    return profile
+
+# Lee el registro de disparos como array estructurado (vacío si no existe o no es de este
+# formato y versión, como load_profile). Con 'size' solo se leen los registros completos
+# de esos primeros bytes.
+def load_shots(path, size=None):
+    try:
+        with open(path, 'rb') as file:
+            data = file.read(size) if size is not None else file.read()
+    except OSError:
+        return np.zeros(0, dtype=SHOT_DTYPE)
+    if len(data) < HEADER.size:
+        return np.zeros(0, dtype=SHOT_DTYPE)
+    if HEADER.unpack_from(data) != (MAGIC, VERSION):
+        return np.zeros(0, dtype=SHOT_DTYPE)
+    count = (len(data) - HEADER.size) // SHOT.size # Un registro a medio escribir se ignora
+    return np.frombuffer(data, dtype=SHOT_DTYPE, count=count, offset=HEADER.size)
+
+# Deja el registro de disparos listo para seguir añadiendo: uno de otro formato o versión
+# (o con la cabecera cortada) se aparta como '.old' y se empieza otro; en uno válido se
+# recorta el registro que quedara a medio escribir, que desalinearía todos los siguientes.
+# Devuelve el tamaño del archivo (0 si hay que escribir la cabecera).
+def prepare_shots_file(path):
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return 0
+    if not size:
+        return 0
+    with open(path, 'r+b') as file:
+        header = file.read(HEADER.size)
+        if len(header) == HEADER.size and HEADER.unpack(header) == (MAGIC, VERSION):
+            size = HEADER.size + (size - HEADER.size) // SHOT.size * SHOT.size
+            file.truncate(size)
+            return size
+    os.replace(path, path + '.old')
+    return 0
+
+# ======================================================================================
+# --- Progreso del jugador ---
+# ======================================================================================
+# El hilo de escritura recibe bytes que añadir al registro de disparos o un perfil que
+# guardar (se escribe aparte y se renombra, así que nunca queda a medias).
+class Progress:
+    def __init__(self, directory=PROGRESS_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.profile_path = os.path.join(directory, PROFILE_FILE)
+        self.shots_path = os.path.join(directory, SHOTS_FILE)
+        self.profile = load_profile(self.profile_path)
+        self.run = self.profile['runs'] # Partida en curso
+        # Disparos de sesiones anteriores (ver load_history) y de esta sesión
+        self.history = np.zeros(0, dtype=SHOT_DTYPE)
+        self._history_size = prepare_shots_file(self.shots_path)
+        self.session = []
+        self._queue = queue.SimpleQueue()
+        if not self._history_size:
+            self._queue.put(HEADER.pack(MAGIC, VERSION))
+        self._thread = threading.Thread(target=self._write, name='progress-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _write(self):
+        with open(self.shots_path, 'ab') as file:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                if isinstance(item, dict):
+                    self._save_profile(item)
+                else:
+                    file.write(item)
+                if self._queue.empty():
+                    file.flush()
+
+    def _save_profile(self, profile):
+        partial_path = self.profile_path + '.part'
+        with open(partial_path, 'w') as file:
+            json.dump(profile, file, indent=1)
+        os.replace(partial_path, self.profile_path)
+
+    # Lee los disparos de sesiones anteriores (puede llamarse desde un hilo de carga): solo
+    # los que ya estaban en el archivo al crear el Progress, los de esta sesión van aparte
+    def load_history(self):
+        self.history = load_shots(self.shots_path, self._history_size)
+        return len(self.history)
+
+    # Empieza una partida de un nivel; sus disparos llevan su número (el contador se guarda
+    # ya, para que no se repita aunque el nivel no se termine)
+    def start_run(self):
+        self.profile['runs'] += 1
+        self.run = self.profile['runs']
+        self.save()
+        return self.run
+
+    # Registra un disparo (ver el formato arriba). Solo empaqueta y encola.
+    def shot(self, level, weapon, pellets, hits, reaction=float('nan'), distance=float('nan')):
+        row = (time.time(), self.run, level, weapon.encode(), pellets, hits, reaction, distance)
+        self.session.append(row)
+        self._queue.put(SHOT.pack(*row))
+
+    # Suma al perfil un nivel terminado ('state' es el GameState) y lo guarda en segundo plano
+    def end_run(self, state):
+        profile = self.profile
+        profile['unlocked_level'] = max(profile['unlocked_level'], state.unlocked_level)
+        profile['points'] += state.points
+        profile['hits'] += state.hits
+        profile['shots_fired'] += state.shots_fired
+        profile['targets_hit'] += state.targets_hit
+        level = str(state.current_level)
+        profile['best_accuracy'][level] = max(profile['best_accuracy'].get(level, 0), state.accuracy)
+        self.save()
+
+    def save(self):
+        self._queue.put(json.loads(json.dumps(self.profile))) # Copia: el hilo la escribe más tarde
+
+    # Todos los disparos conocidos, de sesiones anteriores y de esta
+    def shots(self):
+        if not self.session:
+            return self.history
+        return np.concatenate([self.history, np.array(self.session, dtype=SHOT_DTYPE)])
+
+    # Termina de escribir lo pendiente y cierra el archivo
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+# ======================================================================================
+# --- Estadísticas por nivel ---
+# ======================================================================================
+# Resumen de los disparos de un nivel, sin bucles por disparo:
+#   'shots', 'accuracy': perdigones disparados y precisión de todas las partidas
+#   'trend': precisión de cada una de las últimas 'runs' partidas (de más antigua a más reciente)
+#   'reaction': percentiles 50 y 90 del tiempo de reacción de los aciertos (segundos, o None)
+def level_stats(shots, level, runs=5):
+    shots = shots[shots['level'] == level]
+    pellets = shots['pellets'].astype(np.int64)
+    hits = shots['hits'].astype(np.int64)
+    fired = int(pellets.sum())
+    run_ids, run_index = np.unique(shots['run'], return_inverse=True)
+    run_pellets = np.bincount(run_index, weights=pellets, minlength=len(run_ids))
+    run_hits = np.bincount(run_index, weights=hits, minlength=len(run_ids))
+    trend = (run_hits / np.maximum(run_pellets, 1) * 100)[-runs:]
+    reactions = shots['reaction'][(hits > 0) & np.isfinite(shots['reaction'])]
+    return {
+        'shots': fired,
+        'accuracy': hits.sum() / fired * 100 if fired else 0,
+        'trend': trend.tolist(),
+        'reaction': tuple(np.percentile(reactions, (50, 90)).tolist()) if len(reactions) else None,
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Resume el progreso guardado')
+    parser.add_argument('--dir', default=PROGRESS_DIR)
+    args = parser.parse_args()
+
+    profile = load_profile(os.path.join(args.dir, PROFILE_FILE))
+    shots = load_shots(os.path.join(args.dir, SHOTS_FILE))
+    print(f"Nivel desbloqueado {profile['unlocked_level']}, {profile['runs']} partidas, "
+          f"{profile['points']} puntos, {len(shots)} disparos registrados")
+    for level in np.unique(shots['level']).tolist():
+        stats = level_stats(shots, level)
+        reaction = stats['reaction']
+        print(f"  Nivel {level}: precisión {stats['accuracy']:.1f}% en {stats['shots']} disparos, "
+              f"últimas partidas {' -> '.join(f'{value:.0f}%' for value in stats['trend'])}"
+              + (f", reacción p50 {reaction[0]:.2f}s p90 {reaction[1]:.2f}s" if reaction else ''))
@@ -0,0 +1,490 @@
+# Pipeline de recursos: caché binaria de modelos, atlas, texturas optimizadas, audio decodificado y carga en paralelo al arrancar
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from panda3d.core import ConfigVariableInt, Filename, SamplerState
+
+# Carpeta base para resolver las rutas relativas de los recursos
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BASE_DIR, 'assets', 'models')
+CACHE_DIR = os.path.join(BASE_DIR, 'assets', 'cache')
+STARTUP_REPORT = os.path.join(CACHE_DIR, 'arranque.jsonl') # Un informe de arranque por línea
+
+# ======================================================================================
+# --- Caché binaria de modelos ---
+# ======================================================================================
+# Hash del contenido de un archivo; cambia en cuanto el archivo cambia
+def content_hash(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+# Ruta del .bam en caché para un .obj (el nombre incluye el hash de su contenido)
+def cached_model_path(obj_path):
+    full_path = os.path.join(BASE_DIR, obj_path)
+    stem = os.path.splitext(os.path.basename(full_path))[0]
+    return os.path.join(CACHE_DIR, f'{stem}-{content_hash(full_path)}.bam')
+
+# Convierte un .obj al formato binario de Panda3D (.bam) si no está ya en caché.
+# Devuelve (ruta del .bam, True si hubo que convertirlo).
+def build_model_cache(obj_path):
+    from ursina.mesh_importer import load_model
+
+    bam_path = cached_model_path(obj_path)
+    if os.path.exists(bam_path):
+        return bam_path, False
+
+    full_path = os.path.join(BASE_DIR, obj_path)
+    stem = os.path.splitext(os.path.basename(full_path))[0]
+    # use_deepcopy evita que Ursina guarde su propio .bam sin invalidación por contenido
+    mesh = load_model(os.path.basename(full_path), path=Path(os.path.dirname(full_path)), use_deepcopy=True)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Se borran las versiones anteriores del mismo modelo
+    for old in Path(CACHE_DIR).glob(f'{stem}-*.bam'):
+        old.unlink()
+    mesh.writeBamFile(Filename.fromOsSpecific(bam_path))
+    return bam_path, True
+
+# Carga un modelo desde la caché binaria (convirtiéndolo antes si hace falta)
+def load_cached_model(obj_path):
+    bam_path, converted = build_model_cache(obj_path)
+    model = loader.loadModel(Filename.fromOsSpecific(bam_path), noCache=True)  # type: ignore
+    return model, converted
+
+# ======================================================================================
+# --- Caché de audio decodificado ---
+# ======================================================================================
+# Los efectos de sonido se decodifican una vez de MP3 a PCM de 16 bits (.wav): cargarlos ya
+# no pasa por el decodificador y todas las voces de un efecto comparten el mismo búfer.
+PCM_MARGIN = 0.25 # Segundos que se leen de más: la duración de un MP3 es una estimación
+
+# Ruta del .wav en caché para un sonido (el nombre incluye el hash de su contenido)
+def cached_pcm_path(sound_path):
+    full_path = os.path.join(BASE_DIR, sound_path)
+    stem = Path(sound_path).stem
+    return os.path.join(CACHE_DIR, f'{stem}-{content_hash(full_path)}.wav')
+
+# Decodifica un sonido a .wav si no está ya en caché (puede llamarse desde un hilo de carga).
+# Devuelve (ruta del .wav, True si hubo que decodificarlo).
+def build_pcm_cache(sound_path):
+    import numpy as np
+    from panda3d.core import Datagram, MovieAudio
+
+    wav_path = cached_pcm_path(sound_path)
+    if os.path.exists(wav_path):
+        return wav_path, False
+    cursor = MovieAudio.get(Filename.fromOsSpecific(os.path.join(BASE_DIR, sound_path))).open()
+    rate, channels = cursor.audioRate(), cursor.audioChannels()
+    samples = Datagram()
+    total = math.ceil((cursor.length() + PCM_MARGIN) * rate)
+    for start in range(0, total, 4096):
+        cursor.readSamples(min(4096, total - start), samples)
+    pcm = np.frombuffer(bytes(samples.getMessage()), dtype='<i2').reshape(-1, channels)
+    # Pasado el final, el cursor devuelve silencio: se recorta
+    loud = np.flatnonzero(np.abs(pcm).max(axis=1))
+    pcm = pcm[:loud[-1] + 1 if len(loud) else 0]
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Se escribe aparte y se renombra: dos efectos pueden compartir archivo y cargarse a la vez
+    partial_path = f'{wav_path}.{threading.get_ident()}.part'
+    with wave.open(partial_path, 'wb') as file:
+        file.setnchannels(channels)
+        file.setsampwidth(2)
+        file.setframerate(rate)
+        file.writeframes(pcm.tobytes())
+    os.replace(partial_path, wav_path)
+    # Se borran las versiones anteriores del mismo sonido
+    for old in Path(CACHE_DIR).glob(f'{Path(sound_path).stem}-*.wav'):
+        if str(old) != wav_path:
+            old.unlink(missing_ok=True)
+    return wav_path, True
+
+# Carga una textura como Texture de Ursina (se crea desde la ruta para que conserve su nombre).
+# Si el paso de build generó variantes optimizadas, usa la que corresponde a la pantalla y
+# a la calidad (ver find_optimized_texture).
+def load_texture_file(path):
+    from ursina import Texture
+
+    optimized = find_optimized_texture(path)
+    if optimized is None:
+        return Texture(Path(BASE_DIR) / path)
+    texture = Texture(Path(optimized)) # Filtrado de Ursina (nearest); se añaden los mipmaps al reducir
+    texture._texture.setMinfilter(SamplerState.FT_linear_mipmap_linear)
+    optimized_textures[path] = texture._texture
+    return texture
+
+# ======================================================================================
+# --- Texturas optimizadas ---
+# ======================================================================================
+# El paso de build convierte cada textura a .txo (formato nativo de Panda3D): tamaño en
+# potencia de dos, mipmaps ya generados y compresión DXT (DXT5 si tiene alfa). Se generan
+# variantes de varios tamaños; al cargar se usa la mayor que no supera el lado útil en la
+# pantalla ni el límite de textura del preset de calidad. Así no hay que decodificar el
+# JPG/PNG al arrancar y la GPU recibe la textura comprimida (de 4 a 8 veces menos memoria).
+TEXTURES_DIR = os.path.join(BASE_DIR, 'assets', 'textures')
+TEXTURE_REPORT = os.path.join(CACHE_DIR, 'texturas.json') # Informe de memoria del último build
+DEFAULT_DISPLAY = (1920, 1080)
+display_texture_size = None # Lado útil en la pantalla (ver set_display_resolution)
+optimized_textures = {} # ruta original -> Texture de Panda3D cargada desde una variante
+
+def power_of_two_below(value):
+    return 1 << (max(1, int(value)).bit_length() - 1)
+
+# Lado máximo útil de una textura en una pantalla: la potencia de dos que cubre su lado mayor
+def texture_size_for_display(resolution):
+    return 1 << (max(1, int(max(resolution))) - 1).bit_length()
+
+def set_display_resolution(resolution):
+    global display_texture_size
+    display_texture_size = texture_size_for_display(resolution)
+
+# Lado máximo que deben tener las texturas ahora: el de la pantalla y el del preset de calidad
+def texture_size_limit():
+    limits = [display_texture_size, ConfigVariableInt('max-texture-dimension').getValue()]
+    limits = [limit for limit in limits if limit and limit > 0]
+    return min(limits) if limits else None
+
+# Prefijo de las variantes de una textura (nombre y hash de su contenido)
+def optimized_texture_prefix(path):
+    full_path = os.path.join(BASE_DIR, path)
+    stem = os.path.splitext(os.path.basename(full_path))[0]
+    return f'{stem}-{content_hash(full_path)}-'
+
+# Variantes en caché de una textura: lista ordenada de (lado mayor, ruta del .txo)
+def optimized_texture_variants(path):
+    prefix = optimized_texture_prefix(path)
+    return sorted((int(variant.stem[len(prefix):]), str(variant))
+                  for variant in Path(CACHE_DIR).glob(f'{prefix}*.txo'))
+
+# La mayor variante que no supera 'limit' (la menor si todas lo superan), o None si la
+# textura no tiene variantes
+def find_optimized_texture(path, limit=None):
+    variants = optimized_texture_variants(path)
+    if not variants:
+        return None
+    limit = limit or texture_size_limit()
+    fitting = [variant for size, variant in variants if not limit or size <= limit]
+    return fitting[-1] if fitting else variants[0][1]
+
+# Cambia las texturas optimizadas ya cargadas a la variante del límite actual (tras cambiar
+# el preset de calidad); quien las usa ve el cambio porque se recarga la misma Texture
+def refresh_optimized_textures():
+    for path, texture in optimized_textures.items():
+        optimized = find_optimized_texture(path)
+        if optimized and Filename.fromOsSpecific(optimized) != texture.getFullpath():
+            sampler = texture.getDefaultSampler() # El .txo trae el suyo; se conserva el de la carga
+            texture.setFullpath(Filename.fromOsSpecific(optimized))
+            texture.reload()
+            texture.setDefaultSampler(sampler)
+
+# Genera las variantes optimizadas de una textura, una por cada lado máximo de 'sizes' (las
+# que superan el tamaño de la imagen coinciden con ella y no se repiten).
+# Devuelve una entrada del informe de memoria: tamaño y bytes del original (sin comprimir
+# ni mipmaps, tal como se subía antes) y de cada variante.
+def build_optimized_texture(path, sizes):
+    from panda3d.core import PNMImage, Texture
+
+    full_path = os.path.join(BASE_DIR, path)
+    original = Texture()
+    original.read(Filename.fromOsSpecific(full_path))
+    source = PNMImage(Filename.fromOsSpecific(full_path))
+    natural = max(power_of_two_below(source.getXSize()), power_of_two_below(source.getYSize()))
+    report = {
+        'path': path,
+        'file_bytes': os.path.getsize(full_path),
+        'original': {'size': [original.getXSize(), original.getYSize()], 'bytes': original.getRamImageSize()},
+        'variants': [],
+    }
+
+    prefix = optimized_texture_prefix(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    for old in Path(CACHE_DIR).glob(f'{stem}-*.txo'): # Variantes de versiones anteriores
+        if not old.name.startswith(prefix):
+            old.unlink()
+
+    for size in sorted({min(size, natural) for size in sizes}):
+        txo_path = os.path.join(CACHE_DIR, f'{prefix}{size}.txo')
+        # Se reduce el lado mayor a 'size' conservando la proporción
+        width = max(1, power_of_two_below(source.getXSize()) * size // natural)
+        height = max(1, power_of_two_below(source.getYSize()) * size // natural)
+        if os.path.exists(txo_path):
+            texture = Texture()
+            texture.read(Filename.fromOsSpecific(txo_path))
+        else:
+            image = PNMImage(width, height, source.getNumChannels(), source.getMaxval())
+            image.gaussianFilterFrom(1.0, source)
+            texture = Texture(os.path.basename(path))
+            texture.load(image)
+            texture.generateRamMipmapImages()
+            texture.compressRamImage(Texture.CM_dxt5 if source.hasAlpha() else Texture.CM_dxt1)
+            texture.setMagfilter(SamplerState.FT_nearest)
+            texture.setMinfilter(SamplerState.FT_linear_mipmap_linear)
+            texture.write(Filename.fromOsSpecific(txo_path))
+        compression = texture.getRamImageCompression()
+        report['variants'].append({
+            'size': [width, height],
+            'bytes': sum(texture.getRamMipmapImageSize(level) for level in range(texture.getNumRamMipmapImages())),
+            'compression': {Texture.CM_dxt1: 'dxt1', Texture.CM_dxt5: 'dxt5'}.get(compression, 'none'),
+            'mipmaps': texture.getNumRamMipmapImages(),
+        })
+    return report
+
+# ======================================================================================
+# --- Atlas de texturas ---
+# ======================================================================================
+ATLAS_PADDING = 4 # Píxeles de borde repetido alrededor de cada celda (evita que se mezclen al filtrar)
+
+# Sprites pequeños del juego (objetivos, impactos y botones del menú): un solo atlas con
+# borde más ancho, porque sus mipmaps se reducen mucho
+SPRITE_ATLAS = 'atlas_sprites'
+SPRITE_CELLS = [(f'assets/textures/{name}', (1, 1)) for name in ('mario.png', 'hit_effect.png', 'iniciarbtn.jpg', 'salirbtn.jpg')]
+SPRITE_PADDING = 16
+
+# Ruta del atlas en caché para unas celdas (el nombre incluye el hash de su contenido)
+def cached_atlas_path(name, cells):
+    digest = hashlib.sha1()
+    for path, tiles in cells:
+        digest.update(f'{content_hash(os.path.join(BASE_DIR, path))}{tiles}'.encode())
+    return os.path.join(CACHE_DIR, f'{name}-{digest.hexdigest()[:16]}.png')
+
+# Une varias texturas en una sola imagen, una celda debajo de otra. 'cells' es una lista de
+# (ruta, (repeticiones_x, repeticiones_y)): una textura que se repetía en la superficie se
+# guarda ya repetida en su celda (con el tamaño de la imagen original), porque dentro de un
+# atlas no se puede usar el modo de repetición de la textura.
+# Devuelve (ruta del .png, {ruta: (u0, v0, u1, v1)}, True si hubo que generarlo).
+def build_texture_atlas(name, cells, padding=ATLAS_PADDING):
+    png_path = cached_atlas_path(name, cells)
+    rects_path = png_path[:-len('.png')] + '.json'
+    if os.path.exists(png_path) and os.path.exists(rects_path):
+        with open(rects_path) as file:
+            return png_path, {path: tuple(rect) for path, rect in json.load(file).items()}, False
+
+    from PIL import Image
+
+    sources = [(path, tiles, Image.open(os.path.join(BASE_DIR, path))) for path, tiles in cells]
+    # Con alfa si alguna de las texturas lo tiene
+    mode = 'RGBA' if any('A' in image.getbands() or 'transparency' in image.info for _, _, image in sources) else 'RGB'
+    images = []
+    for path, (tiles_x, tiles_y), image in sources:
+        image = image.convert(mode)
+        if (tiles_x, tiles_y) != (1, 1):
+            tile = image.resize((max(1, image.width // tiles_x), max(1, image.height // tiles_y)), Image.LANCZOS)
+            image = Image.new(mode, (tile.width * tiles_x, tile.height * tiles_y))
+            for x in range(tiles_x):
+                for y in range(tiles_y):
+                    image.paste(tile, (x * tile.width, y * tile.height))
+        images.append((path, image))
+
+    width = max(image.width for _, image in images) + 2 * padding
+    height = sum(image.height + 2 * padding for _, image in images)
+    atlas = Image.new(mode, (width, height))
+    rects = {}
+    top = 0
+    for path, image in images:
+        # Borde: la imagen estirada debajo, la original encima
+        atlas.paste(image.resize((image.width + 2 * padding, image.height + 2 * padding)), (0, top))
+        atlas.paste(image, (padding, top + padding))
+        # En UV la 'v' crece hacia arriba; medio texel hacia dentro para no tocar el borde
+        x0, y0 = padding + 0.5, top + padding + 0.5
+        x1, y1 = padding + image.width - 0.5, top + padding + image.height - 0.5
+        rects[path] = (x0 / width, 1 - y1 / height, x1 / width, 1 - y0 / height)
+        top += image.height + 2 * padding
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    for old in Path(CACHE_DIR).glob(f'{name}-*.*'): # Se borran las versiones anteriores del atlas
+        old.unlink()
+    atlas.save(png_path)
+    with open(rects_path, 'w') as file:
+        json.dump(rects, file, indent=1)
+    return png_path, rects, True
+
+# Genera (o toma de la caché) un atlas y lo carga; devuelve (Texture, rects, True si hubo que
+# generarlo)
+def load_texture_atlas(name, cells, padding=ATLAS_PADDING):
+    png_path, rects, built = build_texture_atlas(name, cells, padding)
+    texture = load_texture_file(os.path.relpath(png_path, BASE_DIR))
+    texture._texture.setWrapU(SamplerState.WM_clamp)
+    texture._texture.setWrapV(SamplerState.WM_clamp)
+    return texture, rects, built
+
+# ======================================================================================
+# --- Carga en paralelo ---
+# ======================================================================================
+# Ejecuta las tareas de carga en un pool de hilos. El hilo principal llama a poll() cada
+# frame para recoger los resultados terminados y aplicarlos a la escena, o wait() si
+# necesita un recurso concreto ya mismo.
+class AssetLoader:
+    def __init__(self, max_workers=4):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='assets')
+        self.pending = {}   # nombre -> Future
+        self.total = 0
+        self.done = 0
+        self.durations = {} # nombre -> segundos de carga
+        self.converted = [] # modelos que hubo que convertir (caché fría)
+
+    def submit(self, name, function, *args):
+        if name in self.pending: # Ya se está cargando
+            return
+        def timed():
+            start = time.perf_counter()
+            result = function(*args)
+            return result, time.perf_counter() - start
+        self.pending[name] = self.executor.submit(timed)
+        self.total += 1
+
+    def submit_model(self, name, obj_path):
+        def load():
+            model, converted = load_cached_model(obj_path)
+            if converted:
+                self.converted.append(obj_path)
+            return model
+        self.submit(name, load)
+
+    def submit_texture(self, name, path):
+        self.submit(name, load_texture_file, path)
+
+    # Genera (o toma de la caché) un atlas y lo carga; el resultado es (Texture, rects)
+    def submit_atlas(self, name, cells):
+        def load():
+            texture, rects, built = load_texture_atlas(name, cells)
+            if built:
+                self.converted.append(f'{name}.png')
+            return texture, rects
+        self.submit(name, load)
+
+    def is_pending(self, name):
+        return name in self.pending
+
+    def _collect(self, name):
+        result, duration = self.pending.pop(name).result()
+        self.durations[name] = duration
+        self.done += 1
+        return result
+
+    # Espera a que termine la carga de 'name' y devuelve el recurso
+    def wait(self, name):
+        return self._collect(name)
+
+    @property
+    def progress(self):
+        return self.done / self.total if self.total else 1
+
+    @property
+    def finished(self):
+        return not self.pending
+
+    # Devuelve [(nombre, resultado)] de las tareas terminadas desde la última llamada
+    def poll(self):
+        ready = []
+        for name, future in list(self.pending.items()):
+            if future.done():
+                ready.append((name, self._collect(name)))
+        return ready
+
+# ======================================================================================
+# --- Informe de arranque ---
+# ======================================================================================
+# Mide el tiempo desde que arranca el proceso hasta el primer frame interactivo.
+class StartupReport:
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self.marks = {}
+        self.details = {} # Datos adicionales del arranque (por ejemplo, la geometría de la cabina)
+
+    def mark(self, name):
+        self.marks[name] = time.perf_counter() - self.start
+
+    # Guarda el informe (una línea JSON) y lo imprime
+    def write(self, loader_stats, path=STARTUP_REPORT):
+        report = {
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'cold_start': bool(loader_stats.converted),
+            'marks': {name: round(value, 4) for name, value in self.marks.items()},
+            'assets': {name: round(value, 4) for name, value in sorted(loader_stats.durations.items())},
+            'converted_models': loader_stats.converted,
+            **self.details,
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a') as file:
+            file.write(json.dumps(report) + '\n')
+        kind = 'en frío' if report['cold_start'] else 'en caliente'
+        print(f"Arranque {kind}: {self.marks.get('interactive', 0):.2f}s hasta el primer frame interactivo")
+        for name, value in report['marks'].items():
+            print(f"  {name}: {value:.3f}s")
+        for name, value in self.details.items():
+            print(f"  {name}: {value}")
+        return report
+
+
+if __name__ == '__main__':
+    # Paso de build: convierte todos los .obj de assets/models a la caché binaria, genera los
+    # atlas y las variantes optimizadas de las texturas y decodifica los efectos de sonido
+    import argparse
+    from panda3d.core import loadPrcFileData
+    from direct.showbase.ShowBase import ShowBase
+
+    from calidad import QUALITY_PRESETS
+    from escenario import RANGE_ATLAS, range_atlas_cells
+    from sonido import SFX
+
+    parser = argparse.ArgumentParser(description='Paso de build de los recursos')
+    parser.add_argument('--display', default='x'.join(map(str, DEFAULT_DISPLAY)),
+                        help='resolución de la pantalla para la que se optimizan las texturas (ANCHOxALTO)')
+    args = parser.parse_args()
+
+    loadPrcFileData('', 'window-type none')
+    ShowBase()
+    for obj_file in sorted(Path(MODELS_DIR).glob('*.obj')):
+        start = time.perf_counter()
+        bam_path, converted = build_model_cache(os.path.relpath(obj_file, BASE_DIR))
+        status = 'convertido' if converted else 'en caché'
+        print(f"{obj_file.name}: {status} -> {os.path.relpath(bam_path, BASE_DIR)} ({time.perf_counter() - start:.2f}s)")
+
+    atlases = [(RANGE_ATLAS, range_atlas_cells(), ATLAS_PADDING), (SPRITE_ATLAS, SPRITE_CELLS, SPRITE_PADDING)]
+    atlas_paths = []
+    for name, cells, padding in atlases:
+        start = time.perf_counter()
+        png_path, _, built = build_texture_atlas(name, cells, padding)
+        atlas_paths.append(os.path.relpath(png_path, BASE_DIR))
+        status = 'generado' if built else 'en caché'
+        print(f"{name}: {status} -> {atlas_paths[-1]} ({time.perf_counter() - start:.2f}s)")
+
+    # Variantes para la pantalla y para los límites de textura de los presets por debajo de
+    # ella. Las texturas que van en un atlas solo se usan dentro de él.
+    display_size = texture_size_for_display(int(side) for side in args.display.split('x'))
+    sizes = {display_size} | {preset['texture_size'] for preset in QUALITY_PRESETS if 0 < preset['texture_size'] < display_size}
+    in_atlas = {path for _, cells, _ in atlases for path, _ in cells}
+    textures = [os.path.relpath(path, BASE_DIR) for path in sorted(Path(TEXTURES_DIR).iterdir())]
+    report = []
+    for path in [path for path in textures if path not in in_atlas] + atlas_paths:
+        entry = build_optimized_texture(path, sizes)
+        report.append(entry)
+        original, best = entry['original'], entry['variants'][-1]
+        others = ', '.join('x'.join(map(str, variant['size'])) for variant in entry['variants'][:-1])
+        print(f"{os.path.basename(path)}: {'x'.join(map(str, original['size']))} {original['bytes'] / 1024:.0f} KiB -> "
+              f"{'x'.join(map(str, best['size']))} {best['compression']} con {best['mipmaps']} mipmaps "
+              f"{best['bytes'] / 1024:.0f} KiB" + (f" (y {others})" if others else ''))
+
+    original_bytes = sum(entry['original']['bytes'] for entry in report)
+    optimized_bytes = sum(entry['variants'][-1]['bytes'] for entry in report)
+    print(f"Memoria de texturas para {args.display}: {original_bytes / 2**20:.1f} MiB -> {optimized_bytes / 2**20:.1f} MiB")
+    with open(TEXTURE_REPORT, 'w') as file:
+        json.dump({'display': args.display, 'sizes': sorted(sizes), 'textures': report}, file, indent=1)
+
+    # Efectos de sonido (la música se sigue leyendo del MP3 en streaming)
+    for sound_path in sorted({path for path, _, _ in SFX.values()}):
+        start = time.perf_counter()
+        wav_path, built = build_pcm_cache(sound_path)
+        status = 'decodificado' if built else 'en caché'
+        print(f"{os.path.basename(sound_path)}: {status} -> {os.path.relpath(wav_path, BASE_DIR)} "
+              f"({os.path.getsize(wav_path) / 1024:.0f} KiB, {time.perf_counter() - start:.2f}s)")
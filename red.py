@@ -0,0 +1,828 @@
+# Modo versus en red: dos jugadores disparan a la misma serie de objetivos (no depende de Ursina)
+# Un anfitrión autoritativo (VersusHost) simula cada partida, genera los objetivos y
+# resuelve todos los disparos; los clientes (VersusState) dibujan lo que reciben y predicen
+# sus propios disparos. Todo va por UDP con asyncio:
+#   - El anfitrión manda a cada cliente TICK_RATE instantáneas por segundo con lo que cambió
+#     desde la última que ese cliente confirmó (delta). Como los objetivos siguen
+#     trayectorias en forma cerrada (trayectorias.py), cada uno viaja una sola vez, al
+#     aparecer, y después solo su retirada; las posiciones las calcula el cliente. Si se
+#     pierde un paquete, lo que no se confirmó vuelve a ir en el siguiente.
+#   - Cada disparo lleva el instante del reloj del anfitrión que el cliente tenía en
+#     pantalla, y el anfitrión lo resuelve contra las posiciones de ese instante (evalúa
+#     las trayectorias hacia atrás, como mucho MAX_REWIND segundos).
+#   - El cliente quita en el acto los objetivos que alcanza y suma el acierto; en cuanto el
+#     anfitrión confirma ese disparo, manda lo que diga el anfitrión. Los disparos sin
+#     confirmar se repiten en cada paquete del cliente hasta que el anfitrión los aplica.
+# Un solo proceso anfitrión sirve muchas partidas a la vez (una por sala).
+import asyncio
+import itertools
+import math
+import os
+import socket
+import struct
+import subprocess
+import sys
+from collections import deque
+from time import perf_counter
+
+import numpy as np
+
+from enjambre import EXIT_X, SPAWN_TIME
+from escenario import range_occluders
+from impactos import HitTester, Occluders, TargetSnapshot, spread_directions
+from simulacion import LEVEL_CONFIG, POINTS_PER_HIT, VERSUS_LEVEL, GameState, SimTarget
+from trayectorias import PATHS, Trajectory
+
+PROTOCOL_VERSION = 1
+DEFAULT_PORT = 47800
+PLAYERS = 2          # Jugadores por partida
+TICK_RATE = 20       # Instantáneas por segundo que el anfitrión manda a cada cliente
+MAX_REWIND = 0.25    # Segundos que el anfitrión puede retroceder para resolver un disparo
+MAX_DISTANCE = 200   # Alcance de los disparos (como en juego.py)
+HOST_HISTORY = 32    # Instantáneas enviadas que el anfitrión recuerda por cliente (bases del delta)
+CLIENT_HISTORY = 64  # Instantáneas recibidas que recuerda el cliente
+PEER_TIMEOUT = 5     # Segundos sin noticias tras los que se da por perdido al otro lado
+END_LINGER = 2       # Segundos que el anfitrión sigue mandando el resultado de una partida terminada
+HELLO_INTERVAL = 0.5 # Segundos entre saludos mientras el anfitrión no responde
+MAX_CATCH_UP = 0.5   # Un cliente más atrasado que esto salta al reloj del anfitrión
+UDP_OVERHEAD = 28    # Bytes de las cabeceras IPv4 y UDP de cada datagrama
+MAX_SHOTS_PER_PACKET = 24 # Disparos sin confirmar que caben en un paquete (los más antiguos primero)
+
+# ======================================================================================
+# --- Formato de los mensajes ---
+# ======================================================================================
+# Cada datagrama empieza por su tipo. Enteros y reales little-endian sin relleno.
+#   HELLO: versión del protocolo y sala (cliente -> anfitrión, se repite hasta el WELCOME)
+#   WELCOME: índice del jugador y semilla de la partida (para los perdigones)
+#   SNAPSHOT: flags (fase, marcadores incluidos, rival retirado), tick, tick base del delta
+#     (NO_BASELINE si es completa), reloj del anfitrión, último disparo procesado del
+#     cliente, segundos restantes y número de apariciones y retiradas. Después, si van,
+#     PLAYERS marcadores; luego las apariciones y las retiradas.
+#   SPAWN: id, forma (índice en PATHS), tamaño, instante de aparición, frecuencia, fase y
+#     los 18 coeficientes de la trayectoria
+#   REMOVAL: id y causa (índice del jugador que lo alcanzó o ESCAPED)
+#   SCORE: perdigones disparados, aciertos, objetivos alcanzados y puntos
+#   ACK: último tick recibido (cliente -> anfitrión, uno por instantánea)
+#   SHOT: tick recibido y número de disparos; después, de cada disparo sin confirmar (del
+#     más antiguo al más reciente), su número, instante y origen, dirección y 'up' de la
+#     cámara (cliente -> anfitrión; hace también de ACK mientras quede alguno)
+#   BYE: abandono (en los dos sentidos; el anfitrión también rechaza así un HELLO)
+HELLO, WELCOME, SNAPSHOT, ACK, SHOT, BYE = range(6)
+HELLO_MESSAGE = struct.Struct('<BB16s')
+WELCOME_MESSAGE = struct.Struct('<BBI')
+SNAPSHOT_HEADER = struct.Struct('<BBIIdIfHH')
+SPAWN_RECORD = struct.Struct('<IBfdff18f')
+REMOVAL_RECORD = struct.Struct('<IB')
+SCORE_RECORD = struct.Struct('<HHHI')
+ACK_MESSAGE = struct.Struct('<BI')
+SHOT_HEADER = struct.Struct('<BIB')
+SHOT_RECORD = struct.Struct('<Id9f')
+BYE_MESSAGE = struct.Struct('<B')
+
+NO_BASELINE = 0xFFFFFFFF
+ESCAPED = 255 # Causa de retirada: se salió de la pantalla
+WAITING, PLAYING, ENDED = range(3) # Fases de una partida (bits bajos de los flags)
+PHASE_MASK = 3
+HAS_SCORES = 4 # Flag: la instantánea trae los marcadores
+RIVAL_LEFT = 8 # Flag: un jugador abandonó la partida
+
+SHOTS, HITS, TARGETS_HIT, POINTS = range(4) # Campos de un marcador
+
+# Direcciones de los perdigones de un disparo versus: la semilla es la de la partida, el
+# jugador y el número de disparo, así que cliente y anfitrión generan el mismo patrón
+def pellet_directions(weapon, forward, up, seed, player, seq):
+    pellets = weapon.get('pellets', 1)
+    if pellets == 1:
+        return np.asarray(forward, dtype=np.float64)[None]
+    rng = np.random.default_rng([seed, player, seq])
+    return spread_directions(forward, up, pellets, weapon.get('spread', 0), rng)
+
+def pack_spawn(target):
+    path = target.path
+    return SPAWN_RECORD.pack(target.id, PATHS.index(path.kind), target.scale, target.spawn_time, path.frequency,
+                             path.phase, *path.coefficients.ravel().tolist())
+
+def room_name(room):
+    return room.encode()[:16]
+
+# ======================================================================================
+# --- Anfitrión ---
+# ======================================================================================
+# Un cliente conectado a una partida. 'sent' guarda, por tick, los ids vivos y los
+# marcadores de cada instantánea enviada: la base contra la que se calcula el delta en
+# cuanto el cliente la confirma.
+class Peer:
+    __slots__ = ('address', 'player', 'ack', 'last_seq', 'last_shot_time', 'last_seen', 'sent',
+                 'bytes_sent', 'packets_sent')
+
+    def __init__(self, address, player, now):
+        self.address = address
+        self.player = player
+        self.ack = None          # Último tick confirmado (con su entrada aún en 'sent')
+        self.last_seq = 0        # Último disparo procesado
+        self.last_shot_time = -math.inf
+        self.last_seen = now
+        self.sent = {}
+        self.bytes_sent = 0
+        self.packets_sent = 0
+
+    def acknowledge(self, tick):
+        if tick in self.sent and (self.ack is None or tick > self.ack):
+            self.ack = tick
+
+# Una partida: su GameState es la única fuente de verdad. Cada objetivo vivo tiene ya
+# empaquetado su registro de aparición y cada retirada reciente su causa, así que una
+# instantánea es pegar bytes.
+class Match:
+    def __init__(self, room, hit_tester, now, duration=None, seed=None, level_config=LEVEL_CONFIG):
+        self.room = room
+        self.hit_tester = hit_tester
+        self.state = GameState(seed=seed, level_config=level_config)
+        self.state.current_level = VERSUS_LEVEL
+        self.state.swarm.placing = False # Las posiciones solo hacen falta al resolver disparos (ver _rewound)
+        self.duration = duration or self.state.config.get('duration', 60)
+        self.peers = []
+        self.phase = WAITING
+        self.rival_left = False
+        self.tick = 0
+        self.last_update = now
+        self.ended_at = None
+        self.spawns = {}   # id -> registro SPAWN de cada objetivo vivo
+        self.removals = {} # id -> (tick, causa) de las retiradas de los últimos HOST_HISTORY ticks
+        self.scores = [[0, 0, 0, 0] for _ in range(PLAYERS)]
+
+    @property
+    def full(self):
+        return len(self.peers) == PLAYERS
+
+    def join(self, address, now):
+        taken = {peer.player for peer in self.peers}
+        peer = Peer(address, min(set(range(PLAYERS)) - taken), now)
+        self.peers.append(peer)
+        if self.full:
+            self.phase = PLAYING
+            self.last_update = now
+            self.state.start_level(VERSUS_LEVEL)
+            self._collect()
+        return peer
+
+    # Un jugador que se va termina la partida en curso
+    def leave(self, peer):
+        self.peers.remove(peer)
+        if self.phase == PLAYING:
+            self.rival_left = True
+            self._end(peer.last_seen)
+
+    def _end(self, now):
+        self.phase = ENDED
+        self.ended_at = now
+
+    # La partida ya se puede olvidar
+    def finished(self, now):
+        return not self.peers or (self.phase == ENDED and now - self.ended_at > END_LINGER)
+
+    # Anota las apariciones y retiradas publicadas por la simulación ('cause': quién disparó)
+    def _collect(self, cause=ESCAPED):
+        for kind, target in self.state.drain_events():
+            if kind == 'spawn':
+                self.spawns[target.id] = pack_spawn(target)
+            elif kind in ('hit', 'escape'):
+                del self.spawns[target.id]
+                self.removals[target.id] = (self.tick, cause if kind == 'hit' else ESCAPED)
+
+    # Avanza la simulación hasta 'now' (reloj del anfitrión) y pasa al siguiente tick
+    def advance(self, now):
+        if self.phase == PLAYING:
+            self.state.update(now - self.last_update)
+            self._collect()
+            if self.state.time >= self.duration:
+                self._end(now)
+        self.last_update = now
+        self.tick += 1
+        if self.tick % HOST_HISTORY == 0:
+            oldest = self.tick - HOST_HISTORY
+            self.removals = {target_id: removal for target_id, removal in self.removals.items() if removal[0] > oldest}
+
+    # Resuelve un disparo del jugador 'peer' hecho en el instante 'at' de su pantalla. Se
+    # aplican en orden: uno repetido (ya aplicado) o que se salta alguno (se perdió el
+    # paquete de uno anterior; el cliente los repite todos) se ignora. Los que están fuera
+    # de cadencia o de la partida se descartan, pero cuentan como aplicados para que el
+    # cliente deje de predecirlos.
+    def shoot(self, peer, seq, at, origin, forward, up):
+        if seq != peer.last_seq + 1:
+            return
+        peer.last_seq = seq
+        state = self.state
+        if self.phase != PLAYING:
+            return
+        now = state.time + state.accumulator
+        at = min(max(at, now - MAX_REWIND), now)
+        if at - peer.last_shot_time < state.fire_interval - 1e-9:
+            return
+        peer.last_shot_time = at
+        directions = pellet_directions(state.weapon, forward, up, state.seed, peer.player, seq)
+        target_ids, _ = self.hit_tester.cast_many(self._rewound(at), origin, directions, up, MAX_DISTANCE)
+        hit = state.hit_pellets(target_ids)
+        self._collect(peer.player)
+        pellet_hits = sum(int(np.count_nonzero(target_ids == target.id)) for target in hit)
+        score = self.scores[peer.player]
+        score[SHOTS] += len(directions)
+        score[HITS] += pellet_hits
+        score[TARGETS_HIT] += len(hit)
+        score[POINTS] += POINTS_PER_HIT * pellet_hits
+
+    # Objetivos vivos colocados en el instante 'at' (sin los que aún no habían aparecido)
+    def _rewound(self, at):
+        swarm = self.state.swarm
+        snapshot = TargetSnapshot(at, at, swarm)
+        snapshot.centers = swarm.positions_at(at)
+        born = swarm.timing[:swarm.count, SPAWN_TIME] <= at
+        if not born.all():
+            snapshot.ids, snapshot.centers, snapshot.radii = snapshot.ids[born], snapshot.centers[born], snapshot.radii[born]
+            snapshot.count = len(snapshot.ids)
+        return snapshot
+
+    # Manda a cada cliente su instantánea del tick actual; devuelve los bytes enviados
+    def send_snapshots(self, send):
+        live = frozenset(self.spawns)
+        scores = tuple(map(tuple, self.scores))
+        score_bytes = b''.join(SCORE_RECORD.pack(*score) for score in scores)
+        flags = self.phase | (RIVAL_LEFT if self.rival_left else 0)
+        clock = self.state.time + self.state.accumulator
+        remaining = max(self.duration - clock, 0) if self.phase != WAITING else self.duration
+        total = 0
+        for peer in self.peers:
+            data = self._snapshot(peer, live, scores, score_bytes, flags, clock, remaining)
+            peer.bytes_sent += len(data)
+            peer.packets_sent += 1
+            total += len(data)
+            send(data, peer.address)
+        return total
+
+    def _snapshot(self, peer, live, scores, score_bytes, flags, clock, remaining):
+        base = peer.sent.get(peer.ack) if peer.ack is not None else None
+        if base is None: # Sin base confirmada: instantánea completa
+            baseline, added, removed, with_scores = NO_BASELINE, live, (), True
+        else:
+            base_ids, base_scores = base
+            baseline, added, removed, with_scores = peer.ack, live - base_ids, base_ids - live, scores != base_scores
+        parts = [SNAPSHOT_HEADER.pack(SNAPSHOT, flags | (HAS_SCORES if with_scores else 0), self.tick, baseline,
+                                      clock, peer.last_seq, remaining, len(added), len(removed))]
+        if with_scores:
+            parts.append(score_bytes)
+        parts.extend(self.spawns[target_id] for target_id in added)
+        parts.extend(REMOVAL_RECORD.pack(target_id, self.removals.get(target_id, (0, ESCAPED))[1])
+                     for target_id in removed)
+        peer.sent[self.tick] = (live, scores)
+        peer.sent.pop(self.tick - HOST_HISTORY, None)
+        return b''.join(parts)
+
+# Anfitrión: recibe los mensajes de todos los clientes en un solo socket y, TICK_RATE
+# veces por segundo, avanza todas las partidas y manda sus instantáneas. Mide el coste
+# de cada tick y lo que se envía, por cliente.
+class VersusHost(asyncio.DatagramProtocol):
+    def __init__(self, duration=None, hit_tester=None, level_config=LEVEL_CONFIG):
+        self.duration = duration
+        self.hit_tester = hit_tester or HitTester(Occluders(range_occluders()))
+        self.level_config = level_config
+        self.transport = None
+        self.matches = {} # sala -> Match
+        self.peers = {}   # dirección -> (Match, Peer)
+        self.ticks = 0
+        self.tick_seconds = 0.0 # Tiempo de CPU de todos los ticks
+        self.client_ticks = 0   # Suma de clientes servidos en cada tick
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, address):
+        self.bytes_received += len(data)
+        now = perf_counter()
+        try:
+            kind = data[0]
+            if kind == HELLO:
+                self._hello(data, address, now)
+                return
+            entry = self.peers.get(address)
+            if entry is None:
+                return
+            match, peer = entry
+            peer.last_seen = now
+            if kind == ACK:
+                peer.acknowledge(ACK_MESSAGE.unpack(data)[1])
+            elif kind == SHOT:
+                _, tick, count = SHOT_HEADER.unpack_from(data)
+                peer.acknowledge(tick)
+                for index in range(count):
+                    seq, at, *vectors = SHOT_RECORD.unpack_from(data, SHOT_HEADER.size + index * SHOT_RECORD.size)
+                    match.shoot(peer, seq, at, vectors[0:3], vectors[3:6], vectors[6:9])
+            elif kind == BYE:
+                self._leave(address)
+        except (IndexError, struct.error):
+            pass # Datagrama vacío, truncado o ajeno: se ignora
+
+    def _hello(self, data, address, now):
+        _, version, room = HELLO_MESSAGE.unpack(data)
+        if address not in self.peers:
+            match = self.matches.get(room)
+            if version != PROTOCOL_VERSION or (match and (match.full or match.phase != WAITING)):
+                self.transport.sendto(BYE_MESSAGE.pack(BYE), address)
+                return
+            if match is None:
+                match = self.matches[room] = Match(room, self.hit_tester, now, self.duration,
+                                                   level_config=self.level_config)
+            self.peers[address] = match, match.join(address, now)
+        match, peer = self.peers[address]
+        self.transport.sendto(WELCOME_MESSAGE.pack(WELCOME, peer.player, match.state.seed), address)
+
+    def _leave(self, address):
+        match, peer = self.peers.pop(address)
+        match.leave(peer)
+
+    # Avanza todas las partidas y manda sus instantáneas
+    def tick(self, now):
+        started = perf_counter()
+        send = self.transport.sendto
+        clients = 0
+        for room, match in list(self.matches.items()):
+            for peer in [peer for peer in match.peers if now - peer.last_seen > PEER_TIMEOUT]:
+                self._leave(peer.address)
+            if match.finished(now):
+                for peer in match.peers:
+                    del self.peers[peer.address]
+                del self.matches[room]
+                continue
+            match.advance(now)
+            self.bytes_sent += match.send_snapshots(send)
+            clients += len(match.peers)
+        self.ticks += 1
+        self.tick_seconds += perf_counter() - started
+        self.client_ticks += clients
+
+    # Bucle de ticks a TICK_RATE (con horario absoluto: un tick que llega tarde no retrasa los demás)
+    async def run(self):
+        interval = 1 / TICK_RATE
+        next_tick = perf_counter()
+        while True:
+            next_tick += interval
+            await asyncio.sleep(max(next_tick - perf_counter(), 0))
+            self.tick(perf_counter())
+
+    # Microsegundos de tick por cliente servido (media desde el arranque)
+    @property
+    def tick_cost(self):
+        return self.tick_seconds / self.client_ticks * 1e6 if self.client_ticks else 0.0
+
+async def serve(host='0.0.0.0', port=DEFAULT_PORT, **options):
+    loop = asyncio.get_running_loop()
+    versus_host = VersusHost(**options)
+    await loop.create_datagram_endpoint(lambda: versus_host, local_addr=(host, port))
+    return versus_host
+
+# ======================================================================================
+# --- Cliente ---
+# ======================================================================================
+# GameState de un jugador en una partida versus. No genera objetivos: los recibe del
+# anfitrión y los coloca con su trayectoria en el reloj del anfitrión (estimado con el
+# desfase más favorable de las últimas instantáneas, el del paquete que menos tardó).
+# Los disparos se resuelven en local como en un nivel normal (predicción) y se mandan al
+# anfitrión; hasta que los confirme, sus objetivos no se muestran aunque sigan vivos allí
+# y sus aciertos se suman a los marcadores recibidos. Publica los mismos eventos que
+# GameState, así que el front end dibuja igual una partida local o una en red.
+class VersusState(GameState):
+    def __init__(self, room='sala', level_config=LEVEL_CONFIG):
+        super().__init__(level_config=level_config)
+        self.current_level = VERSUS_LEVEL
+        self.room = room
+        self.transport = None
+        self.player = None       # Índice asignado por el anfitrión (None hasta el WELCOME)
+        self.match_seed = 0      # Semilla de la partida (perdigones)
+        self.rejected = False    # El anfitrión rechazó la conexión (sala llena o versión distinta)
+        self.lost = False        # El anfitrión dejó de responder
+        self.finished = False    # La partida terminó (o se abandonó)
+        self.phase = WAITING
+        self.rival_left = False
+        self.remaining = 0.0     # Segundos de partida restantes según el anfitrión
+        self.host_scores = ((0, 0, 0, 0),) * PLAYERS
+        self.snapshots = {}      # tick -> (ids vivos, marcadores) de las instantáneas recibidas
+        self.last_tick = None
+        self.last_received = None
+        self.known = {}          # id -> (Trajectory, tamaño, aparición, salida) de los objetivos recibidos
+        self.causes = {}         # id -> causa de retirada recibida
+        self.offsets = deque(maxlen=2 * TICK_RATE) # Reloj del anfitrión - reloj local, por instantánea
+        self.clock_offset = None
+        self.shot_seq = 0
+        # Disparos sin confirmar: (número, ids alcanzados, perdigones, perdigones acertados, registro SHOT)
+        self.pending = deque()
+        self.shown = set()       # Ids que ya se mostraron en el nivel (cuentan una sola vez en targets_spawned)
+        self.confirmed_predictions = 0 # Objetivos alcanzados en disparos ya confirmados, según la predicción
+        self.bytes_sent = self.bytes_received = 0
+
+    # --- Conexión ---
+    def send(self, data):
+        if self.transport is not None:
+            self.bytes_sent += len(data)
+            self.transport.sendto(data)
+
+    async def say_hello(self):
+        while self.player is None and not self.rejected:
+            self.send(HELLO_MESSAGE.pack(HELLO, PROTOCOL_VERSION, room_name(self.room)))
+            await asyncio.sleep(HELLO_INTERVAL)
+
+    def receive(self, data):
+        now = perf_counter()
+        self.bytes_received += len(data)
+        try:
+            kind = data[0]
+            if kind == SNAPSHOT:
+                self._apply_snapshot(data, now)
+            elif kind == WELCOME:
+                _, self.player, self.match_seed = WELCOME_MESSAGE.unpack(data)
+            elif kind == BYE:
+                self.rejected = self.player is None
+        except (IndexError, struct.error):
+            pass
+
+    # El anfitrión no manda nada desde hace PEER_TIMEOUT segundos: la partida se da por perdida
+    def check_connection(self, now):
+        if self.last_received is not None and now - self.last_received > PEER_TIMEOUT and not self.lost:
+            self.lost = True
+            self.phase = ENDED
+            self.end_level()
+
+    # Ya se puede empezar a jugar (la partida empezó y el nivel aún no)
+    @property
+    def ready(self):
+        return (self.phase == PLAYING and not self.active and not self.finished and self.player is not None
+                and self.clock_offset is not None)
+
+    def host_time(self, now=None):
+        return (perf_counter() if now is None else now) + self.clock_offset
+
+    # Marcador del mejor rival
+    @property
+    def rival_scores(self):
+        return max((score for player, score in enumerate(self.host_scores) if player != self.player),
+                   key=lambda score: score[POINTS])
+
+    # --- Instantáneas ---
+    def _apply_snapshot(self, data, received_at):
+        _, flags, tick, baseline, clock, acked_shot, remaining, spawns, removals = SNAPSHOT_HEADER.unpack_from(data)
+        if self.last_tick is not None and tick <= self.last_tick:
+            return # Llegó desordenada: ya hay una más reciente
+        if baseline == NO_BASELINE:
+            base_ids, scores = frozenset(), self.host_scores
+        elif baseline in self.snapshots:
+            base_ids, scores = self.snapshots[baseline]
+        else:
+            return # Sin su base no se puede reconstruir; el anfitrión mandará otra
+        offset = SNAPSHOT_HEADER.size
+        if flags & HAS_SCORES:
+            scores = tuple(SCORE_RECORD.unpack_from(data, offset + i * SCORE_RECORD.size) for i in range(PLAYERS))
+            offset += PLAYERS * SCORE_RECORD.size
+        added = []
+        for _ in range(spawns):
+            record = SPAWN_RECORD.unpack_from(data, offset)
+            offset += SPAWN_RECORD.size
+            added.append(self._learn(record))
+        removed = []
+        for _ in range(removals):
+            target_id, cause = REMOVAL_RECORD.unpack_from(data, offset)
+            offset += REMOVAL_RECORD.size
+            self.causes[target_id] = cause
+            self.known.pop(target_id, None)
+            removed.append(target_id)
+        ids = base_ids.union(added).difference(removed)
+        if baseline == NO_BASELINE: # Lo que no está vivo ya no hará falta
+            self.known = {target_id: info for target_id, info in self.known.items()
+                          if target_id in ids or target_id in self.registry}
+
+        self.snapshots[tick] = (ids, scores)
+        if len(self.snapshots) > CLIENT_HISTORY:
+            for old in [old for old in self.snapshots if old <= tick - CLIENT_HISTORY]:
+                del self.snapshots[old]
+        self.last_tick = tick
+        self.last_received = received_at
+
+        phase = flags & PHASE_MASK
+        if phase == PLAYING:
+            if self.phase != PLAYING:
+                self.offsets.clear() # El reloj del anfitrión empieza con la partida
+            self.offsets.append(clock - received_at)
+            self.clock_offset = max(self.offsets)
+        self.phase = phase
+        self.rival_left = bool(flags & RIVAL_LEFT)
+        self.host_scores = scores
+        self.remaining = remaining
+        while self.pending and self.pending[0][0] <= acked_shot:
+            self.confirmed_predictions += len(self.pending.popleft()[1])
+        if self.pending: # Los disparos que el anfitrión aún no aplicó se repiten (y confirman el tick)
+            self._send_shots()
+        else:
+            self.send(ACK_MESSAGE.pack(ACK, tick))
+        if self.active:
+            self._reconcile()
+            if phase == ENDED:
+                self.end_level()
+
+    def _learn(self, record):
+        target_id, kind, scale, spawn_time, frequency, phase = record[:6]
+        if target_id not in self.known:
+            path = Trajectory.from_coefficients(PATHS[kind], record[6:], frequency, phase)
+            self.known[target_id] = (path, scale, spawn_time, spawn_time + path.exit_time(EXIT_X))
+        return target_id
+
+    # Ajusta los objetivos mostrados y los marcadores a la última instantánea más los
+    # disparos propios sin confirmar
+    def _reconcile(self):
+        ids = self.snapshots[self.last_tick][0]
+        predicted = set()
+        for _, hit_ids, *_ in self.pending:
+            predicted |= hit_ids
+        registry = self.registry
+        for target_id in [target_id for target_id in registry.targets if target_id not in ids]:
+            if target_id in predicted:
+                continue
+            target = registry.get(target_id)
+            if self.causes.get(target_id, ESCAPED) == ESCAPED:
+                registry.remove(target_id)
+                self.events.append(('escape', target))
+            else: # Lo alcanzó alguien (también un disparo propio que no se predijo)
+                target.hit_position = self.swarm.center(target_id).tolist()
+                registry.remove(target_id)
+                self.events.append(('hit', target))
+        for target_id in ids:
+            if target_id in registry or target_id in predicted:
+                continue
+            path, scale, spawn_time, exit_time = self.known[target_id]
+            if exit_time <= self.time:
+                continue # Ya se salió en este reloj; su retirada aún no ha llegado
+            velocity = path.polynomial[0]
+            speed = float(np.linalg.norm(velocity))
+            target = SimTarget(target_id, None, (velocity / speed).tolist() if speed else [0, 0, 0], speed, scale,
+                               spawn_time, self.current_level, 0, path)
+            registry.add(target)
+            if target_id not in self.shown: # Uno que vuelve tras una predicción rechazada ya contaba
+                self.shown.add(target_id)
+                self.targets_spawned += 1
+            self.events.append(('spawn', target))
+        for target in registry.advance(self.time): # Coloca los recién añadidos
+            self.events.append(('escape', target))
+
+        shots, hits, targets_hit, points = self.host_scores[self.player]
+        for _, hit_ids, pellets, pellet_hits, _ in self.pending:
+            shots += pellets
+            hits += pellet_hits
+            targets_hit += len(hit_ids)
+            points += POINTS_PER_HIT * pellet_hits
+        self.shots_fired, self.hits, self.targets_hit, self.points = shots, hits, targets_hit, points
+
+    # --- Simulación ---
+    def start_level(self, level=VERSUS_LEVEL, seed=None):
+        super().start_level(level, seed)
+        self.pending.clear()
+        self.shown.clear()
+        self.time = self.host_time()
+        if self.last_tick is not None:
+            self._reconcile()
+
+    # Los objetivos los genera el anfitrión
+    def spawn_next_target(self):
+        pass
+
+    # Sigue al reloj del anfitrión en pasos fijos; si se queda muy atrás (por ejemplo, tras
+    # una pausa), salta
+    def update(self, frame_dt):
+        if not self.active:
+            return 0
+        target = self.host_time()
+        if target - self.time > MAX_CATCH_UP:
+            self.time = target - self.dt
+        steps = 0
+        while self.time + self.dt <= target:
+            self.step()
+            steps += 1
+        self.accumulator = max(target - self.time, 0.0)
+        return steps
+
+    # Paso fijo: mueve los objetivos y retira los que se salen (sin reponerlos)
+    def step(self):
+        self.time += self.dt
+        self.steps += 1
+        self.timers.tick()
+        for target in self.registry.advance(self.time):
+            self.events.append(('escape', target))
+
+    def pellet_directions(self, forward, up=(0, 1, 0)):
+        return pellet_directions(self.weapon, forward, up, self.match_seed, self.player, self.shot_seq)
+
+    # Predice el disparo como un nivel normal y lo manda al anfitrión (con los anteriores
+    # que aún no haya aplicado)
+    def resolve_shot(self, hit_tester, targets, origin, forward, up=(0, 1, 0), max_distance=MAX_DISTANCE):
+        self.shot_seq += 1
+        hits_before = self.hits
+        hit = super().resolve_shot(hit_tester, targets, origin, forward, up, max_distance)
+        record = SHOT_RECORD.pack(self.shot_seq, self.last_shot_time, *origin, *forward, *up)
+        self.pending.append((self.shot_seq, frozenset(target.id for target in hit), self.pellets,
+                             self.hits - hits_before, record))
+        self._send_shots()
+        return hit
+
+    def _send_shots(self):
+        tick = self.last_tick if self.last_tick is not None else NO_BASELINE
+        records = [shot[4] for shot in itertools.islice(self.pending, MAX_SHOTS_PER_PACKET)]
+        self.send(SHOT_HEADER.pack(SHOT, tick, len(records)) + b''.join(records))
+
+    # Termina con los marcadores del anfitrión; se supera ganando
+    def end_level(self):
+        if not self.active:
+            return
+        self.pending.clear()
+        self.shots_fired, self.hits, self.targets_hit, self.points = self.host_scores[self.player]
+        self.active = False
+        self.finished = True
+        self.passed = self.rival_left or self.points > self.rival_scores[POINTS]
+        self.events.append(('end', None))
+
+    def abort_level(self):
+        super().abort_level()
+        if not self.finished:
+            self.finished = True
+            self.send(BYE_MESSAGE.pack(BYE))
+
+class VersusClient(asyncio.DatagramProtocol):
+    def __init__(self, state):
+        self.state = state
+
+    def datagram_received(self, data, address):
+        self.state.receive(data)
+
+# Conecta 'state' con el anfitrión de 'host':'port' y empieza a saludarlo
+async def connect(state, host='127.0.0.1', port=DEFAULT_PORT, protocol=VersusClient):
+    loop = asyncio.get_running_loop()
+    state.transport, _ = await loop.create_datagram_endpoint(lambda: protocol(state), remote_addr=(host, port))
+    loop.create_task(state.say_hello())
+    return state
+
+# Arranca un anfitrión en otro proceso de este equipo, salvo que ya haya uno escuchando en
+# 'port'. Devuelve el proceso (None si ya había uno).
+def start_local_host(port=DEFAULT_PORT):
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        try:
+            probe.bind(('127.0.0.1', port))
+        except OSError:
+            return None
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), 'anfitrion', '--host', '127.0.0.1',
+                             '--port', str(port)])
+
+# Ejecuta lo pendiente del bucle de asyncio sin bloquear (una vez por frame desde un bucle
+# que no es el de asyncio, como el de Ursina)
+def pump(loop):
+    loop.call_soon(loop.stop)
+    loop.run_forever()
+
+# ======================================================================================
+# --- Prueba en local ---
+# ======================================================================================
+# Cliente con latencia y pérdidas simuladas en los dos sentidos (solo para las pruebas)
+class ImpairedClient(VersusClient):
+    latency = 0.0
+    loss = 0.0
+
+    def __init__(self, state):
+        super().__init__(state)
+        self.rng = np.random.default_rng()
+
+    def datagram_received(self, data, address):
+        if self.rng.random() >= self.loss:
+            asyncio.get_running_loop().call_later(self.latency, self.state.receive, data)
+
+class ImpairedTransport:
+    def __init__(self, transport, latency, loss):
+        self.transport = transport
+        self.latency = latency
+        self.loss = loss
+        self.rng = np.random.default_rng()
+
+    def sendto(self, data):
+        if self.rng.random() >= self.loss:
+            asyncio.get_running_loop().call_later(self.latency, self.transport.sendto, data)
+
+    def close(self):
+        self.transport.close()
+
+# Jugador simulado: dispara a un objetivo a la vista cada 0,25-0,6 s, apuntando al centro
+# de lo que tiene en pantalla
+class Bot:
+    VISIBLE_X = 19.5
+
+    def __init__(self, state, rng):
+        self.state = state
+        self.rng = rng
+        self.next_shot = 0.0
+        self.origin = np.array((0.0, 0.0, -15.0))
+        self.up = np.array((0.0, 1.0, 0.0))
+
+    def frame(self, hit_tester):
+        state = self.state
+        if state.ready:
+            state.start_level()
+        if not state.active:
+            return
+        state.update(0)
+        state.drain_events()
+        swarm = state.swarm
+        n = swarm.count
+        if state.time < self.next_shot or not n:
+            return
+        visible = np.flatnonzero(np.abs(swarm.centers[:n, 0]) + swarm.radii[:n] < self.VISIBLE_X)
+        if not len(visible):
+            return
+        slot = visible[self.rng.integers(len(visible))]
+        if state.fire():
+            state.resolve_shot(hit_tester, swarm, self.origin, swarm.centers[slot] - self.origin, self.up)
+        self.next_shot = state.time + self.rng.uniform(0.25, 0.6)
+
+# 'matches' partidas de bots contra un anfitrión en este mismo proceso, por loopback.
+# Devuelve el anfitrión y los estados de los clientes.
+async def benchmark(matches, seconds, latency=0.0, loss=0.0, seed=0):
+    loop = asyncio.get_running_loop()
+    versus_host = await serve('127.0.0.1', 0, duration=seconds)
+    port = versus_host.transport.get_extra_info('sockname')[1]
+    ticker = loop.create_task(versus_host.run())
+    ImpairedClient.latency, ImpairedClient.loss = latency, loss
+    bots = []
+    for index in range(matches * PLAYERS):
+        state = await connect(VersusState(room=f'sala{index // PLAYERS}'), '127.0.0.1', port, ImpairedClient)
+        state.transport = ImpairedTransport(state.transport, latency, loss)
+        bots.append(Bot(state, np.random.default_rng([seed, index])))
+    deadline = perf_counter() + seconds + 10
+    next_frame = perf_counter()
+    while perf_counter() < deadline and not all(bot.state.finished for bot in bots):
+        for bot in bots:
+            bot.frame(versus_host.hit_tester)
+        next_frame += 1 / 60
+        await asyncio.sleep(max(next_frame - perf_counter(), 0))
+    ticker.cancel()
+    for bot in bots:
+        bot.state.transport.close()
+    versus_host.transport.close()
+    return versus_host, [bot.state for bot in bots]
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Anfitrión y prueba en local del modo versus')
+    commands = parser.add_subparsers(dest='command', required=True)
+    host_parser = commands.add_parser('anfitrion', help='sirve partidas versus')
+    host_parser.add_argument('--host', default='0.0.0.0')
+    host_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    host_parser.add_argument('--duration', type=float, help='segundos por partida (por defecto, los de LEVEL_CONFIG)')
+    test_parser = commands.add_parser('prueba', help='partidas de bots contra un anfitrión local')
+    test_parser.add_argument('--matches', type=int, default=10)
+    test_parser.add_argument('--seconds', type=float, default=15)
+    test_parser.add_argument('--latency', type=float, default=0, help='latencia simulada en cada sentido (ms)')
+    test_parser.add_argument('--loss', type=float, default=0, help='fracción de paquetes perdidos en cada sentido')
+    args = parser.parse_args()
+
+    if args.command == 'anfitrion':
+        async def report(versus_host):
+            while True:
+                await asyncio.sleep(10)
+                clients = sum(len(match.peers) for match in versus_host.matches.values())
+                print(f"{len(versus_host.matches)} partidas, {clients} jugadores, "
+                      f"tick {versus_host.tick_cost:.0f} µs por jugador, {versus_host.bytes_sent} bytes enviados")
+
+        async def host_forever():
+            versus_host = await serve(args.host, args.port, duration=args.duration)
+            print(f"Anfitrión versus en {args.host}:{args.port}")
+            await asyncio.gather(versus_host.run(), report(versus_host))
+
+        try:
+            asyncio.run(host_forever())
+        except KeyboardInterrupt:
+            pass
+    else:
+        versus_host, states = asyncio.run(benchmark(args.matches, args.seconds, args.latency / 1000, args.loss))
+        clients = len(states)
+        played = args.seconds
+        sent = sum(state.bytes_received for state in states)
+        received = sum(state.bytes_sent for state in states)
+        packets = versus_host.client_ticks
+        print(f"{args.matches} partidas, {clients} jugadores, {played:.0f} s, latencia {args.latency:.0f} ms, "
+              f"pérdidas {args.loss * 100:.0f}%")
+        print(f"Anfitrión -> cliente: {sent / clients / played:.0f} B/s de datos "
+              f"({(sent + packets * UDP_OVERHEAD) / clients / played:.0f} B/s con cabeceras UDP/IP)")
+        print(f"Cliente -> anfitrión: {received / clients / played:.0f} B/s de datos")
+        print(f"Tick del anfitrión: {versus_host.tick_cost:.0f} µs por jugador "
+              f"({versus_host.tick_seconds / max(versus_host.ticks, 1) * 1000:.2f} ms por tick)")
+        predicted = sum(state.confirmed_predictions for state in states)
+        confirmed = sum(state.host_scores[state.player][TARGETS_HIT] for state in states if state.player is not None)
+        shots = sum(state.host_scores[state.player][SHOTS] for state in states if state.player is not None)
+        print(f"Disparos: {shots}, aciertos predichos {predicted}, confirmados por el anfitrión {confirmed}")
+        unfinished = sum(not state.finished for state in states)
+        if unfinished:
+            print(f"{unfinished} jugadores no terminaron su partida")
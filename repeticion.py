@@ -0,0 +1,267 @@
+# Repeticiones: registro binario de una sesión y reproducción sin ventana (no depende de Ursina)
+# El registro guarda las semillas de cada nivel, cada evento que llega a input() y cada
+# objetivo generado. Como la simulación es determinista, reaplicar las entradas en el mismo
+# paso de simulación reproduce exactamente los mismos impactos y la misma precisión.
+import atexit
+import os
+import queue
+import struct
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from impactos import HitTester, Occluders, TargetSnapshot
+from simulacion import FIXED_DT, GameState
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPLAY_DIR = os.path.join(BASE_DIR, 'assets', 'cache', 'repeticiones')
+KEEP_REPLAYS = 20 # Repeticiones que se conservan; las más antiguas se borran
+
+# ======================================================================================
+# --- Formato del archivo ---
+# ======================================================================================
+# Cabecera: MAGIC, versión, paso fijo de la simulación y las cajas oclusoras (centro, tamaño).
+# Después, registros de tamaño fijo que se leen de una vez como array de NumPy.
+MAGIC = b'AIMREP'
+VERSION = 4 # 2: los temporizadores vencen en pasos enteros (TimerWheel); 3: cadencia por arma y 'auto fire';
+            # 4: trayectorias en forma cerrada (un objetivo no se mueve en el paso en que aparece)
+HEADER = struct.Struct('<6sHdI')
+BOX = struct.Struct('<6d')
+NO_SNAPSHOT = 0xFFFFFFFF # El disparo se resolvió contra los objetivos vivos, no contra un frame
+
+# Tipos de registro y significado de sus campos:
+#   START: code = nivel, ref = semilla del nivel
+#   INPUT: code = tecla (KEYS), ref = paso del frame mostrado (o NO_SNAPSHOT),
+#          a = instante del evento (reloj monotónico), b = instante de simulación del clic,
+#          v0 = origen, v1 = dirección, v2 = 'up' y v3 = rotación de la cámara
+#   SPAWN: ref = id del objetivo, a = velocidad, b = tamaño, v0 = posición, v1 = dirección
+#   ABORT: el nivel se abandonó desde un menú
+#   END:   a = precisión, v0 = (aciertos, disparos, objetivos alcanzados)
+START, INPUT, SPAWN, ABORT, END = range(5)
+RECORD = struct.Struct('<BBIIdd3d3d3d3d')
+RECORD_DTYPE = np.dtype([
+    ('kind', 'u1'), ('code', 'u1'), ('step', '<u4'), ('ref', '<u4'), ('a', '<f8'), ('b', '<f8'),
+    ('v0', '<f8', 3), ('v1', '<f8', 3), ('v2', '<f8', 3), ('v3', '<f8', 3),
+])
+assert RECORD_DTYPE.itemsize == RECORD.size
+
+# Teclas con código propio; el resto se guarda como 'other'. 'auto fire' no es una tecla:
+# es cada disparo de un arma automática mientras se mantiene el clic.
+KEYS = ('other', 'left mouse down', 'left mouse up', 'right mouse down', 'right mouse up',
+        'escape', 'f3', 'f4', 'f5', 'f6', 'auto fire')
+KEY_CODES = {key: code for code, key in enumerate(KEYS)}
+FIRE_KEYS = ('left mouse down', 'auto fire') # Entradas que disparan
+ZERO = (0.0, 0.0, 0.0)
+
+# ======================================================================================
+# --- Grabación ---
+# ======================================================================================
+# Empaqueta cada registro en el hilo principal (un struct.pack) y lo escribe en disco desde
+# un hilo en segundo plano, así que grabar nunca bloquea un frame. El archivo solo crece.
+class ReplayRecorder:
+    def __init__(self, path, occluder_boxes=(), dt=FIXED_DT):
+        self.path = path
+        self.records = 0
+        self._queue = queue.SimpleQueue()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        header = HEADER.pack(MAGIC, VERSION, dt, len(occluder_boxes))
+        header += b''.join(BOX.pack(*center, *size) for center, size in occluder_boxes)
+        self._queue.put(header)
+        self._thread = threading.Thread(target=self._write, name='replay-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _write(self):
+        with open(self.path, 'ab') as file:
+            while True:
+                chunk = self._queue.get()
+                if chunk is None:
+                    break
+                file.write(chunk)
+                if self._queue.empty():
+                    file.flush()
+
+    def _put(self, kind, code=0, step=0, ref=0, a=0.0, b=0.0, v0=ZERO, v1=ZERO, v2=ZERO, v3=ZERO):
+        self._queue.put(RECORD.pack(kind, code, step, ref, a, b, *v0, *v1, *v2, *v3))
+        self.records += 1
+
+    def start(self, level, seed):
+        self._put(START, code=level, ref=seed)
+
+    def input(self, key, step, snapshot, pressed_at, at, origin, forward, up, rotation):
+        ref = NO_SNAPSHOT if snapshot is None else snapshot.step
+        self._put(INPUT, KEY_CODES.get(key, 0), step, ref, pressed_at, at, origin, forward, up, rotation)
+
+    def spawn(self, step, target):
+        self._put(SPAWN, step=step, ref=target.id, a=target.speed, b=target.scale,
+                  v0=target.position, v1=target.direction)
+
+    def abort(self, step):
+        self._put(ABORT, step=step)
+
+    def end(self, step, state):
+        self._put(END, step=step, a=state.accuracy, v0=(state.hits, state.shots_fired, state.targets_hit))
+
+    # Termina de escribir lo pendiente y cierra el archivo
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+# Ruta para una nueva repetición; borra las más antiguas si hay más de 'keep'
+def new_replay_path(directory=REPLAY_DIR, keep=KEEP_REPLAYS):
+    os.makedirs(directory, exist_ok=True)
+    for old in sorted(Path(directory).glob('partida-*.rep'))[:-(keep - 1) or None]:
+        old.unlink()
+    return os.path.join(directory, time.strftime('partida-%Y%m%d-%H%M%S.rep'))
+
+# Lee una repetición; devuelve (cabecera, registros como array estructurado)
+def load_replay(path):
+    data = Path(path).read_bytes()
+    magic, version, dt, box_count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f'{path} no es una repetición compatible')
+    offset = HEADER.size
+    boxes = []
+    for _ in range(box_count):
+        values = BOX.unpack_from(data, offset)
+        boxes.append((values[:3], values[3:]))
+        offset += BOX.size
+    count = (len(data) - offset) // RECORD.size # Un registro a medio escribir se ignora
+    records = np.frombuffer(data, dtype=RECORD_DTYPE, count=count, offset=offset)
+    return {'version': version, 'dt': dt, 'occluders': boxes}, records
+
+# ======================================================================================
+# --- Reproducción ---
+# ======================================================================================
+# Reaplica los registros sobre un GameState: cada registro se aplica cuando la simulación
+# llega a su paso. Los disparos usan la dirección, el instante y el frame grabados, así que
+# el resultado no depende de la cámara ni de los FPS de la reproducción.
+#   on_start(nivel, semilla): inicia el nivel (por defecto, state.start_level)
+#   on_input(registro, tecla, disparó): efectos visuales del front end
+#   on_abort(): el nivel se abandonó (por defecto, state.abort_level)
+# Con 'drain_events' la propia reproducción vacía los eventos y comprueba que los objetivos
+# generados coinciden con los grabados (sin ventana); si no, los vacía el front end.
+class ReplayPlayer:
+    def __init__(self, records, state, hit_tester, on_start=None, on_input=None, on_abort=None, drain_events=True):
+        self.records = records
+        self.cursor = 0
+        self.state = state
+        self.hit_tester = hit_tester
+        self.on_start = on_start or state.start_level
+        self.on_input = on_input
+        self.on_abort = on_abort or state.abort_level
+        self.drain_events = drain_events
+        inputs = records[(records['kind'] == INPUT) & (records['ref'] != NO_SNAPSHOT)]
+        self.needed_steps = set(inputs['ref'].tolist()) # Pasos cuyo frame usa algún disparo
+        self.snapshots = {}
+        self.spawned = {}      # id -> objetivo generado por la reproducción
+        self.mismatches = []   # Diferencias con lo grabado
+        self.results = []      # Un diccionario por nivel terminado
+
+    @property
+    def finished(self):
+        return self.cursor >= len(self.records)
+
+    # Aplica registros y avanza la simulación como mucho 'max_steps' pasos (sin límite si
+    # es None). Devuelve los pasos ejecutados.
+    def advance(self, max_steps=None):
+        stepped = 0
+        state = self.state
+        while not self.finished:
+            record = self.records[self.cursor]
+            if record['kind'] != START and state.active and state.steps < record['step']:
+                if max_steps is not None and stepped >= max_steps:
+                    break
+                state.step()
+                stepped += 1
+                self._after_step()
+                continue
+            self.cursor += 1
+            self._apply(record)
+        return stepped
+
+    # Tras cada paso: vacía los eventos y guarda el frame si algún disparo lo usa (antes de
+    # aplicar las entradas de ese paso, igual que el front end dibuja antes de procesarlas)
+    def _after_step(self):
+        self._drain()
+        step = self.state.steps
+        if step in self.needed_steps and step not in self.snapshots:
+            self.snapshots[step] = TargetSnapshot(self.state.time, 0, self.state.swarm, step)
+
+    def _drain(self):
+        if self.drain_events:
+            for kind, target in self.state.drain_events():
+                if kind == 'spawn':
+                    self.spawned[target.id] = target
+
+    def _apply(self, record):
+        kind = record['kind']
+        state = self.state
+        if kind == START:
+            self.snapshots.clear()
+            self.spawned.clear()
+            self.on_start(int(record['code']), int(record['ref']))
+            self._after_step() # Frame del paso 0, con los primeros objetivos
+        elif kind == INPUT:
+            key = KEYS[record['code']]
+            fired = key in FIRE_KEYS and state.active and state.fire(float(record['b']))
+            if fired:
+                ref = int(record['ref'])
+                targets = state.swarm if ref == NO_SNAPSHOT else self.snapshots[ref]
+                state.resolve_shot(self.hit_tester, targets, record['v0'], record['v1'], record['v2'])
+            if self.on_input:
+                self.on_input(record, key, fired)
+            self._drain()
+        elif kind == SPAWN:
+            self._check_spawn(record)
+        elif kind == ABORT:
+            self.on_abort()
+        elif kind == END:
+            recorded = tuple(int(value) for value in record['v0'])
+            replayed = (state.hits, state.shots_fired, state.targets_hit)
+            self.results.append({'level': state.current_level, 'recorded': recorded, 'replayed': replayed,
+                                 'accuracy': state.accuracy, 'passed': state.passed, 'match': recorded == replayed})
+            if recorded != replayed:
+                self.mismatches.append(f"nivel {state.current_level}: grabado {recorded}, reproducido {replayed}")
+
+    def _check_spawn(self, record):
+        if not self.drain_events:
+            return
+        target = self.spawned.get(int(record['ref']))
+        if target is None or not np.allclose(target.position, record['v0']) or target.speed != record['a']:
+            self.mismatches.append(f"objetivo {int(record['ref'])} distinto en el paso {int(record['step'])}")
+
+# Reproduce una repetición completa sin ventana; devuelve el ReplayPlayer con los resultados
+def play_headless(path):
+    header, records = load_replay(path)
+    state = GameState(dt=header['dt'])
+    player = ReplayPlayer(records, state, HitTester(Occluders(header['occluders'])))
+    player.advance()
+    return player
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Reproduce una repetición sin ventana')
+    parser.add_argument('path', nargs='?', help='archivo .rep (por defecto, el más reciente)')
+    args = parser.parse_args()
+    path = args.path or max(Path(REPLAY_DIR).glob('partida-*.rep'), default=None)
+    if path is None:
+        raise SystemExit('No hay repeticiones grabadas')
+
+    start = time.perf_counter()
+    player = play_headless(path)
+    elapsed = time.perf_counter() - start
+    print(f"{path}: {len(player.records)} registros en {elapsed:.3f}s")
+    for result in player.results:
+        hits, shots, targets_hit = result['replayed']
+        status = 'coincide' if result['match'] else f"NO coincide (grabado {result['recorded']})"
+        print(f"  Nivel {result['level']}: {hits}/{shots} aciertos, {targets_hit} objetivos, "
+              f"precisión {result['accuracy']:.1f}% -> {status}")
+    for mismatch in player.mismatches:
+        print('  Diferencia:', mismatch)
+    raise SystemExit(1 if player.mismatches else 0)
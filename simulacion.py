@@ -0,0 +1,563 @@
+# Núcleo de simulación del juego sin ventana (no depende de Ursina)
+# Contiene las reglas: aparición de objetivos, movimiento, cadencia de disparo y puntuación.
+# El front end de Ursina (juego.py) solo dibuja este estado.
+import math
+import random
+import time
+from collections import Counter
+
+import numpy as np
+
+from enjambre import EXIT_X, TargetSwarm
+from impactos import MAX_DISTANCE, HitTester, TargetHistory, spread_directions
+from temporizador import TimerWheel
+from trayectorias import bezier, control_length, linear, orbit, weave
+
+# ======================================================================================
+# --- Configuración de Niveles ---
+# ======================================================================================
+# Diccionario que define las propiedades de cada nivel.
+# 'targets': número de objetivos a aparecer
+# 'speed': rango de velocidad de los objetivos (mínimo, máximo)
+# 'scale': tamaño de los objetivos
+# 'accuracy_goal': porcentaje de precisión requerido para completar el nivel
+# 'batch_size': número de objetivos a generar a la vez para este nivel
+# 'weapon': arma del nivel (clave de WEAPON_CONFIG)
+# 'paths' (opcional): trayectorias entre las que se elige la de cada objetivo (claves de
+#          trayectorias.PATHS, ver PATH_SHAPES); por defecto todos van en línea recta
+# 'music' (opcional): música de fondo del nivel (ruta, volumen); sin ella, el nivel va sin música
+ENDLESS_LEVEL = 0 # Clave del nivel de estrés (no se desbloquea ni cuenta como nivel normal)
+VERSUS_LEVEL = 9  # Clave del nivel del modo versus en red (ver red.py)
+LEVEL_CONFIG = {
+    1: {'targets': 10, 'speed': (10, 15), 'scale': 2.8, 'accuracy_goal': 50, 'batch_size': 1, 'weapon': 'pistol',
+        'music': ('assets/sounds/fondo.mp3', 0.8)},
+    2: {'targets': 12, 'speed': (15, 22), 'scale': 2.0, 'accuracy_goal': 60, 'batch_size': 1, 'weapon': 'rifle',
+        'music': ('assets/sounds/fondoNivel2.mp3', 0.8)},
+    3: {'targets': 14, 'speed': (20, 28), 'scale': 1.8, 'accuracy_goal': 40, 'batch_size': 1, 'weapon': 'shotgun',
+        'music': ('assets/sounds/fondoNivel3.mp3', 0.4)},
+    4: {'targets': 16, 'speed': (12, 18), 'scale': 2.2, 'accuracy_goal': 70, 'batch_size': 2, 'weapon': 'rifle',
+        'paths': ('weave', 'orbit', 'bezier'), 'music': ('assets/sounds/fondoNivel2.mp3', 0.8)},
+    # Nivel sin fin para pruebas de estrés: mantiene 'batch_size' objetivos en pantalla
+    ENDLESS_LEVEL: {'targets': 0, 'speed': (10, 28), 'scale': 1.5, 'accuracy_goal': 0, 'batch_size': 200,
+                    'endless': True, 'weapon': 'pistol'},
+    # Versus: dos jugadores comparten los objetivos durante 'duration' segundos (solo en red)
+    VERSUS_LEVEL: {'targets': 0, 'speed': (12, 18), 'scale': 2.2, 'accuracy_goal': 0, 'batch_size': 3,
+                   'endless': True, 'weapon': 'rifle', 'paths': ('linear', 'weave', 'orbit', 'bezier'),
+                   'versus': True, 'duration': 60, 'music': ('assets/sounds/fondoNivel3.mp3', 0.4)},
+}
+# 'pool_size' (opcional): objetivos pre-creados para el nivel; por defecto igual a 'batch_size'.
+# Los efectos de impacto usan el mismo tamaño, ya que duran menos que la reaparición.
+# 'endless' (opcional): el nivel no termina; cada objetivo que desaparece se repone.
+# 'versus' y 'duration' (opcionales): nivel del modo versus; lo termina el anfitrión pasados
+# 'duration' segundos.
+
+# ======================================================================================
+# --- Configuración de Armas ---
+# ======================================================================================
+# Diccionario que define las propiedades de cada arma. Las reglas ('fire_rate', 'automatic',
+# 'pellets', 'spread') las aplica la simulación; el resto solo lo usa el front end.
+# 'model', 'texture', 'sound': modelo, textura y efecto de sonido (clave de sonido.SFX)
+# 'position', 'rotation', 'scale': colocación respecto a la cámara (sin apuntar)
+# 'fire_rate': disparos por segundo como máximo
+# 'automatic': si dispara sin parar mientras se mantiene el clic (si no, un disparo por clic)
+# 'recoil': retroceso en grados ('kick'), segundos hasta el tope ('kick_time', 0 = de golpe),
+#           segundos de vuelta al reposo ('recover_time') y curva de Ursina de la animación
+# 'ads' (opcional): apuntado con clic derecho: posición, rotación, campo de visión y
+#           segundos para entrar ('time_in') y salir ('time_out')
+# 'pellets' y 'spread' (opcionales): perdigones por disparo y semiángulo del cono en grados.
+# Cada perdigón cuenta como un disparo para la precisión.
+WEAPON_CONFIG = {
+    'pistol': {'model': 'assets/models/modeloArma1.obj', 'texture': 'assets/textures/arma1.png', 'sound': 'pistol',
+               'position': (0.5, -0.4, 1.2), 'rotation': (0, -90, 0), 'scale': 0.15,
+               'fire_rate': 2, 'automatic': False,
+               'recoil': {'kick': 10, 'kick_time': 0, 'recover_time': 0.1, 'curve': 'in_expo'}},
+    'rifle': {'model': 'assets/models/modeloArma2.obj', 'texture': 'assets/textures/arma2.png', 'sound': 'rifle',
+              'position': (0.3, -0.4, 1.2), 'rotation': (0, 360, 0), 'scale': 1.5,
+              'fire_rate': 15, 'automatic': True,
+              'recoil': {'kick': 10, 'kick_time': 0.05, 'recover_time': 0.05, 'curve': 'out_quad'},
+              'ads': {'position': (0, -0.5, 0.8), 'rotation': (-5, -90, 0), 'fov': 60, 'time_in': 0.15, 'time_out': 0.2}},
+    'shotgun': {'model': 'assets/models/Shotgun.obj', 'texture': 'assets/textures/Gun_nivel3.jpg', 'sound': 'shotgun',
+                'position': (0.5, -0.65, 1.5), 'rotation': (0, 90, 0), 'scale': 0.15,
+                'fire_rate': 2, 'automatic': False, 'pellets': 12, 'spread': 2.0,
+                'recoil': {'kick': 15, 'kick_time': 0, 'recover_time': 0.1, 'curve': 'in_expo'}},
+}
+DEFAULT_WEAPON = 'pistol' # Arma de los niveles sin 'weapon'
+
+# ======================================================================================
+# --- Constantes de la simulación ---
+# ======================================================================================
+FIXED_DT = 1 / 120      # Paso de tiempo fijo de la simulación (segundos)
+RESPAWN_DELAY = 0.5     # Retraso antes de generar el siguiente objetivo
+END_LEVEL_DELAY = 1     # Retraso antes de terminar el nivel tras el último objetivo
+SPAWN_X = 22            # Distancia lateral a la que aparecen los objetivos
+POINTS_PER_HIT = 100    # Puntos por acierto
+
+# Parámetros de las trayectorias curvas, como rangos (mínimo, máximo) que se sortean:
+# 'weave': amplitud vertical y frecuencia (hercios) de la onda
+# 'orbit': radio y vueltas por segundo de la órbita (en el plano de la pantalla)
+# 'bezier': alcance lateral y alto de los puntos de control intermedios
+PATH_SHAPES = {
+    'weave': {'amplitude': (1, 2), 'frequency': (0.5, 1.2)},
+    'orbit': {'radius': (1.5, 2.5), 'frequency': (0.4, 0.8)},
+    'bezier': {'reach': (0, 15), 'height': (-6, 8)},
+}
+
+# ======================================================================================
+# --- Objetivo simulado ---
+# ======================================================================================
+# Parámetros con los que apareció un objetivo. La posición actual vive en el enjambre.
+class SimTarget:
+    __slots__ = ('id', 'position', 'direction', 'speed', 'path', 'scale', 'spawn_time', 'level', 'wave',
+                 'hit_position')
+
+    def __init__(self, target_id, position, direction, speed, scale, spawn_time, level=0, wave=0, path=None):
+        self.id = target_id
+        self.path = path or linear(position, np.multiply(direction, speed)) # Trajectory que sigue
+        self.position = self.path.start.tolist() # [x, y, z] al aparecer
+        self.direction = direction  # [x, y, z] en que avanza
+        self.speed = speed
+        self.scale = scale
+        self.spawn_time = spawn_time
+        self.level = level          # Nivel en el que apareció
+        self.wave = wave            # Oleada (llamada a spawn_next_target) en la que apareció
+        self.hit_position = None    # [x, y, z] donde fue alcanzado (None mientras siga vivo)
+
+# ======================================================================================
+# --- Registro de objetivos vivos ---
+# ======================================================================================
+# Único lugar donde se consultan los objetivos vivos: por id, por nivel/oleada o en bloque.
+# Añadir y quitar son O(1); el enjambre guarda sus posiciones para el movimiento y los impactos.
+class TargetRegistry:
+    def __init__(self):
+        self.targets = {}          # id -> SimTarget
+        self.waves = {}            # (nivel, oleada) -> {id: SimTarget}
+        self.swarm = TargetSwarm() # Posiciones y trayectorias de los objetivos vivos
+
+    def __len__(self):
+        return len(self.targets)
+
+    def __iter__(self):
+        return iter(self.targets.values())
+
+    def __contains__(self, target_id):
+        return target_id in self.targets
+
+    def get(self, target_id):
+        return self.targets.get(target_id)
+
+    def add(self, target):
+        self.targets[target.id] = target
+        self.waves.setdefault((target.level, target.wave), {})[target.id] = target
+        self.swarm.add_path(target.id, target.scale / 2, target.path, target.spawn_time)
+
+    # Quita un objetivo; devuelve el objetivo o None si no estaba vivo
+    def remove(self, target_id):
+        target = self._forget(target_id)
+        if target is not None:
+            self.swarm.remove(target_id)
+        return target
+
+    def _forget(self, target_id):
+        target = self.targets.pop(target_id, None)
+        if target is None:
+            return None
+        key = (target.level, target.wave)
+        wave = self.waves[key]
+        del wave[target_id]
+        if not wave:
+            del self.waves[key]
+        return target
+
+    # Coloca el enjambre en el instante 'time'; devuelve los objetivos que se salieron de la
+    # pantalla (ya retirados)
+    def advance(self, time):
+        return [self._forget(target_id) for target_id in self.swarm.advance(time)]
+
+    # Objetivos vivos de un nivel (y opcionalmente de una oleada)
+    def in_level(self, level, wave=None):
+        if wave is not None:
+            return list(self.waves.get((level, wave), {}).values())
+        return [target for (lvl, _), wave_targets in self.waves.items() if lvl == level
+                for target in wave_targets.values()]
+
+    def count(self, level=None, wave=None):
+        if level is None:
+            return len(self.targets)
+        if wave is not None:
+            return len(self.waves.get((level, wave), ()))
+        return sum(len(targets) for (lvl, _), targets in self.waves.items() if lvl == level)
+
+    def clear(self):
+        self.targets.clear()
+        self.waves.clear()
+        self.swarm.clear()
+
+# ======================================================================================
+# --- Estado del juego ---
+# ======================================================================================
+# Todo el estado de una partida. Se avanza con update(frame_dt), que ejecuta tantos pasos
+# fijos de FIXED_DT como correspondan, de modo que el resultado no depende de los FPS.
+# Los cambios que el front end debe dibujar se publican como eventos:
+#   ('spawn', objetivo), ('escape', objetivo), ('hit', objetivo), ('end', None)
+class GameState:
+    def __init__(self, seed=None, level_config=LEVEL_CONFIG, dt=FIXED_DT, weapon_config=WEAPON_CONFIG):
+        if seed is None:
+            seed = random.randrange(2 ** 32) # Se guarda para poder reproducir la partida
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.level_config = level_config
+        self.weapon_config = weapon_config
+        self.dt = dt
+        self.unlocked_level = 1  # El nivel más alto desbloqueado por el jugador
+        self.current_level = 1   # El nivel actual en juego
+        self.active = False      # Si hay un nivel en curso
+        self.paused = False      # En pausa no avanzan ni la simulación ni sus temporizadores
+        self.registry = TargetRegistry() # Objetivos vivos
+        self.history = TargetHistory()   # Posiciones de los últimos frames mostrados
+        self.events = []
+        self.timers = TimerWheel(dt)     # Reloj de juego: un tick por paso de simulación
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.hits = 0            # Número de aciertos (perdigones que alcanzan un objetivo)
+        self.targets_hit = 0     # Objetivos alcanzados
+        self.points = 0          # Puntos del jugador
+        self.shots_fired = 0     # Número de disparos realizados (cada perdigón cuenta)
+        self.targets_spawned = 0 # Número de objetivos generados en el nivel actual
+        self.time = 0.0          # Reloj de la simulación (solo avanza en update/step)
+        self.steps = 0           # Pasos fijos ejecutados en el nivel actual
+        self.accumulator = 0.0   # Tiempo pendiente de simular (menor que dt)
+        self.last_shot_time = 0.0
+        self.fire_interval = 1 / self.weapon['fire_rate'] # Tiempo mínimo entre disparos del arma
+        self.trigger_held = False # Si el clic sigue pulsado (disparo automático)
+        self.next_target_id = 0
+        self.wave = 0            # Oleadas generadas en el nivel actual
+        self.passed = False      # Si el último nivel terminado se superó
+        self.timers.clear(reset=True)
+
+    # Posiciones de los objetivos vivos (arrays contiguos para movimiento e impactos)
+    @property
+    def swarm(self):
+        return self.registry.swarm
+
+    @property
+    def config(self):
+        return self.level_config.get(self.current_level, {})
+
+    @property
+    def weapon_name(self):
+        return self.config.get('weapon', DEFAULT_WEAPON)
+
+    @property
+    def weapon(self):
+        return self.weapon_config[self.weapon_name]
+
+    @property
+    def pellets(self):
+        return self.weapon.get('pellets', 1)
+
+    @property
+    def accuracy(self):
+        return (self.hits / self.shots_fired) * 100 if self.shots_fired > 0 else 0
+
+    @property
+    def accuracy_goal(self):
+        return self.config.get('accuracy_goal', 0)
+
+    # Inicia un nivel; si se pasa 'seed' se reinicia el generador aleatorio
+    def start_level(self, level, seed=None):
+        if seed is not None:
+            self.seed = seed
+            self.rng.seed(seed)
+        self.current_level = level
+        self._reset_counters()
+        self.registry.clear()
+        self.history.clear()
+        self.events.clear()
+        self.active = True
+        self.paused = False
+        self.spawn_next_target()
+
+    # Detiene el nivel actual sin puntuarlo (por ejemplo, al volver al menú)
+    def abort_level(self):
+        self.active = False
+        self.paused = False
+        self.registry.clear()
+        self.history.clear()
+        self.timers.clear() # Cancela en bloque todos los temporizadores del nivel
+
+    # En pausa se suelta el gatillo: el clic puede soltarse con el menú abierto
+    def pause(self):
+        self.paused = True
+        self.trigger_held = False
+
+    def resume(self):
+        self.paused = False
+
+    # Programa 'function(*args)' para dentro de 'delay' segundos de simulación. Solo avanza
+    # con la simulación (se congela en pausa) y se cancela al abandonar el nivel.
+    def schedule(self, delay, function, *args, group='level'):
+        return self.timers.schedule(delay, function, *args, group=group)
+
+    # Genera el siguiente objetivo (o batch de objetivos)
+    def spawn_next_target(self):
+        if not self.active: return # No genera objetivos si el juego no está activo
+
+        config = self.config
+        total_targets_for_level = config.get('targets', 0)
+        batch_size = config.get('batch_size', 1) # Obtiene el tamaño del lote para el nivel actual
+
+        if config.get('endless'):
+            # Nivel sin fin: repone objetivos hasta tener batch_size en pantalla
+            targets_to_spawn_now = batch_size - len(self.registry)
+        else:
+            # Calcula cuántos objetivos se deben generar en este momento (máx. batch_size, y no más del total del nivel)
+            targets_to_spawn_now = min(batch_size, total_targets_for_level - self.targets_spawned)
+
+        if targets_to_spawn_now > 0:
+            self.wave += 1
+            for _ in range(targets_to_spawn_now):
+                self._spawn_target(config.get('speed', (10, 15)), config.get('scale', 1), config.get('paths'))
+        elif not config.get('endless') and not self.registry:
+            # Si ya se generaron todos los objetivos y no queda ninguno vivo, finaliza el nivel
+            # después de un retraso (si aún quedan, lo hará la retirada del último)
+            self.schedule(END_LEVEL_DELAY, self.end_level)
+
+    def _spawn_target(self, speed_range, scale, paths=None):
+        rng = self.rng
+        # Decide si el objetivo aparece por la izquierda (-1) o por la derecha (1)
+        side = rng.choice([-1, 1])
+        # Posición inicial del objetivo fuera de la pantalla
+        position = [SPAWN_X * side, rng.uniform(-8, -2), rng.uniform(15, 25)]
+        # Dirección en la que se moverá el objetivo
+        direction = [-side, rng.uniform(-.2, .2), rng.uniform(-.1, .1)]
+        speed = rng.uniform(speed_range[0], speed_range[1])
+        # Los niveles sin 'paths' no sortean nada más: su secuencia de objetivos no cambia
+        path = self._path(rng.choice(paths), position, direction, speed) if paths else None
+
+        target = SimTarget(self.next_target_id, position, direction, speed, scale, self.time,
+                           self.current_level, self.wave, path)
+        self.next_target_id += 1
+        self.registry.add(target)
+        self.targets_spawned += 1
+        self.events.append(('spawn', target))
+        return target
+
+    # Trayectoria de forma 'kind' de un objetivo que aparece en 'position' y avanza en
+    # 'direction' a 'speed' (ver PATH_SHAPES). Las ondas y órbitas van por encima de la altura
+    # de aparición, para no hundirse en el suelo.
+    def _path(self, kind, position, direction, speed):
+        rng = self.rng
+        velocity = np.multiply(direction, speed)
+        if kind == 'linear':
+            return linear(position, velocity)
+        shape = PATH_SHAPES[kind]
+        phase = rng.uniform(0, 2 * math.pi)
+        if kind == 'weave':
+            amplitude = rng.uniform(*shape['amplitude'])
+            origin = (position[0], position[1] + amplitude, position[2])
+            return weave(origin, velocity, (0, amplitude, 0), rng.uniform(*shape['frequency']), phase)
+        if kind == 'orbit':
+            radius = rng.uniform(*shape['radius'])
+            frequency = rng.uniform(*shape['frequency']) * rng.choice([-1, 1])
+            origin = (position[0], position[1] + radius, position[2])
+            return orbit(origin, velocity, radius, frequency, phase)
+        # Bézier: cruza la cabina pasando por dos puntos de control y termina fuera del otro lado
+        side = -direction[0] # Lado por el que aparece
+        p1 = (side * rng.uniform(*shape['reach']), rng.uniform(*shape['height']), rng.uniform(15, 25))
+        p2 = (-side * rng.uniform(*shape['reach']), rng.uniform(*shape['height']), rng.uniform(15, 25))
+        p3 = (-side * (EXIT_X + 1), position[1], position[2])
+        return bezier(position, p1, p2, p3, control_length(position, p1, p2, p3) / speed)
+
+    # Avanza la simulación el tiempo de un frame en pasos fijos; devuelve los pasos ejecutados
+    def update(self, frame_dt):
+        if self.paused:
+            return 0
+        self.accumulator += frame_dt
+        steps = 0
+        while self.accumulator >= self.dt:
+            self.accumulator -= self.dt
+            self.step()
+            steps += 1
+        return steps
+
+    # Ejecuta un paso fijo de simulación
+    def step(self):
+        self.time += self.dt
+        self.steps += 1
+
+        # Ejecuta los temporizadores vencidos
+        self.timers.tick()
+
+        # Coloca todos los objetivos en su trayectoria y retira los que se salen de la pantalla
+        for target in self.registry.advance(self.time):
+            self.events.append(('escape', target))
+            # Programa la creación del siguiente objetivo después de un pequeño retraso
+            self.schedule(RESPAWN_DELAY, self.spawn_next_target)
+
+    # Guarda las posiciones que se acaban de mostrar en pantalla; 'presented_at' es el
+    # instante en un reloj monotónico (por ejemplo, time.perf_counter()). Solo se guarda un
+    # frame por paso de simulación, así que cada frame del historial se identifica por su paso.
+    def record_presented(self, presented_at):
+        snapshots = self.history.snapshots
+        if snapshots and snapshots[-1].step == self.steps:
+            return
+        self.history.record(self.time, presented_at, self.swarm, self.steps)
+
+    # Instante de simulación correspondiente a 'presented_at' (mismo reloj monotónico), a
+    # partir del frame que estaba en pantalla. Nunca va por delante de la simulación, así
+    # que el tiempo en pausa (sin frames) no cuenta.
+    def time_at(self, presented_at):
+        snapshot = self.history.at(presented_at)
+        if snapshot is None:
+            return self.time
+        elapsed = max(presented_at - snapshot.presented_at, 0)
+        return min(snapshot.time + elapsed, self.time + self.accumulator)
+
+    # Controla la cadencia de disparo del arma con el instante de simulación del clic ('at';
+    # por defecto, el actual). Devuelve True si el disparo se realiza y lo cuenta.
+    def fire(self, at=None):
+        at = self.time if at is None else at
+        # (con margen para el redondeo: fire_held() dispara justo a last_shot_time + fire_interval)
+        if not self.active or at - self.last_shot_time < self.fire_interval - 1e-9:
+            return False
+        self.last_shot_time = at
+        self.shots_fired += self.pellets
+        return True
+
+    # Gatillo: pull_trigger() con el clic (dispara como fire()) y release_trigger() al soltarlo
+    def pull_trigger(self, at=None):
+        self.trigger_held = True
+        return self.fire(at)
+
+    def release_trigger(self):
+        self.trigger_held = False
+
+    # Siguiente disparo automático: con el gatillo pulsado y un arma automática, si ya le
+    # tocaba según la cadencia lo cuenta y devuelve su instante de simulación; si no, None.
+    # Se llama en bucle una vez por frame, así que a pocos FPS salen varios disparos seguidos.
+    def fire_held(self):
+        if not self.trigger_held or not self.weapon['automatic']:
+            return None
+        at = self.last_shot_time + self.fire_interval
+        if at > self.time or not self.fire(at):
+            return None
+        return at
+
+    # Direcciones de los perdigones del disparo actual alrededor de 'forward'. El patrón se
+    # genera con una semilla propia de cada disparo (partida, nivel y número de disparo),
+    # así que es reproducible y no altera la secuencia de aparición de objetivos.
+    def pellet_directions(self, forward, up=(0, 1, 0)):
+        if self.pellets == 1:
+            return np.asarray(forward, dtype=np.float64)[None]
+        rng = np.random.default_rng([self.seed, self.current_level, self.shots_fired])
+        return spread_directions(forward, up, self.pellets, self.weapon.get('spread', 0), rng)
+
+    # Registra el impacto de 'pellets' perdigones sobre un objetivo vivo; devuelve el
+    # objetivo o None
+    def hit(self, target_id, pellets=1):
+        if target_id not in self.registry:
+            return None
+        hit_position = self.swarm.center(target_id).tolist()
+        target = self.registry.remove(target_id)
+        target.hit_position = hit_position
+        self.hits += pellets
+        self.targets_hit += 1
+        self.points += POINTS_PER_HIT * pellets
+        self.events.append(('hit', target))
+        # Programa la creación del siguiente objetivo después de un pequeño retraso
+        self.schedule(RESPAWN_DELAY, self.spawn_next_target)
+        return target
+
+    # Resuelve un disparo ya autorizado por fire(): un rayo por perdigón desde 'origin'
+    # contra 'targets' (el enjambre vivo o un TargetSnapshot del historial). Devuelve los
+    # objetivos alcanzados.
+    def resolve_shot(self, hit_tester, targets, origin, forward, up=(0, 1, 0), max_distance=MAX_DISTANCE):
+        directions = self.pellet_directions(forward, up)
+        target_ids, _ = hit_tester.cast_many(targets, origin, directions, up, max_distance)
+        return self.hit_pellets(target_ids)
+
+    # Registra un disparo resuelto por perdigones: 'target_ids' tiene el id alcanzado por
+    # cada perdigón (o -1). Devuelve los objetivos alcanzados.
+    def hit_pellets(self, target_ids):
+        if len(target_ids) == 1: # Un solo perdigón: sin recuento
+            target = self.hit(int(target_ids[0])) if target_ids[0] >= 0 else None
+            return [target] if target is not None else []
+        counts = Counter(target_id for target_id in np.asarray(target_ids).tolist() if target_id >= 0)
+        return [target for target_id, pellets in counts.items()
+                if (target := self.hit(target_id, pellets)) is not None]
+
+    # Finaliza el nivel, calcula si se superó y desbloquea el siguiente
+    def end_level(self):
+        if not self.active:
+            return
+        self.active = False
+        self.passed = self.accuracy >= self.accuracy_goal
+        if self.passed and self.current_level + 1 in self.level_config:
+            self.unlocked_level = max(self.unlocked_level, self.current_level + 1)
+        self.events.append(('end', None))
+
+    # Posición actual de un objetivo vivo
+    def position(self, target_id):
+        return self.swarm.center(target_id)
+
+    # Devuelve y vacía la lista de eventos pendientes
+    def drain_events(self):
+        events = self.events
+        self.events = []
+        return events
+
+# ======================================================================================
+# --- Simulación sin ventana ---
+# ======================================================================================
+# Tirador simple: dispara al primer objetivo que esté entre las paredes laterales
+def wall_shooter(state):
+    swarm = state.swarm
+    for target_id, x in zip(swarm.ids[:swarm.count].tolist(), swarm.centers[:swarm.count, 0].tolist()):
+        if abs(x) < 19.5:
+            return target_id
+    return None
+
+CAMERA_POSITION = (0, 0, -15) # Posición de la cámara del jugador (como en juego.py)
+
+# Juega un nivel completo sin ventana. 'shooter(state)' se llama en cada paso y devuelve
+# el id del objetivo al que dispara o None. Con perdigones, el disparo apunta al centro
+# del objetivo desde la cámara y cada perdigón se resuelve contra todos los objetivos.
+# Devuelve el estado al terminar el nivel.
+def run_level(level, seed=None, shooter=None, level_config=LEVEL_CONFIG, max_time=600):
+    state = GameState(seed=seed, level_config=level_config)
+    hit_tester = HitTester()
+    origin = np.array(CAMERA_POSITION, dtype=np.float64)
+    state.start_level(level)
+    while state.active and state.time < max_time:
+        state.step()
+        if shooter:
+            target_id = shooter(state)
+            if target_id is not None and state.fire():
+                if state.pellets == 1:
+                    state.hit(target_id)
+                else:
+                    state.resolve_shot(hit_tester, state.swarm, origin, state.position(target_id) - origin)
+        state.events.clear()
+    return state
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Simula niveles sin ventana')
+    parser.add_argument('--level', type=int, default=1)
+    parser.add_argument('--runs', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    passed = 0
+    simulated = 0.0
+    for run in range(args.runs):
+        state = run_level(args.level, seed=args.seed + run, shooter=wall_shooter)
+        passed += state.passed
+        simulated += state.time
+    elapsed = time.perf_counter() - start
+    print(f"Nivel {args.level}: {args.runs} partidas, superadas {passed} ({passed / args.runs * 100:.1f}%)")
+    print(f"Tiempo simulado {simulated:.0f}s en {elapsed:.2f}s ({simulated / elapsed:.0f}x tiempo real)")
@@ -0,0 +1,247 @@
+# Gestor de audio: carga cada pista y efecto una sola vez y los reutiliza
+import os
+import threading
+from collections import OrderedDict
+from time import perf_counter
+
+import numpy as np
+from panda3d.core import AudioSound, Filename
+from ursina import Audio
+
+from recursos import build_pcm_cache
+from simulacion import LEVEL_CONFIG
+
+# Carpeta base para resolver las rutas relativas de los sonidos
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# ======================================================================================
+# --- Pistas de fondo y efectos de sonido ---
+# ======================================================================================
+# Música de fondo por nivel: (ruta, volumen), de la entrada 'music' de cada nivel de LEVEL_CONFIG
+LEVEL_MUSIC = {level: config['music'] for level, config in LEVEL_CONFIG.items() if 'music' in config}
+
+# Efectos de sonido: nombre -> (ruta, volumen, voces que pueden sonar a la vez)
+SFX = {
+    'pistol': ('assets/sounds/hit.mp3', 1.0, 4),
+    'rifle': ('assets/sounds/sonidoRifle.mp3', 0.5, 8), # A 15 disparos/s cada disparo dura ~2 s
+    'shotgun': ('assets/sounds/sonidoEscopeta.mp3', 3.0, 3),
+    'hit': ('assets/sounds/hit.mp3', 0.5, 6),
+}
+MAX_VOICE_STARTS = 8    # Voces que pueden empezar en un mismo frame; el resto se descarta
+LATENCY_SAMPLES = 256   # Latencias clic-sonido que se recuerdan para el informe
+
+
+# Carga un clip de audio de Panda3D; devuelve None si el archivo no existe
+def load_clip(path):
+    full_path = os.path.join(BASE_DIR, path)
+    if not os.path.exists(full_path):
+        print('no audio found:', path)
+        return None
+    return loader.loadSfx(Filename.fromOsSpecific(full_path))  # type: ignore
+
+
+# ======================================================================================
+# --- Voces de un efecto ---
+# ======================================================================================
+# Varias instancias del mismo efecto que comparten el PCM ya decodificado, para que los
+# disparos se solapen en lugar de cortar el anterior. Las voces se usan por turnos: la
+# siguiente es siempre la que empezó hace más tiempo, así que si sigue sonando se roba esa.
+# play() no crea nada: solo reinicia una voz ya cargada.
+class VoicePool:
+    __slots__ = ('voices', 'next', 'steals')
+
+    def __init__(self, voices):
+        self.voices = voices
+        self.next = 0   # Voz que se usará en el siguiente play()
+        self.steals = 0 # Voces cortadas porque todas estaban sonando
+
+    def play(self):
+        voice = self.voices[self.next]
+        self.next = (self.next + 1) % len(self.voices)
+        if voice.status() == AudioSound.PLAYING:
+            voice.stop()
+            self.steals += 1
+        voice.play()
+
+    # Voces sonando ahora mismo
+    def playing(self):
+        return sum(voice.status() == AudioSound.PLAYING for voice in self.voices)
+
+# Carga las voces de un efecto desde su PCM en caché; None si el archivo no existe
+def load_voices(path, volume, voices):
+    if not os.path.exists(os.path.join(BASE_DIR, path)):
+        print('no audio found:', path)
+        return None
+    wav_path, _ = build_pcm_cache(path)
+    clips = [loader.loadSfx(Filename.fromOsSpecific(wav_path)) for _ in range(voices)]  # type: ignore
+    for clip in clips:
+        clip.setVolume(volume * Audio.volume_multiplier)
+    return VoicePool(clips)
+
+# ======================================================================================
+# --- Gestor de Audio ---
+# ======================================================================================
+# Mantiene los clips ya decodificados en una caché limitada (LRU) para que empezar un
+# nivel o reanudar tras la pausa no vuelva a abrir ni decodificar el MP3. Los efectos de
+# sonido se cargan una vez como VoicePool y no se expulsan nunca de la caché; como mucho
+# empiezan 'max_voice_starts' voces por frame (new_frame() abre cada frame).
+class AudioManager:
+    def __init__(self, music=LEVEL_MUSIC, sfx=SFX, max_tracks=2, preload_sfx=True, max_voice_starts=MAX_VOICE_STARTS):
+        self.music = music
+        self.max_tracks = max_tracks  # Pistas de fondo que se mantienen cargadas a la vez
+        self.tracks = OrderedDict()   # nivel -> clip, ordenadas de menos a más reciente
+        self.current_level = None     # Nivel cuya música está sonando o pausada
+        self.paused_time = 0          # Posición guardada al pausar
+        self._lock = threading.Lock()
+        self._loading = {}            # nivel -> threading.Event de una precarga en curso
+        self.sfx_files = sfx
+        self.sfx = {}                 # nombre -> VoicePool
+        self.max_voice_starts = max_voice_starts
+        self.voice_starts = 0         # Voces empezadas en el frame actual
+        self.dropped = 0              # Efectos descartados por el límite por frame
+        self.latencies = np.zeros(LATENCY_SAMPLES) # Últimas latencias clic-sonido (anillo)
+        self.latency_count = 0
+        if preload_sfx:
+            self.load_sfx()
+
+    # Carga los efectos indicados, o todos si no se indica ninguno (puede llamarse desde
+    # un hilo de carga). Los que ya están cargados no se vuelven a abrir.
+    def load_sfx(self, names=None):
+        for name in names or self.sfx_files:
+            if self.sfx.get(name):
+                continue
+            self.sfx[name] = load_voices(*self.sfx_files[name])
+
+    # Devuelve la pista del nivel, cargándola si no está en caché
+    def _get_track(self, level):
+        with self._lock:
+            pending = self._loading.get(level)
+        if pending:
+            pending.wait() # Espera a que termine la precarga en segundo plano
+
+        with self._lock:
+            if level in self.tracks:
+                self.tracks.move_to_end(level)
+                return self.tracks[level]
+
+        clip = self._load_track(level)
+        with self._lock:
+            self._store(level, clip)
+        return clip
+
+    def _load_track(self, level):
+        if level not in self.music:
+            return None
+        path, volume = self.music[level]
+        clip = load_clip(path)
+        if clip:
+            clip.setLoop(True)
+            clip.setVolume(volume * Audio.volume_multiplier)
+        return clip
+
+    # Guarda una pista en la caché y expulsa la menos usada si se supera el límite
+    def _store(self, level, clip):
+        self.tracks[level] = clip
+        self.tracks.move_to_end(level)
+        for old_level in list(self.tracks):
+            if len(self.tracks) <= self.max_tracks:
+                break
+            if old_level != self.current_level and old_level != level:
+                old_clip = self.tracks.pop(old_level)
+                if old_clip:
+                    old_clip.stop()
+
+    # Carga la pista de un nivel en un hilo en segundo plano (por ejemplo, la del siguiente nivel)
+    def preload_music(self, level):
+        with self._lock:
+            if level in self.tracks or level in self._loading or level not in self.music:
+                return
+            done = threading.Event()
+            self._loading[level] = done
+
+        def worker():
+            clip = self._load_track(level)
+            with self._lock:
+                self._store(level, clip)
+                del self._loading[level]
+            done.set()
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    # Reproduce la música de un nivel desde el inicio, deteniendo la anterior
+    def play_music(self, level):
+        self.stop_music()
+        clip = self._get_track(level)
+        self.current_level = level
+        self.paused_time = 0
+        if clip:
+            clip.setTime(0)
+            clip.play()
+
+    def current_clip(self):
+        return self.tracks.get(self.current_level)
+
+    def pause_music(self):
+        clip = self.current_clip()
+        if clip and clip.status() == AudioSound.PLAYING:
+            self.paused_time = clip.getTime()
+            clip.stop()
+
+    # Continúa la música desde donde se pausó
+    def resume_music(self):
+        self.seek_music(self.paused_time)
+
+    # Reproduce la música actual desde la posición indicada (en segundos)
+    def seek_music(self, position):
+        clip = self.current_clip()
+        if clip:
+            clip.stop()
+            clip.setTime(position)
+            clip.play()
+
+    def stop_music(self):
+        clip = self.current_clip()
+        if clip:
+            clip.stop()
+        self.current_level = None
+        self.paused_time = 0
+
+    def music_playing(self):
+        clip = self.current_clip()
+        return bool(clip) and clip.status() == AudioSound.PLAYING
+
+    # Abre un frame nuevo para el límite de voces que pueden empezar
+    def new_frame(self):
+        self.voice_starts = 0
+
+    # Reproduce un efecto de sonido ya cargado en una voz libre (o robada). 'requested_at'
+    # es el instante del clic que lo provocó (time.perf_counter()): se mide la latencia
+    # desde el clic hasta que la voz empieza. Devuelve False si no sonó.
+    def play_sfx(self, name, requested_at=None):
+        pool = self.sfx.get(name)
+        if not pool:
+            return False
+        if self.voice_starts >= self.max_voice_starts:
+            self.dropped += 1
+            return False
+        self.voice_starts += 1
+        pool.play()
+        if requested_at is not None:
+            self.latencies[self.latency_count % LATENCY_SAMPLES] = perf_counter() - requested_at
+            self.latency_count += 1
+        return True
+
+    # Latencia clic-sonido de los últimos efectos medidos, en milisegundos: hasta que la
+    # voz empieza a sonar (no incluye el búfer del dispositivo de audio). None sin medidas.
+    def latency_report(self):
+        if not self.latency_count:
+            return None
+        latencies = self.latencies[:min(self.latency_count, LATENCY_SAMPLES)] * 1000
+        p50, p95 = np.percentile(latencies, (50, 95))
+        return {'samples': self.latency_count, 'p50_ms': float(p50), 'p95_ms': float(p95), 'max_ms': float(latencies.max())}
+
+    # Voces sonando, robadas y descartadas de todos los efectos
+    def voice_stats(self):
+        pools = [pool for pool in self.sfx.values() if pool]
+        return {'playing': sum(pool.playing() for pool in pools), 'steals': sum(pool.steals for pool in pools),
+                'dropped': self.dropped}
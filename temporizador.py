@@ -0,0 +1,89 @@
+# Rueda de temporizadores: programación y cancelación en O(1) sobre el reloj de juego
+# (no depende de Ursina)
+import math
+from collections import Counter
+
+# ======================================================================================
+# --- Temporizador ---
+# ======================================================================================
+# Devuelto por TimerWheel.schedule(); sirve para cancelarlo
+class Timer:
+    __slots__ = ('due', 'slot', 'group', 'function', 'args', 'active')
+
+    def __init__(self, due, slot, group, function, args):
+        self.due = due           # Tick en el que vence
+        self.slot = slot         # Casilla de la rueda
+        self.group = group       # Grupo para cancelarlo en bloque (por ejemplo, 'level')
+        self.function = function
+        self.args = args
+        self.active = True       # False una vez ejecutado o cancelado
+
+# ======================================================================================
+# --- Rueda de temporizadores ---
+# ======================================================================================
+# Rueda con 'slots' casillas de 'resolution' segundos: un temporizador que vence en el tick
+# t va a la casilla t % slots. Programar y cancelar es O(1) (cada casilla es un diccionario
+# que conserva el orden de inserción); cada tick solo mira su casilla, y los temporizadores
+# que vencen en una vuelta posterior de la rueda se quedan en ella.
+# El reloj solo avanza con tick(): mientras no se llama (el juego en pausa), todos los
+# temporizadores pendientes quedan congelados.
+class TimerWheel:
+    def __init__(self, resolution, slots=256):
+        self.resolution = resolution
+        self.slots = [{} for _ in range(slots)]
+        self.groups = {}      # grupo -> {Timer: None} de los pendientes
+        self.ticks = 0        # Ticks transcurridos
+
+    def __len__(self):
+        return sum(len(timers) for timers in self.groups.values())
+
+    @property
+    def time(self):
+        return self.ticks * self.resolution
+
+    # Ejecuta 'function(*args)' dentro de 'delay' segundos de este reloj (como pronto en
+    # el siguiente tick)
+    def schedule(self, delay, function, *args, group=None):
+        due = self.ticks + max(1, math.ceil(delay / self.resolution - 1e-9))
+        slot = due % len(self.slots)
+        timer = Timer(due, slot, group, function, args)
+        self.slots[slot][timer] = None
+        self.groups.setdefault(group, {})[timer] = None
+        return timer
+
+    def cancel(self, timer):
+        if not timer.active:
+            return False
+        timer.active = False
+        del self.slots[timer.slot][timer]
+        del self.groups[timer.group][timer]
+        return True
+
+    # Cancela todos los temporizadores de un grupo; devuelve cuántos había
+    def cancel_group(self, group):
+        timers = self.groups.pop(group, {})
+        for timer in timers:
+            timer.active = False
+            del self.slots[timer.slot][timer]
+        return len(timers)
+
+    # Cancela todo y, con 'reset', vuelve el reloj a cero
+    def clear(self, reset=False):
+        for group in list(self.groups):
+            self.cancel_group(group)
+        if reset:
+            self.ticks = 0
+
+    # Avanza un tick y ejecuta, en el orden en que se programaron, los temporizadores que
+    # vencen en él. Los que se programan durante el tick van como pronto al siguiente.
+    def tick(self):
+        self.ticks += 1
+        slot = self.slots[self.ticks % len(self.slots)]
+        due = [timer for timer in slot if timer.due == self.ticks]
+        for timer in due:
+            if self.cancel(timer): # Un temporizador anterior del mismo tick pudo cancelarlo
+                timer.function(*timer.args)
+
+    # Temporizadores pendientes por grupo, para diagnóstico
+    def pending(self):
+        return Counter({group: len(timers) for group, timers in self.groups.items() if timers})
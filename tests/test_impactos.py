@@ -0,0 +1,73 @@
+# Pruebas de la detección de impactos vectorizada (impactos.py)
+import numpy as np
+import pytest
+
+from impactos import HitTester, Occluders, TargetArrays, TargetSnapshot, spread_directions
+
+ORIGIN = np.array((0.0, 0.0, -15.0))
+# Paredes laterales y fondo de la cabina (como escenario.range_occluders)
+BOXES = [((0, 5, 30), (40, 30, 1)), ((-20, 5, 7.5), (1, 30, 85)), ((20, 5, 7.5), (1, 30, 85))]
+
+
+def random_targets(rng, count):
+    targets = TargetArrays(capacity=4)
+    for target_id in range(count):
+        center = (rng.uniform(-25, 25), rng.uniform(-8, 8), rng.uniform(10, 35))
+        targets.add(target_id * 3 + 1, centers=center, radii=rng.uniform(0.7, 1.5))
+    return targets
+
+
+def aim(rng, targets, rays):
+    picked = rng.integers(targets.count, size=rays)
+    directions = targets.centers[picked] - ORIGIN + rng.normal(0, 1.0, (rays, 3))
+    return directions / np.linalg.norm(directions, axis=1)[:, None]
+
+
+# Todos los rayos de una vez dan lo mismo que uno a uno
+def test_cast_many_matches_cast_loop():
+    rng = np.random.default_rng(5)
+    for up in ((0, 1, 0), (0.2, 0.98, 0)):
+        hit_tester = HitTester(Occluders(BOXES))
+        targets = random_targets(rng, 30)
+        directions = aim(rng, targets, 64)
+        ids, distances = hit_tester.cast_many(targets, ORIGIN, directions, up)
+        assert (ids >= 0).any() and (ids < 0).any()
+        for direction, target_id, distance in zip(directions, ids, distances):
+            single = hit_tester.cast(targets, ORIGIN, direction, up)
+            if target_id < 0:
+                assert single is None and np.isinf(distance)
+            else:
+                assert single[0] == target_id and single[1] == pytest.approx(distance)
+
+
+# Se alcanza el objetivo más cercano del rayo, y una pared lo tapa
+def test_nearest_target_and_occlusion():
+    targets = TargetArrays()
+    targets.add(1, centers=(0, 0, 20), radii=1)
+    targets.add(2, centers=(0, 0, 10), radii=1)
+    targets.add(3, centers=(30, 0, 20), radii=1) # Detrás de la pared derecha
+    hit_tester = HitTester(Occluders(BOXES))
+    assert hit_tester.cast(targets, ORIGIN, (0, 0, 1))[0] == 2
+    assert hit_tester.cast(targets, ORIGIN, (30, 0, 35)) is None
+    assert HitTester().cast(targets, ORIGIN, (30, 0, 35))[0] == 3
+    assert hit_tester.cast(targets, ORIGIN, (0, 0, -1)) is None
+
+
+# Un frame guardado no cambia aunque los objetivos se muevan o se retiren después
+def test_snapshot_keeps_frame():
+    targets = TargetArrays()
+    targets.add(1, centers=(0, 0, 20), radii=1)
+    snapshot = TargetSnapshot(1.0, 0.0, targets)
+    targets.move(1, (10, 0, 20))
+    targets.remove(1)
+    assert HitTester().cast(snapshot, ORIGIN, (0, 0, 1))[0] == 1
+    assert HitTester().cast(targets, ORIGIN, (0, 0, 1)) is None
+
+
+# Los perdigones salen dentro del cono del arma
+def test_spread_directions_within_cone():
+    forward = np.array((0.3, 0.1, 1.0))
+    directions = spread_directions(forward, (0, 1, 0), 12, 2.0, np.random.default_rng(0))
+    assert directions.shape == (12, 3)
+    cosines = directions @ (forward / np.linalg.norm(forward)) / np.linalg.norm(directions, axis=1)
+    assert (np.degrees(np.arccos(np.clip(cosines, -1, 1))) <= 2.0 + 1e-6).all()
@@ -0,0 +1,57 @@
+# Pruebas del progreso persistente y del registro de disparos (progreso.py)
+import os
+
+from progreso import HEADER, MAGIC, SHOT, SHOTS_FILE, VERSION, Progress, load_shots, level_stats
+
+
+def write_session(directory, shots):
+    progress = Progress(directory)
+    progress.load_history()
+    progress.start_run()
+    for level, hits in shots:
+        progress.shot(level, 'pistol', 1, hits, reaction=0.4)
+    progress.close()
+    return progress
+
+
+def test_shots_survive_sessions(tmp_path):
+    write_session(tmp_path, [(1, 1), (1, 0)])
+    write_session(tmp_path, [(2, 1)])
+    progress = Progress(tmp_path)
+    assert progress.load_history() == 3
+    assert progress.history['level'].tolist() == [1, 1, 2]
+    assert progress.history['run'].tolist() == [1, 1, 2]
+    assert progress.profile['runs'] == 2
+    assert level_stats(progress.shots(), 1)['accuracy'] == 50
+    progress.close()
+
+
+# Un registro a medio escribir (el juego se cerró a mitad) se descarta y los siguientes
+# disparos quedan alineados
+def test_truncated_record_is_dropped(tmp_path):
+    write_session(tmp_path, [(1, 1), (1, 1)])
+    path = os.path.join(tmp_path, SHOTS_FILE)
+    with open(path, 'ab') as file:
+        file.write(SHOT.pack(0.0, 9, 9, b'rifle', 1, 1, 0.0, 0.0)[:SHOT.size // 2])
+    assert len(load_shots(path)) == 2
+    write_session(tmp_path, [(3, 0)])
+    assert os.path.getsize(path) == HEADER.size + 3 * SHOT.size
+    shots = load_shots(path)
+    assert shots['level'].tolist() == [1, 1, 3]
+    assert shots['weapon'].tolist() == [b'pistol'] * 3
+
+
+# Un archivo de otro formato o versión (o con la cabecera cortada) no se lee como disparos:
+# se aparta como '.old' y se empieza uno nuevo
+def test_foreign_file_is_set_aside(tmp_path):
+    path = os.path.join(tmp_path, SHOTS_FILE)
+    for contents in (HEADER.pack(MAGIC, VERSION + 1) + bytes(3 * SHOT.size), b'AIM', b'no es un registro' * 10):
+        os.makedirs(tmp_path, exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(contents)
+        assert len(load_shots(path)) == 0
+        write_session(tmp_path, [(1, 1)])
+        with open(path + '.old', 'rb') as file:
+            assert file.read() == contents
+        assert load_shots(path)['level'].tolist() == [1]
+        os.remove(path)
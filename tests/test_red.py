@@ -0,0 +1,174 @@
+# Pruebas del protocolo del modo versus sin sockets (red.py): el anfitrión y dos clientes se
+# pasan los datagramas directamente, perdiendo una parte en cada sentido
+from time import perf_counter
+
+import numpy as np
+
+from impactos import HitTester
+from red import (HELLO, HELLO_MESSAGE, NO_BASELINE, PLAYERS, PROTOCOL_VERSION, SHOT, SHOT_HEADER, SHOT_RECORD,
+                 SHOTS, SNAPSHOT, SNAPSHOT_HEADER, TICK_RATE, VersusHost, VersusState, room_name)
+
+ORIGIN = (0.0, 0.0, -15.0)
+AWAY = (0.0, 0.0, -1.0) # Hacia atrás: no alcanza a nadie
+UP = (0.0, 1.0, 0.0)
+
+
+class HostTransport:
+    def __init__(self):
+        self.outbox = []
+
+    def sendto(self, data, address):
+        self.outbox.append((data, address))
+
+
+class ClientTransport:
+    def __init__(self, network, address):
+        self.network = network
+        self.address = address
+        self.blocked = False # Pierde todo lo que manda el cliente
+
+    def sendto(self, data):
+        self.network.sent.append((self.address, data[0]))
+        if not self.blocked and self.network.rng.random() >= self.network.loss:
+            self.network.host.datagram_received(data, self.address)
+
+
+# Un anfitrión y PLAYERS clientes en la misma sala con un reloj simulado: cada tick() avanza
+# el anfitrión 1 / TICK_RATE segundos y entrega sus instantáneas (salvo las que se pierden)
+class Network:
+    def __init__(self, loss=0.0, seed=0, duration=30):
+        self.rng = np.random.default_rng(seed)
+        self.loss = loss
+        self.host = VersusHost(duration=duration, hit_tester=HitTester())
+        self.host.connection_made(HostTransport())
+        self.now = perf_counter()
+        self.sent = [] # (dirección, tipo) de cada datagrama de los clientes, se pierda o no
+        self.snapshots = [] # (cliente, cabecera, ids vivos en el anfitrión, marcadores) entregadas
+        self.clients = {}
+        for player in range(PLAYERS):
+            address = ('cliente', player)
+            state = VersusState(room='pruebas')
+            state.transport = ClientTransport(self, address)
+            self.clients[address] = state
+        while any(state.player is None for state in self.clients.values()):
+            for state in self.clients.values():
+                if state.player is None:
+                    state.send(HELLO_MESSAGE.pack(HELLO, PROTOCOL_VERSION, room_name(state.room)))
+            self.deliver()
+        self.match, = self.host.matches.values()
+
+    def deliver(self):
+        outbox = self.host.transport.outbox
+        while outbox:
+            data, address = outbox.pop(0)
+            if self.rng.random() < self.loss:
+                continue
+            if data[0] == SNAPSHOT:
+                self.snapshots.append((self.clients[address], SNAPSHOT_HEADER.unpack_from(data),
+                                       frozenset(self.match.spawns), tuple(map(tuple, self.match.scores))))
+            self.clients[address].receive(data)
+
+    def tick(self, count=1):
+        for _ in range(count):
+            self.now += 1 / TICK_RATE
+            self.host.tick(self.now)
+            self.deliver()
+            for state in self.clients.values():
+                if state.ready:
+                    state.start_level()
+
+
+# Con pérdidas en los dos sentidos, cada instantánea que llega se reconstruye exactamente
+# (ids vivos y marcadores del anfitrión), sea completa o un delta contra una confirmada
+def test_snapshot_deltas_survive_loss():
+    network = Network(loss=0.3, seed=4)
+    network.tick(TICK_RATE * 20)
+    assert len(network.match.spawns) > 0
+    deltas = 0
+    for state, header, live, scores in network.snapshots:
+        tick, baseline = header[2], header[3]
+        if tick not in state.snapshots:
+            continue # Llegó desordenada o ya se olvidó
+        ids, received_scores = state.snapshots[tick]
+        assert ids == live
+        assert received_scores == scores
+        deltas += baseline != NO_BASELINE
+    assert deltas > len(network.snapshots) // 2
+    for state in network.clients.values(): # Lo mostrado sale de la última instantánea recibida
+        assert state.active
+        ids = state.snapshots[state.last_tick][0]
+        assert all(target_id in state.known for target_id in ids)
+        assert set(state.registry.targets) <= ids
+
+
+# Los disparos que se pierden vuelven a ir en el siguiente paquete; el anfitrión los aplica
+# en orden y una sola vez, y el cliente solo olvida los que el anfitrión confirmó
+def test_lost_shots_are_resent():
+    network = Network()
+    network.tick(TICK_RATE)
+    state = next(state for state in network.clients.values() if state.player == 0)
+    assert state.active
+    clock = network.match.state.time
+    state.transport.blocked = True
+    for offset in (-0.2, -0.1, 0.0):
+        assert state.fire(clock + offset)
+        state.resolve_shot(HitTester(), state.swarm, ORIGIN, AWAY, UP)
+    assert [shot[0] for shot in state.pending] == [1, 2, 3]
+    peer = next(peer for peer in network.match.peers if peer.player == 0)
+    assert peer.last_seq == 0
+    state.transport.blocked = False
+    network.sent.clear()
+    network.tick() # La instantánea pide la confirmación: va un SHOT con los tres disparos
+    assert [kind for address, kind in network.sent if address == peer.address] == [SHOT]
+    assert peer.last_seq == 3
+    assert network.match.scores[0][SHOTS] == 3
+    network.tick()
+    assert not state.pending
+    assert state.host_scores[0][SHOTS] == 3
+
+
+def shot_packet(tick, shots):
+    return SHOT_HEADER.pack(SHOT, tick, len(shots)) + b''.join(
+        SHOT_RECORD.pack(seq, at, *ORIGIN, *AWAY, *UP) for seq, at in shots)
+
+
+# El anfitrión ignora los repetidos y los que llegan tras un hueco
+def test_host_applies_shots_in_sequence():
+    network = Network()
+    network.tick(TICK_RATE)
+    match = network.match
+    peer = next(peer for peer in match.peers if peer.player == 0)
+    address = peer.address
+    clock = match.state.time
+    host = network.host
+    host.datagram_received(shot_packet(NO_BASELINE, [(2, clock - 0.1)]), address)
+    assert (peer.last_seq, match.scores[0][SHOTS]) == (0, 0)
+    host.datagram_received(shot_packet(NO_BASELINE, [(1, clock - 0.2), (2, clock - 0.1)]), address)
+    assert (peer.last_seq, match.scores[0][SHOTS]) == (2, 2)
+    host.datagram_received(shot_packet(NO_BASELINE, [(1, clock - 0.2), (2, clock - 0.1)]), address)
+    assert (peer.last_seq, match.scores[0][SHOTS]) == (2, 2)
+    host.datagram_received(shot_packet(NO_BASELINE, [(2, clock - 0.1), (3, clock)]), address)
+    assert (peer.last_seq, match.scores[0][SHOTS]) == (3, 3)
+
+
+# Un objetivo que vuelve tras una predicción rechazada no cuenta otra vez como aparecido
+def test_rejected_prediction_counts_target_once():
+    network = Network()
+    network.tick(TICK_RATE)
+    state = next(state for state in network.clients.values() if state.player == 0)
+    state.update(0)
+    target_id = int(state.swarm.ids[0])
+    spawned = state.targets_spawned
+    state.transport.blocked = True
+    assert state.fire(network.match.state.time)
+    forward = state.swarm.center(target_id) - np.array(ORIGIN)
+    hit = state.resolve_shot(HitTester(), state.swarm, ORIGIN, forward, UP)
+    assert [target.id for target in hit] == [target_id]
+    # El anfitrión lo resuelve como un fallo (por ejemplo, por el retroceso de posiciones)
+    network.host.datagram_received(shot_packet(state.last_tick, [(1, state.last_shot_time)]),
+                                   next(peer.address for peer in network.match.peers if peer.player == 0))
+    state.transport.blocked = False
+    network.tick()
+    assert not state.pending
+    assert target_id in state.registry
+    assert state.targets_spawned == spawned
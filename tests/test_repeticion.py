@@ -0,0 +1,89 @@
+# Pruebas de las repeticiones: grabar una sesión y reproducirla sin ventana (repeticion.py)
+import numpy as np
+
+from impactos import HitTester, Occluders, TargetSnapshot
+from repeticion import END, INPUT, SPAWN, START, ReplayRecorder, load_replay, play_headless
+from simulacion import CAMERA_POSITION, GameState, wall_shooter
+
+BOXES = [((0, 5, 30), (40, 30, 1)), ((-20, 5, 7.5), (1, 30, 85)), ((20, 5, 7.5), (1, 30, 85))]
+UP = (0.0, 1.0, 0.0)
+
+
+# Juega como el front end y graba lo mismo que juego.py: el inicio de cada nivel, cada
+# objetivo generado, cada clic (unos contra el frame mostrado y otros contra los objetivos
+# vivos) y el final. El nivel 'abort_level' se abandona a medias.
+def record_session(path, levels, seed=11, abort_level=None):
+    recorder = ReplayRecorder(str(path), BOXES)
+    state = GameState()
+    hit_tester = HitTester(Occluders(BOXES))
+    origin = np.array(CAMERA_POSITION, dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    results = []
+
+    def drain():
+        for kind, target in state.drain_events():
+            if kind == 'spawn':
+                recorder.spawn(state.steps, target)
+            elif kind == 'end':
+                recorder.end(state.steps, state)
+                results.append((state.hits, state.shots_fired, state.targets_hit))
+
+    for level in levels:
+        recorder.start(level, seed + level)
+        state.start_level(level, seed + level)
+        drain()
+        while state.active:
+            state.step()
+            drain()
+            if level == abort_level and state.time > 3:
+                recorder.abort(state.steps)
+                state.abort_level()
+                break
+            target_id = wall_shooter(state)
+            if target_id is None or rng.random() > 0.1:
+                continue
+            snapshot = TargetSnapshot(state.time, 0, state.swarm, state.steps) if rng.random() < 0.5 else None
+            forward = state.position(target_id) - origin + rng.normal(0, 0.3, 3)
+            at = state.time
+            recorder.input('left mouse down', state.steps, snapshot, 0.0, at, origin, forward, UP, (0, 0, 0))
+            if state.fire(at):
+                state.resolve_shot(hit_tester, snapshot or state.swarm, origin, forward, UP)
+            drain()
+    recorder.close()
+    return results
+
+
+def test_replay_round_trip(tmp_path):
+    path = tmp_path / 'partida.rep'
+    recorded = record_session(path, (1, 3, 4))
+    assert len(recorded) == 3 and all(hits for hits, _, _ in recorded)
+
+    header, records = load_replay(path)
+    assert header['occluders'] == [(tuple(map(float, center)), tuple(map(float, size))) for center, size in BOXES]
+    kinds = records['kind'].tolist()
+    assert kinds.count(START) == 3 and kinds.count(END) == 3
+    assert kinds.count(SPAWN) == 10 + 14 + 16 and kinds.count(INPUT) > 0
+
+    player = play_headless(path)
+    assert player.finished
+    assert player.mismatches == []
+    assert [result['replayed'] for result in player.results] == recorded
+
+
+# Un nivel abandonado no deja resultado y el siguiente se reproduce igual
+def test_replay_with_abort(tmp_path):
+    path = tmp_path / 'abandono.rep'
+    recorded = record_session(path, (2, 1), abort_level=2)
+    assert len(recorded) == 1
+    player = play_headless(path)
+    assert player.mismatches == []
+    assert [(result['level'], result['replayed']) for result in player.results] == [(1, recorded[0])]
+
+
+# Una repetición cortada a mitad de un registro se lee hasta el último completo
+def test_truncated_replay(tmp_path):
+    path = tmp_path / 'cortada.rep'
+    record_session(path, (1,))
+    _, records = load_replay(path)
+    path.write_bytes(path.read_bytes()[:-records.itemsize // 2])
+    assert len(load_replay(path)[1]) == len(records) - 1
@@ -0,0 +1,61 @@
+# Pruebas de la simulación sin ventana (simulacion.py)
+from simulacion import LEVEL_CONFIG, GameState, run_level, wall_shooter
+
+
+def summary(state):
+    return (state.hits, state.shots_fired, state.targets_hit, state.targets_spawned, state.points, state.steps,
+            state.passed)
+
+
+# La misma semilla da exactamente la misma partida, con cualquier arma y trayectoria
+def test_run_level_is_deterministic():
+    for level in (1, 3, 4):
+        first = run_level(level, seed=1234, shooter=wall_shooter)
+        second = run_level(level, seed=1234, shooter=wall_shooter)
+        assert not first.active
+        assert first.targets_spawned == LEVEL_CONFIG[level]['targets']
+        assert summary(first) == summary(second)
+
+
+def test_run_level_depends_on_seed():
+    results = {summary(run_level(4, seed=seed, shooter=wall_shooter)) for seed in range(4)}
+    assert len(results) > 1
+
+
+# update() avanza en pasos fijos sea cual sea el frame: el resultado no depende de los FPS
+def test_update_matches_fixed_steps():
+    stepped = GameState(seed=7)
+    stepped.start_level(4)
+    for _ in range(600):
+        stepped.step()
+    framed = GameState(seed=7)
+    framed.start_level(4)
+    while framed.steps < 600:
+        framed.update(1 / 47)
+    assert framed.steps >= 600
+    for _ in range(framed.steps - 600):
+        stepped.step()
+    assert stepped.targets_spawned == framed.targets_spawned
+    assert sorted(stepped.registry.targets) == sorted(framed.registry.targets)
+
+
+# En pausa no avanzan ni la simulación ni los temporizadores del nivel
+def test_pause_freezes_level():
+    state = GameState(seed=3)
+    state.start_level(1)
+    state.update(0.5)
+    steps, pending = state.steps, state.timers.pending()
+    state.pause()
+    assert state.update(10) == 0
+    assert (state.steps, state.timers.pending()) == (steps, pending)
+    state.resume()
+    assert state.update(0.1) > 0
+
+
+def test_fire_respects_weapon_rate():
+    state = GameState(seed=0)
+    state.start_level(1) # Pistola: 2 disparos por segundo
+    assert state.fire(1.0)
+    assert not state.fire(1.2)
+    assert state.fire(1.5)
+    assert state.shots_fired == 2
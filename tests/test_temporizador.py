@@ -0,0 +1,92 @@
+# Pruebas de la rueda de temporizadores (temporizador.py)
+from temporizador import TimerWheel
+
+
+def run(wheel, ticks):
+    for _ in range(ticks):
+        wheel.tick()
+
+
+def test_timers_fire_in_order():
+    wheel = TimerWheel(0.1, slots=8)
+    fired = []
+    wheel.schedule(0.3, fired.append, 'c')
+    wheel.schedule(0.1, fired.append, 'a')
+    wheel.schedule(0.3, fired.append, 'd') # Mismo tick: en el orden en que se programaron
+    wheel.schedule(0.2, fired.append, 'b')
+    wheel.schedule(2.0, fired.append, 'e') # Varias vueltas de la rueda
+    run(wheel, 3)
+    assert fired == ['a', 'b', 'c', 'd']
+    run(wheel, 16)
+    assert fired == ['a', 'b', 'c', 'd']
+    run(wheel, 1)
+    assert fired == ['a', 'b', 'c', 'd', 'e']
+    assert len(wheel) == 0
+
+
+def test_zero_delay_waits_for_next_tick():
+    wheel = TimerWheel(0.1)
+    fired = []
+
+    def chain():
+        fired.append(wheel.ticks)
+        if len(fired) < 3:
+            wheel.schedule(0, chain)
+
+    wheel.schedule(0, chain)
+    run(wheel, 5)
+    assert fired == [1, 2, 3]
+
+
+def test_cancel():
+    wheel = TimerWheel(0.1)
+    fired = []
+    timer = wheel.schedule(0.2, fired.append, 'cancelado')
+    wheel.schedule(0.2, fired.append, 'vivo')
+    assert wheel.cancel(timer)
+    assert not wheel.cancel(timer)
+    run(wheel, 3)
+    assert fired == ['vivo']
+    assert not wheel.cancel(timer)
+
+
+# Un temporizador puede cancelar a otro que vence en el mismo tick
+def test_cancel_within_same_tick():
+    wheel = TimerWheel(0.1)
+    fired = []
+    later = None
+    wheel.schedule(0.1, lambda: wheel.cancel(later))
+    later = wheel.schedule(0.1, fired.append, 'cancelado')
+    run(wheel, 2)
+    assert fired == []
+
+
+def test_cancel_group_and_clear():
+    wheel = TimerWheel(0.1)
+    fired = []
+    for delay in (0.1, 0.2, 0.3):
+        wheel.schedule(delay, fired.append, delay, group='level')
+    wheel.schedule(0.2, fired.append, 'menu', group='menu')
+    assert wheel.pending() == {'level': 3, 'menu': 1}
+    assert wheel.cancel_group('level') == 3
+    run(wheel, 4)
+    assert fired == ['menu']
+    wheel.schedule(0.1, fired.append, 'otro')
+    wheel.clear(reset=True)
+    assert (len(wheel), wheel.ticks) == (0, 0)
+
+
+# Sin tick() (el juego en pausa) no vence nada: al reanudar, cada temporizador vence
+# tantos ticks después como le faltaban
+def test_pause_freezes_timers():
+    wheel = TimerWheel(0.1)
+    fired = []
+    wheel.schedule(0.5, fired.append, 'fin')
+    run(wheel, 3)
+    assert fired == [] and wheel.pending() == {None: 1}
+    wheel.schedule(0.1, fired.append, 'tras la pausa') # Programado en pausa: cuenta desde aquí
+    run(wheel, 1)
+    assert fired == ['tras la pausa']
+    run(wheel, 1)
+    assert fired == ['tras la pausa', 'fin']
+    assert wheel.ticks == 5
@@ -0,0 +1,56 @@
+# Pruebas de las trayectorias en forma cerrada (trayectorias.py)
+import math
+
+import numpy as np
+import pytest
+
+from enjambre import EXIT_X
+from simulacion import GameState, SPAWN_X
+from trayectorias import PATHS, Trajectory, evaluate
+
+
+# Trayectorias como las de un nivel: cada forma con parámetros sorteados por GameState
+def level_paths(kind, count=40, seed=0):
+    state = GameState(seed=seed)
+    paths = []
+    for _ in range(count):
+        side = state.rng.choice([-1, 1])
+        position = [SPAWN_X * side, state.rng.uniform(-8, -2), state.rng.uniform(15, 25)]
+        direction = [-side, state.rng.uniform(-.2, .2), state.rng.uniform(-.1, .1)]
+        paths.append(state._path(kind, position, direction, state.rng.uniform(10, 28)))
+    return paths
+
+
+# El instante de salida calculado al aparecer coincide con las posiciones muestreadas:
+# antes de él el objetivo llega a estar en pantalla y desde él ya no vuelve a entrar
+@pytest.mark.parametrize('kind', PATHS)
+def test_exit_time_matches_sampled_positions(kind):
+    for path in level_paths(kind):
+        exit_time = path.exit_time(EXIT_X)
+        assert math.isfinite(exit_time) and exit_time > 0
+        before = np.linspace(0, exit_time, 400, endpoint=False)
+        assert min(abs(path.position(u)[0]) for u in before) < EXIT_X
+        after = exit_time + np.linspace(0, 0.5, 50)
+        assert all(abs(path.position(u)[0]) >= EXIT_X - 1e-6 for u in after)
+
+
+# La evaluación en bloque da lo mismo que cada trayectoria por separado, mezclando formas
+def test_evaluate_matches_position():
+    paths = [path for kind in PATHS for path in level_paths(kind, count=5, seed=1)]
+    elapsed = np.linspace(0, 2, len(paths))
+    coefficients = np.stack([path.coefficients for path in paths])
+    frequencies = np.array([path.frequency for path in paths])
+    phases = np.array([path.phase for path in paths])
+    expected = np.array([path.position(u) for path, u in zip(paths, elapsed)])
+    np.testing.assert_allclose(evaluate(elapsed, coefficients, frequencies, phases), expected, atol=1e-9)
+
+
+# Los coeficientes bastan para reconstruir la trayectoria (así viajan por red)
+@pytest.mark.parametrize('kind', PATHS)
+def test_from_coefficients_round_trip(kind):
+    for path in level_paths(kind, count=5):
+        copy = Trajectory.from_coefficients(path.kind, path.coefficients.ravel().tolist(), path.frequency, path.phase)
+        assert copy.terms == path.terms
+        assert copy.exit_time(EXIT_X) == pytest.approx(path.exit_time(EXIT_X))
+        for u in (0, 0.3, 1.7):
+            np.testing.assert_allclose(copy.position(u), path.position(u), atol=1e-9)
@@ -0,0 +1,145 @@
+# Trayectorias de los objetivos en forma cerrada (no depende de Ursina)
+# Cada objetivo sigue una trayectoria paramétrica que se evalúa directamente en el tiempo
+# transcurrido desde su aparición, sin integrar paso a paso: la posición es exacta con
+# cualquier paso de simulación o FPS. Todas las formas son casos de una misma expresión,
+#   p(u) = origen + c1 u + c2 u² + c3 u³ + a sin(w u + f) + b cos(w u + f)
+# así que un enjambre entero se evalúa con unas pocas operaciones sobre arrays, mezclando
+# formas, y el instante de salida se calcula una sola vez al aparecer.
+import math
+
+import numpy as np
+
+PATHS = ('linear', 'weave', 'bezier', 'orbit') # Formas disponibles
+EPSILON = 1e-9
+# Términos que usa una trayectoria además de la recta (bits): con ellos la evaluación en
+# bloque se salta lo que ningún objetivo necesita
+CURVED = 1 # c2 o c3 no nulos
+WAVES = 2  # Oscilación
+ALL_TERMS = CURVED | WAVES
+
+# ======================================================================================
+# --- Trayectoria de un objetivo ---
+# ======================================================================================
+# 'coefficients': filas origen, c1, c2, c3, a y b (6 x 3), con las vistas 'origin',
+# 'polynomial' (c1 a c3) y 'waves' (a y b); 'frequency' en radianes por segundo y 'phase'
+# en radianes. 'start' es la posición al aparecer y 'terms' los términos que usa (bits
+# CURVED y WAVES).
+ORIGIN, C1, C2, C3, A, B = range(6) # Filas de 'coefficients'
+
+class Trajectory:
+    __slots__ = ('kind', 'coefficients', 'origin', 'polynomial', 'waves', 'frequency', 'phase', 'terms', 'start')
+
+    # 'polynomial': lista de las filas c1, c2 y c3 (las que falten son cero)
+    def __init__(self, kind, origin, polynomial, waves=None, frequency=0.0, phase=0.0):
+        self.kind = kind
+        self.coefficients = coefficients = np.zeros((6, 3))
+        coefficients[ORIGIN] = origin
+        coefficients[C1:C1 + len(polynomial)] = polynomial
+        self.origin = coefficients[ORIGIN]
+        self.polynomial = coefficients[C1:C3 + 1]
+        self.waves = coefficients[A:B + 1]
+        self.frequency = float(frequency)
+        self.phase = float(phase)
+        self.terms = CURVED if len(polynomial) > 1 else 0
+        if waves is not None and self.frequency:
+            self.waves[:] = waves
+            self.terms |= WAVES
+        self.start = self.position(0) if self.terms & WAVES else self.origin.copy()
+
+    # Reconstruye una trayectoria a partir de sus coeficientes (6 x 3), por ejemplo recibidos por red
+    @classmethod
+    def from_coefficients(cls, kind, coefficients, frequency, phase):
+        coefficients = np.asarray(coefficients, dtype=np.float64).reshape(6, 3)
+        curved = coefficients[C2:C3 + 1].any()
+        return cls(kind, coefficients[ORIGIN], coefficients[C1:C3 + 1 if curved else C2],
+                   coefficients[A:B + 1], frequency, phase)
+
+    # Posición 'u' segundos después de aparecer
+    def position(self, u):
+        c1, c2, c3 = self.polynomial
+        angle = self.frequency * u + self.phase
+        return self.origin + u * (c1 + u * (c2 + u * c3)) + self.waves[0] * math.sin(angle) \
+            + self.waves[1] * math.cos(angle)
+
+    # Desviación lateral máxima de la oscilación respecto a la parte polinómica
+    @property
+    def reach(self):
+        if not self.terms & WAVES:
+            return 0.0
+        return math.hypot(self.waves[0, 0], self.waves[1, 0])
+
+    # Primer instante u > 0 en el que la parte polinómica cumple |x| = limit (inf si nunca)
+    def crossing_time(self, limit):
+        c1, c2, c3 = self.polynomial[:, 0].tolist()
+        x0 = float(self.origin[0])
+        if not self.terms & CURVED: # Recta: sin buscar raíces
+            if abs(c1) < EPSILON:
+                return math.inf
+            times = ((limit - x0) / c1, (-limit - x0) / c1)
+        else:
+            times = [root.real for side in (limit, -limit) for root in np.roots((c3, c2, c1, x0 - side))
+                     if abs(root.imag) < EPSILON]
+        return min((u for u in times if u > EPSILON), default=math.inf)
+
+    # Instante en el que el objetivo está seguro fuera de |x| <= exit_x
+    def exit_time(self, exit_x):
+        return self.crossing_time(exit_x + self.reach)
+
+    # Instante a partir del que el objetivo está seguro dentro de |x| <= limit (0 si ya lo está)
+    def entry_time(self, limit):
+        if abs(self.origin[0]) + self.reach <= limit:
+            return 0.0
+        return self.crossing_time(limit - self.reach)
+
+# ======================================================================================
+# --- Formas ---
+# ======================================================================================
+# Recta a velocidad constante
+def linear(origin, velocity):
+    return Trajectory('linear', origin, [velocity])
+
+# Recta con una oscilación senoidal de amplitud (vector) 'amplitude' y 'frequency' hercios
+def weave(origin, velocity, amplitude, frequency, phase=0.0):
+    return Trajectory('weave', origin, [velocity], (amplitude, (0, 0, 0)), 2 * math.pi * frequency, phase)
+
+# Órbita de radio 'radius' alrededor de un centro que avanza a 'velocity', en el plano de
+# los ejes 'axes' (vectores unitarios perpendiculares); 'frequency' en vueltas por segundo
+# (negativa para girar al revés)
+def orbit(origin, velocity, radius, frequency, phase=0.0, axes=((1, 0, 0), (0, 1, 0))):
+    waves = (np.multiply(axes[1], radius), np.multiply(axes[0], radius))
+    return Trajectory('orbit', origin, [velocity], waves, 2 * math.pi * frequency, phase)
+
+# Curva de Bézier cúbica de p0 a p3 recorrida en 'duration' segundos, en base de potencias
+def bezier(p0, p1, p2, p3, duration):
+    p0, p1, p2, p3 = (np.asarray(point, dtype=np.float64) for point in (p0, p1, p2, p3))
+    return Trajectory('bezier', p0, [3 * (p1 - p0) / duration,
+                                     3 * (p0 - 2 * p1 + p2) / duration ** 2,
+                                     (p3 - 3 * p2 + 3 * p1 - p0) / duration ** 3])
+
+# Longitud del polígono de control de una Bézier: cota superior de la de la curva
+def control_length(*points):
+    return float(np.linalg.norm(np.diff(np.asarray(points, dtype=np.float64), axis=0), axis=1).sum())
+
+# ======================================================================================
+# --- Evaluación en bloque ---
+# ======================================================================================
+# Posiciones de N trayectorias tras 'elapsed' (N) segundos: 'coefficients' es N x 6 x 3
+# (los de cada Trajectory), 'frequencies' y 'phases' son N y 'terms' dice qué términos hace
+# falta sumar (con cientos de objetivos cuesta más cada operación de NumPy que sus cuentas).
+# Se escribe en 'out' (N x 3) si se da.
+def evaluate(elapsed, coefficients, frequencies, phases, terms=ALL_TERMS, out=None):
+    u = elapsed[:, None]
+    if terms & CURVED:
+        out = np.multiply(coefficients[:, C3], u, out=out) # Horner: ((c3 u + c2) u + c1) u
+        out += coefficients[:, C2]
+        out *= u
+        out += coefficients[:, C1]
+        out *= u
+    else:
+        out = np.multiply(coefficients[:, C1], u, out=out)
+    out += coefficients[:, ORIGIN]
+    if terms & WAVES:
+        angles = frequencies * elapsed + phases
+        out += coefficients[:, A] * np.sin(angles)[:, None]
+        out += coefficients[:, B] * np.cos(angles)[:, None]
+    return out